@@ -0,0 +1,177 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import zlib
+
+from websockets.frames import Frame, Opcode
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from wire_format import FORMATS, ThresholdPerMessageDeflate
+
+FAQ = ["kdy začíná výuka?", "kdo je ředitel školy a jeho kontakt?", "jaká je dostupnost mhd?"]
+
+# Compression options as (name, window bits, memory level, minimum size), None = no compression
+COMPRESSION = [
+    ("none", None),
+    ("deflate-15-8", (15, 8, 0)),
+    ("deflate-12-5", (12, 5, 0)),
+    ("deflate-12-5-min128", (12, 5, 128)),
+    ("deflate-10-4-min128", (10, 4, 128)),
+]
+
+
+def load_answers(data_file, count):
+    """
+    Returns the curated answers of the training data, they have the length and language of the real answers.
+
+    :param data_file (str): Path to the training data file.
+    :param count (int): Maximum number of answers.
+    :return (list): The answers.
+    """
+    answers = []
+    with open(data_file, "r", encoding="utf-8") as file:
+        for line in file:
+            messages = json.loads(line)["messages"]
+            answers.append(next(message["content"] for message in messages if message["role"] == "assistant"))
+            if len(answers) == count:
+                break
+    return answers
+
+
+def transcript(answers, stream, chunk_words):
+    """
+    Returns the frames a session receives: the welcome frame and the answers, streamed as chunks or as whole responses.
+
+    :param answers (list): The answers.
+    :param stream (bool): Whether the answers are streamed.
+    :param chunk_words (int): Number of words of a chunk.
+    :return (list): The messages.
+    """
+    frames = [{
+        "type": "welcome",
+        "message": "Ahoj, Co pro Vás mohu udělat?",
+        "questions": [{"id": i + 1, "text": q} for i, q in enumerate(FAQ)],
+        "token": "Yq3nT0u0bUJ7nqfW2m1Zx5aK"
+    }]
+
+    for answer in answers:
+        if not stream:
+            frames.append({"type": "response", "message": answer})
+            continue
+
+        words = answer.split(" ")
+        for i in range(0, len(words), chunk_words):
+            frames.append({"type": "chunk", "message": " ".join(words[i:i + chunk_words]) + " "})
+        frames.append({"type": "done"})
+
+    frames.append({"type": "info", "message": " -> Odpojuji se. Nashledanou!"})
+    return frames
+
+
+def header_size(length):
+    """
+    Returns the size of the header of an unmasked server frame with the payload length.
+    """
+    return 2 if length < 126 else 4 if length < 65536 else 10
+
+
+def measure(wire_format, compression, frames, rounds):
+    """
+    Sends the frames through the encoder and the deflate extension of the server and decodes them as a client would.
+
+    :return (dict): Bytes on the wire and CPU time per frame in microseconds.
+    """
+    wire_bytes = 0
+    encode_time = 0.0
+    decode_time = 0.0
+    opcode = Opcode.BINARY if wire_format.binary else Opcode.TEXT
+
+    for _ in range(rounds):
+        extension = None
+        if compression is not None:
+            window_bits, mem_level, min_size = compression
+            extension = ThresholdPerMessageDeflate(False, False, window_bits, window_bits, {"memLevel": mem_level}, min_size=min_size)
+            decoder = zlib.decompressobj(wbits=-window_bits)
+
+        wire_bytes = 0
+        for message in frames:
+            start = time.process_time()
+            data = wire_format.encode(message)
+            if isinstance(data, str):
+                data = data.encode("UTF-8")
+            frame = Frame(opcode, data)
+            if extension is not None:
+                frame = extension.encode(frame)
+            encoded = time.process_time()
+
+            payload = frame.data
+            if frame.rsv1:
+                payload = decoder.decompress(payload + b"\x00\x00\xff\xff")
+            wire_format.decode(payload if wire_format.binary else payload.decode("UTF-8"))
+            decode_time += time.process_time() - encoded
+            encode_time += encoded - start
+
+            wire_bytes += header_size(len(frame.data)) + len(frame.data)
+
+    total = len(frames) * rounds
+    return {
+        "bytes_per_session": wire_bytes,
+        "bytes_per_frame": wire_bytes / len(frames),
+        "server_cpu_us_per_frame": encode_time / total * 1e6,
+        "client_cpu_us_per_frame": decode_time / total * 1e6,
+    }
+
+
+def _git_commit():
+    """
+    Returns the current git commit of the repository, if available.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    """
+    Runs the benchmark and prints the results as JSON.
+    """
+    parser = argparse.ArgumentParser(description="Bytes on the wire and CPU per frame of the JečnáBot wire formats and deflate settings.")
+    parser.add_argument("--answers", type=int, default=20, help="number of answers of the simulated session")
+    parser.add_argument("--stream", action="store_true", help="stream the answers as chunk frames")
+    parser.add_argument("--chunk-words", type=int, default=3, help="number of words of a streamed chunk")
+    parser.add_argument("--rounds", type=int, default=200, help="number of times the session is replayed for the CPU measurement")
+    parser.add_argument("--training-data", default=os.path.join(os.path.dirname(__file__), "../data/training_data.jsonl"))
+    parser.add_argument("--output", help="file to write the JSON results to (default: stdout)")
+    args = parser.parse_args()
+
+    frames = transcript(load_answers(args.training_data, args.answers), args.stream, args.chunk_words)
+
+    results = {}
+    for wire_format in FORMATS.values():
+        for name, compression in COMPRESSION:
+            results[f"{wire_format.name}/{name}"] = measure(wire_format, compression, frames, args.rounds)
+
+    report = {
+        "commit": _git_commit(),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "training_data")},
+        "frames_per_session": len(frames),
+        "results": results
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import websockets
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from log_manager import LogManager
+from response_logic import ResponseLogic
+from server import WebSocketServer
+from wire_format import JSON, format_by_name, format_for, select_subprotocol
+
+FAQ = ["kdy začíná výuka?", "kdo je ředitel školy a jeho kontakt?", "jaká je dostupnost mhd?"]
+
+
+class StubResponseLogic(ResponseLogic):
+    """
+    ResponseLogic answering with an artificial latency instead of calling the OpenAI API.
+    """
+
+    def __init__(self, config, latency, chunks, index=None):
+        """
+        Initializes the StubResponseLogic instance.
+
+        :param config (dict): Server configuration.
+        :param latency (float): Number of seconds an upstream answer takes.
+        :param chunks (int): Number of parts a streamed answer is split into.
+        :param index (RetrievalIndex): Index of curated answers, optional.
+        """
+        super().__init__(config, index=index)
+        self.latency = latency
+        self.chunks = chunks
+
+
+    async def _complete(self, question, history=None):
+        """
+        Answers after the artificial latency.
+        """
+        async with self._upstream_slot():
+            await asyncio.sleep(self.latency)
+
+        answer = f"Stub answer to: {question}"
+        if not history:
+            self._cache_answer(question, answer)
+        return answer
+
+
+    async def _stream_completion(self, question, history=None):
+        """
+        Streams the answer in parts spread over the artificial latency.
+        """
+        async with self._upstream_slot():
+            for i in range(self.chunks):
+                await asyncio.sleep(self.latency / self.chunks)
+                yield f"part {i} "
+
+        if not history:
+            self._cache_answer(question, " ".join(f"part {i}" for i in range(self.chunks)))
+
+
+def rss_bytes():
+    """
+    Returns the resident set size of the current process.
+
+    :return (int): RSS in bytes.
+    """
+    try:
+        with open("/proc/self/statm", "r") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentiles(samples):
+    """
+    Summarizes the samples (in seconds) as milliseconds.
+
+    :param samples (list): The samples.
+    :return (dict): Count, mean, p50, p95, p99 and max.
+    """
+    if not samples:
+        return {"count": 0}
+
+    ordered = sorted(samples)
+    pick = lambda p: ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean": statistics.fmean(ordered) * 1000,
+        "p50": pick(50),
+        "p95": pick(95),
+        "p99": pick(99),
+        "max": ordered[-1] * 1000
+    }
+
+
+async def _serve(args, pipe):
+    """
+    Runs the WebSocket server with the stub logic and answers measurement requests from the benchmark.
+    """
+    workdir = tempfile.mkdtemp(prefix="jecnabot-bench-")
+    config_file = os.path.join(workdir, "config.json")
+    stats_file = os.path.join(workdir, "stats.txt")
+
+    config = {
+        "host": "127.0.0.1",
+        "port": 0,
+        "ai_prompt": "",
+        "ai_model": "stub",
+        "openai_api_key": "stub",
+        "ai_max_concurrency": args.upstream_concurrency,
+        "stream_responses": args.stream,
+        "training_data_file": args.training_data if args.retrieval else "",
+        "log_level": "DEBUG" if args.verbose else "ERROR",
+        # The simulated users send as fast as they can, the benchmark measures the server, not the limits
+        "rate_limit_session_rate": 0,
+        "rate_limit_user_rate": 0,
+        "conversation_max_tokens": 1000 if args.context else 0,
+        "ws_compression": not args.no_compression,
+    }
+    with open(config_file, "w", encoding="utf-8") as file:
+        json.dump(config, file)
+    with open(stats_file, "w", encoding="utf-8") as file:
+        file.write("\n".join(FAQ) + "\n")
+
+    server = WebSocketServer(config_file)
+    server.logic = StubResponseLogic(server.config, args.latency, args.chunks, index=server.index)
+    server.logger = LogManager(log_file=os.path.join(workdir, "log.txt"), stats_file=stats_file)
+
+    lags = []
+
+    async def probe_lag(interval=0.01):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            lags.append(max(0.0, loop.time() - start - interval))
+
+    probe = asyncio.create_task(probe_lag())
+
+    async with websockets.serve(server.handle_client, "127.0.0.1", 0, ping_interval=60, ping_timeout=30,
+                                select_subprotocol=select_subprotocol, extensions=server.extensions, compression=None) as websocket_server:
+        port = websocket_server.sockets[0].getsockname()[1]
+        pipe.send(("ready", port, rss_bytes()))
+
+        loop = asyncio.get_running_loop()
+        while True:
+            command = await loop.run_in_executor(None, pipe.recv)
+
+            if command == "rss":
+                pipe.send(rss_bytes())
+            elif command == "reset":
+                lags.clear()
+                pipe.send(True)
+            elif command == "stop":
+                pipe.send({"event_loop_lag_ms": percentiles(lags), "answer_cache": server.logic.cache.stats(),
+                           "single_flight": server.logic.single_flight.stats()})
+                break
+
+    probe.cancel()
+    await server.logger.close()
+
+
+def _run_server(args, pipe):
+    """
+    Entry point of the server process.
+    """
+    if not args.verbose:
+        sys.stdout = open(os.devnull, "w")
+    asyncio.run(_serve(args, pipe))
+
+
+async def _client(args, uri, connected, start, results):
+    """
+    Simulates one user of `client.Client`: welcome frame, FAQ shortcuts, free text questions and `exit`.
+    """
+    connect_start = time.perf_counter()
+    try:
+        websocket = await websockets.connect(uri, open_timeout=60, ping_interval=None, max_queue=None,
+                                             subprotocols=[format_by_name(args.wire_format).subprotocol, JSON.subprotocol],
+                                             compression=None if args.no_compression else "deflate")
+    except Exception:
+        results["errors"] += 1
+        connected.append(None)
+        return
+
+    wire_format = format_for(websocket)
+
+    try:
+        await websocket.recv()
+        results["connect"].append(time.perf_counter() - connect_start)
+        connected.append(websocket)
+        await start.wait()
+
+        for i in range(args.messages):
+            if random.random() < args.faq_ratio:
+                message = str(random.randint(1, len(FAQ)))
+            else:
+                message = f"Otázka {random.getrandbits(48):x} číslo {i}?"
+
+            sent = time.perf_counter()
+            await websocket.send(message)
+
+            first_part = None
+            while True:
+                frame = wire_format.decode(await websocket.recv())
+                if first_part is None:
+                    first_part = time.perf_counter() - sent
+                if frame["type"] != "chunk":
+                    break
+
+            results["latency"].append(time.perf_counter() - sent)
+            results["first_part"].append(first_part)
+
+        await websocket.send("exit")
+        await websocket.recv()
+
+    except Exception:
+        results["errors"] += 1
+
+    finally:
+        await websocket.close()
+
+
+async def _run_clients(args, port, pipe):
+    """
+    Opens all client connections, measures the server memory with every session connected and then runs the conversation.
+    """
+    uri = f"ws://127.0.0.1:{port}"
+    results = {"connect": [], "latency": [], "first_part": [], "errors": 0}
+    connected = []
+    start = asyncio.Event()
+
+    tasks = []
+    for i in range(args.sessions):
+        tasks.append(asyncio.create_task(_client(args, uri, connected, start, results)))
+        # Ramps the connections up so the accept queue is not overflowing
+        if i % 100 == 99:
+            await asyncio.sleep(0.01)
+
+    while len(connected) < args.sessions:
+        await asyncio.sleep(0.01)
+
+    pipe.send("rss")
+    rss_connected = pipe.recv()
+    pipe.send("reset")
+    pipe.recv()
+
+    started = time.perf_counter()
+    start.set()
+    await asyncio.gather(*tasks)
+    duration = time.perf_counter() - started
+
+    return results, duration, rss_connected
+
+
+def _git_commit():
+    """
+    Returns the current git commit of the repository, if available.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    """
+    Runs the benchmark and prints the results as JSON.
+    """
+    parser = argparse.ArgumentParser(description="Load and latency benchmark of the JečnáBot WebSocket server.")
+    parser.add_argument("--sessions", type=int, default=1000, help="number of concurrent client sessions")
+    parser.add_argument("--messages", type=int, default=5, help="number of messages sent by every session")
+    parser.add_argument("--latency", type=float, default=0.5, help="artificial upstream latency in seconds")
+    parser.add_argument("--stream", action="store_true", help="stream the answers as chunk frames")
+    parser.add_argument("--chunks", type=int, default=10, help="number of chunks of a streamed answer")
+    parser.add_argument("--faq-ratio", type=float, default=0.3, help="share of messages using a numeric FAQ shortcut")
+    parser.add_argument("--upstream-concurrency", type=int, default=1000, help="ai_max_concurrency of the server")
+    parser.add_argument("--retrieval", action="store_true", help="answer from the retrieval index when possible")
+    parser.add_argument("--context", action="store_true", help="send the conversation history with the questions (bypasses the answer cache)")
+    parser.add_argument("--wire-format", choices=["json", "msgpack"], default="json", help="wire format negotiated by the clients")
+    parser.add_argument("--no-compression", action="store_true", help="disable the per-message deflate extension")
+    parser.add_argument("--training-data", default=os.path.join(os.path.dirname(__file__), "../data/training_data.jsonl"))
+    parser.add_argument("--output", help="file to write the JSON results to (default: stdout)")
+    parser.add_argument("--verbose", action="store_true", help="keep the server output")
+    args = parser.parse_args()
+
+    # Thousands of sessions need thousands of file descriptors on both sides
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    parent_pipe, child_pipe = multiprocessing.Pipe()
+    server_process = multiprocessing.Process(target=_run_server, args=(args, child_pipe), daemon=True)
+    server_process.start()
+
+    _, port, rss_idle = parent_pipe.recv()
+    results, duration, rss_connected = asyncio.run(_run_clients(args, port, parent_pipe))
+
+    parent_pipe.send("stop")
+    server_stats = parent_pipe.recv()
+    server_process.join(timeout=10)
+
+    report = {
+        "commit": _git_commit(),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "verbose", "training_data")},
+        "duration_s": duration,
+        "messages": len(results["latency"]),
+        "errors": results["errors"],
+        "throughput_msg_per_s": len(results["latency"]) / duration if duration else 0,
+        "latency_ms": percentiles(results["latency"]),
+        "first_part_ms": percentiles(results["first_part"]),
+        "connect_ms": percentiles(results["connect"]),
+        "memory": {
+            "rss_idle_bytes": rss_idle,
+            "rss_connected_bytes": rss_connected,
+            "bytes_per_session": (rss_connected - rss_idle) / args.sessions if args.sessions else 0
+        },
+        **server_stats
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
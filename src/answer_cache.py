@@ -0,0 +1,135 @@
+import re
+import threading
+import time
+import unicodedata
+
+from collections import OrderedDict
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question):
+    """
+    Normalizes a question so that trivially different phrasings share one key.
+
+    The question is casefolded, Czech diacritics are folded ("začíná" -> "zacina"), punctuation is removed and whitespace is collapsed.
+
+    :param question (str): The question to normalize.
+    :return (str): The normalized question.
+    """
+    folded = unicodedata.normalize("NFKD", question.casefold())
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    folded = _PUNCTUATION.sub(" ", folded)
+    return _WHITESPACE.sub(" ", folded).strip()
+
+
+class AnswerCache:
+    """
+    LRU cache of answers keyed on the normalized question, with a time-to-live for every entry.
+    """
+
+    def __init__(self, max_size=1000, ttl=3600):
+        """
+        Initializes the AnswerCache instance.
+
+        :param max_size (int): Maximum number of cached answers, the least recently used one is evicted first.
+        :param ttl (float): Number of seconds after which a cached answer expires.
+        """
+        if type(max_size) != int or max_size < 1:
+            raise ValueError("Velikost cache musí být kladné celé číslo!")
+
+        if type(ttl) not in (int, float) or ttl <= 0:
+            raise ValueError("Platnost záznamů v cache musí být kladné číslo!")
+
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._context = None
+
+
+    def get(self, question):
+        """
+        Returns the cached answer for the question.
+
+        :param question (str): The user's question.
+        :return (str | None): The cached answer or None if it is missing or expired.
+        """
+        key = normalize_question(question)
+
+        with self.lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+
+    def put(self, question, answer):
+        """
+        Stores the answer for the question, evicting the least recently used entry when the cache is full.
+
+        :param question (str): The user's question.
+        :param answer (str): The answer to cache.
+        """
+        key = normalize_question(question)
+
+        with self.lock:
+            self._entries[key] = (answer, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+
+    def set_context(self, context):
+        """
+        Binds the cache to the settings the answers were produced with and clears it when they change.
+
+        :param context (tuple): Settings the cached answers depend on (e.g. prompt and model).
+        :return (bool): True if the cache was invalidated.
+        """
+        with self.lock:
+            if context == self._context:
+                return False
+
+            invalidated = self._context is not None
+            self._context = context
+            self._entries.clear()
+            return invalidated
+
+
+    def invalidate(self):
+        """
+        Removes all cached answers.
+        """
+        with self.lock:
+            self._entries.clear()
+
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        :return (dict): Number of hits, misses, evictions and cached entries.
+        """
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries)
+            }
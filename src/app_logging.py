@@ -0,0 +1,194 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+
+from logging.handlers import QueueHandler, QueueListener
+
+# Correlation ID of the session being handled, inherited by its tasks and by the threads started with asyncio.to_thread
+correlation_id = contextvars.ContextVar("correlation_id", default=None)
+
+_listener = None
+_handler = None
+
+
+class ContextFilter(logging.Filter):
+    """
+    Adds the correlation ID of the current session to the records.
+    """
+
+    def filter(self, record):
+        record.correlation_id = correlation_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate-limits the high-volume records, each message template may be logged at most `rate` times per second on average.
+
+    The number of the dropped records is reported with the next record of the template that passes.
+    """
+
+    def __init__(self, rate=10, burst=None, level=logging.DEBUG, clock=time.monotonic):
+        """
+        Initializes the SamplingFilter instance.
+
+        :param rate (float): Average number of records of one template logged per second.
+        :param burst (int): Number of records of one template that may be logged at once, `rate` if not provided.
+        :param level (int): Records of this level and below are sampled, the others always pass.
+        :param clock (callable): Function returning the current time in seconds.
+        """
+        super().__init__()
+
+        if rate <= 0:
+            raise ValueError("Počet logovaných záznamů za sekundu musí být kladný!")
+
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self.level = level
+        self.clock = clock
+
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+
+    def filter(self, record):
+        if record.levelno > self.level:
+            return True
+
+        key = (record.name, record.msg)
+        now = self.clock()
+
+        with self._lock:
+            tokens, updated, suppressed = self._buckets.get(key, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, suppressed + 1)
+                self.dropped += 1
+                return False
+
+            self._buckets[key] = (tokens - 1, now, 0)
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats the records as single line JSON objects.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+        }
+
+        if getattr(record, "correlation_id", None) is not None:
+            entry["correlation_id"] = record.correlation_id
+        if getattr(record, "suppressed", None):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Formats the records as human readable lines, with the correlation ID when there is one.
+    """
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s%(context)s: %(message)s")
+
+
+    def format(self, record):
+        record.context = f" [{record.correlation_id}]" if getattr(record, "correlation_id", None) is not None else ""
+        message = super().format(record)
+
+        if getattr(record, "suppressed", None):
+            message += f" ({record.suppressed} similar records suppressed)"
+        return message
+
+
+class _QueueHandler(QueueHandler):
+    """
+    Queue handler keeping the record fields for the formatter of the listener, only the message and the traceback are rendered in the caller.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+
+def setup_logging(level="INFO", json_output=True, debug_rate=10, stream=None):
+    """
+    Routes the records of all loggers through a queue to a background thread that writes them, so logging never blocks the event loop.
+
+    Calling it again replaces the previous configuration.
+
+    :param level (str): Minimal level of the logged records.
+    :param json_output (bool): Whether to write JSON lines instead of plain text.
+    :param debug_rate (float): Maximum average number of debug records of one message template per second.
+    :param stream (file): Stream the records are written to, stderr if not provided.
+    :return (QueueListener): The listener writing the records.
+    """
+    global _listener, _handler
+
+    stop_logging()
+
+    output = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    output.setFormatter(JsonFormatter() if json_output else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    _handler = _QueueHandler(log_queue)
+    _handler.addFilter(ContextFilter())
+    _handler.addFilter(SamplingFilter(rate=debug_rate))
+
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """
+    Writes the queued records and removes the handler installed by `setup_logging`.
+    """
+    global _listener, _handler
+
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
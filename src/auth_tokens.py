@@ -0,0 +1,149 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import time
+
+log = logging.getLogger(__name__)
+
+# Environment variable with the signing key shared by the worker processes when no keys are configured
+KEY_ENVIRONMENT_VARIABLE = "JECNABOT_AUTH_KEY"
+
+# Minimal length of a configured signing key in bytes
+MIN_KEY_LENGTH = 32
+
+# Placeholder keys from the example configurations, known to everyone
+PLACEHOLDER_KEYS = ("change-me-to-a-long-random-secret",)
+
+
+class InvalidTokenError(ValueError):
+    """
+    Raised when an authentication token is malformed, signed with an unknown key, tampered with or expired.
+    """
+
+
+def _encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class TokenSigner:
+    """
+    Issues and verifies stateless authentication tokens signed with HMAC-SHA256, no database is needed to verify them.
+
+    The token is `<key id>.<payload>.<signature>`, the payload holds the user ID and the expiration time.
+    New tokens are signed with the active key, tokens signed with the other keys are still accepted, so the keys can be rotated
+    by adding a new key, making it active and removing the old one once its tokens expired.
+    """
+
+    def __init__(self, keys, active_kid, ttl=3600, clock=time.time):
+        """
+        Initializes the TokenSigner instance.
+
+        :param keys (dict): Secrets by their key IDs.
+        :param active_kid (str): ID of the key signing new tokens.
+        :param ttl (float): Number of seconds a token is valid.
+        :param clock (callable): Function returning the current time in seconds since the epoch.
+        """
+        if not keys or active_kid not in keys:
+            raise ValueError("Aktivní klíč musí být mezi podpisovými klíči!")
+
+        if any("." in kid for kid in keys):
+            raise ValueError("ID klíče nesmí obsahovat tečku!")
+
+        if ttl <= 0:
+            raise ValueError("Platnost tokenu musí být kladná!")
+
+        self.keys = {kid: secret.encode("UTF-8") if isinstance(secret, str) else secret for kid, secret in keys.items()}
+        self.active_kid = active_kid
+        self.ttl = ttl
+        self.clock = clock
+
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Creates the signer configured by the auth_* keys of the configuration.
+
+        Without configured keys, the key from the JECNABOT_AUTH_KEY environment variable (set by the supervisor for its workers)
+        or a random key is used, the tokens are then valid only until the restart.
+
+        :param config (dict): Server configuration.
+        :return (TokenSigner): The signer.
+        :raises ValueError: If a configured key is a placeholder or shorter than `MIN_KEY_LENGTH` bytes.
+        """
+        keys = config.get("auth_keys")
+        active_kid = config.get("auth_active_key")
+
+        for kid, secret in (keys or {}).items():
+            if secret in PLACEHOLDER_KEYS:
+                raise ValueError(f"Klíč {kid} v auth_keys je ukázková hodnota, vygeneruj vlastní tajný klíč!")
+            if len(secret.encode("UTF-8") if isinstance(secret, str) else secret) < MIN_KEY_LENGTH:
+                raise ValueError(f"Klíč {kid} v auth_keys musí mít alespoň {MIN_KEY_LENGTH} bajtů!")
+
+        if not keys:
+            log.warning("No auth_keys configured, the tokens will be invalid after a restart.")
+            keys = {"local": os.environ.get(KEY_ENVIRONMENT_VARIABLE) or secrets.token_hex(32)}
+            active_kid = "local"
+
+        return cls(keys, active_kid if active_kid is not None else next(iter(keys)), config.get("auth_token_ttl", 3600))
+
+
+    def _sign(self, kid, payload):
+        """
+        Returns the signature of the payload.
+
+        :param kid (str): ID of the key.
+        :param payload (str): The encoded payload.
+        :return (bytes): The signature.
+        """
+        return hmac.new(self.keys[kid], f"{kid}.{payload}".encode("ascii"), hashlib.sha256).digest()
+
+
+    def issue(self, user_id):
+        """
+        Issues a token for the user.
+
+        :param user_id (int): ID of the user.
+        :return (str): The token.
+        """
+        now = int(self.clock())
+        payload = _encode(json.dumps({"sub": user_id, "iat": now, "exp": now + int(self.ttl)}, separators=(",", ":")).encode("UTF-8"))
+        return f"{self.active_kid}.{payload}.{_encode(self._sign(self.active_kid, payload))}"
+
+
+    def verify(self, token):
+        """
+        Verifies the token, the signature is compared in constant time.
+
+        :param token (str): The token.
+        :return (int): ID of the user.
+        :raises InvalidTokenError: If the token is not valid.
+        """
+        try:
+            kid, payload, signature = token.split(".")
+        except (AttributeError, ValueError):
+            raise InvalidTokenError("Token má neplatný formát.")
+
+        if kid not in self.keys:
+            raise InvalidTokenError("Token je podepsán neznámým klíčem.")
+
+        try:
+            valid = hmac.compare_digest(self._sign(kid, payload), _decode(signature))
+        except (ValueError, UnicodeEncodeError):
+            valid = False
+
+        if not valid:
+            raise InvalidTokenError("Podpis tokenu je neplatný.")
+
+        claims = json.loads(_decode(payload))
+        if claims["exp"] <= self.clock():
+            raise InvalidTokenError("Platnost tokenu vypršela.")
+
+        return claims["sub"]
@@ -2,6 +2,10 @@ import asyncio
 import websockets
 import json
 
+from urllib.parse import urlencode
+
+from wire_format import JSON, format_by_name, format_for
+
 class Client:
     """
     WebSocket client for communication with the server.
@@ -22,6 +26,16 @@ class Client:
         self.config = self.load_config(config_file)
         self.uri = f"ws://{self.config['host']}:{self.config['port']}"
 
+        # Token of the session from the welcome frame and the number of frames received since, used to resume the session
+        self.session_token = None
+        self.received = 0
+        self.max_reconnects = self.config.get("client_max_reconnects", 3)
+
+        # Wire formats offered to the server, the preferred one first, JSON is the fallback every server speaks
+        preferred = format_by_name(self.config.get("client_wire_format", "json"))
+        self.subprotocols = list(dict.fromkeys([preferred.subprotocol, JSON.subprotocol]))
+        self.wire_format = JSON
+
 
     def load_config(self, config_file):
         """
@@ -48,8 +62,10 @@ class Client:
         print(" -> Připojuji se k serveru...")
 
         try:
-            async with websockets.connect(self.uri, open_timeout=10) as websocket:
-                print(await websocket.recv()) 
+            async with websockets.connect(self.uri, open_timeout=10, subprotocols=self.subprotocols) as websocket:
+                self.wire_format = format_for(websocket)
+                welcome = await websocket.recv()
+                self._remember_session(welcome)
                 
                 while True:
                     user_input = input(" > Vy: ").strip()
@@ -62,10 +78,12 @@ class Client:
 
                     if user_input.lower() == "exit":
                         print("\n -> Odpojil jste se použitím příkazu.")
+                        # A resumed connection is not closed by the context manager
+                        await websocket.close()
                         break
 
-                    response = await websocket.recv()
-                    print(f" └ Bot: {response}\n")
+                    await self.receive_answer(websocket)
+                    websocket = self.websocket
 
         except websockets.ConnectionClosedError:
             print(" -> Spojení bylo uzavřeno serverem.")
@@ -75,6 +93,94 @@ class Client:
             print(f" -> Chyba: {e}")
 
 
+    def _remember_session(self, welcome):
+        """
+        Prints the welcome frame and stores the resumption token of the session from it.
+
+        :param welcome (str | bytes): The welcome frame.
+        """
+        try:
+            frame = self.wire_format.decode(welcome)
+            self.session_token = frame.get("token")
+        except (ValueError, AttributeError):
+            frame = welcome
+            self.session_token = None
+
+        print(json.dumps(frame, ensure_ascii=False) if isinstance(frame, dict) else frame)
+        self.received = 0
+
+
+    async def _resume(self):
+        """
+        Reconnects to the server and resumes the session, the frames that were not received are sent again by the server.
+
+        :return (websockets.ClientConnection): The new connection.
+        :raises websockets.ConnectionClosedError: If the session cannot be resumed.
+        """
+        for attempt in range(self.max_reconnects):
+            await asyncio.sleep(0.5 * 2 ** attempt)
+            print("\n -> Spojení bylo přerušeno, obnovuji relaci...")
+
+            try:
+                websocket = await websockets.connect(f"{self.uri}/?{urlencode({'resume': self.session_token, 'received': self.received})}",
+                                                     open_timeout=10, subprotocols=self.subprotocols)
+            except (OSError, asyncio.TimeoutError, websockets.InvalidHandshake):
+                continue
+
+            self.wire_format = format_for(websocket)
+            frame = self.wire_format.decode(await websocket.recv())
+            if frame.get("type") == "resumed":
+                return websocket
+
+            # The session expired, the server started a new one
+            await websocket.close()
+            break
+
+        raise websockets.ConnectionClosedError(None, None)
+
+
+    async def receive_answer(self, websocket):
+        """
+        Receives the answer to the sent message and prints it, streamed answers are printed part by part as they arrive.
+
+        If the connection drops, the session is resumed and the rest of the answer is received on the new connection (see `self.websocket`).
+
+        :param websocket (websockets.ClientConnection): Connection with the server.
+        :return (str): The full answer.
+        """
+        print(" └ Bot: ", end="", flush=True)
+        parts = []
+        self.websocket = websocket
+
+        while True:
+            try:
+                response = await self.websocket.recv()
+            except websockets.ConnectionClosedError:
+                if self.session_token is None:
+                    raise
+                self.websocket = await self._resume()
+                continue
+
+            self.received += 1
+
+            try:
+                frame = self.wire_format.decode(response)
+            except ValueError:
+                frame = {"type": "response", "message": response}
+
+            if frame.get("type") == "chunk":
+                parts.append(frame["message"])
+                print(frame["message"], end="", flush=True)
+                continue
+
+            if frame.get("type") != "done":
+                parts.append(frame.get("message", ""))
+                print(frame.get("message", ""), end="")
+
+            print("\n")
+            return "".join(parts)
+
+
 if __name__ == "__main__":
     client = Client(config_file="../config.json")
     
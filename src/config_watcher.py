@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+import os
+
+log = logging.getLogger(__name__)
+
+# Keys every configuration must have with their types
+REQUIRED_KEYS = {
+    "host": str,
+    "port": int,
+    "ai_prompt": str,
+    "ai_model": str,
+    "openai_api_key": str,
+}
+
+
+def load_config(path):
+    """
+    Loads and validates a configuration file.
+
+    :param path (str): Path to the configuration file.
+    :return (dict): The configuration.
+    :raises ValueError: If the file cannot be read, is not valid JSON or misses a required key.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"Konfiguraci '{path}' nelze načíst: {e}")
+
+    validate_config(config)
+    return config
+
+
+def validate_config(config):
+    """
+    Checks the required keys of the configuration.
+
+    :param config (dict): The configuration.
+    :raises ValueError: If a required key is missing or has a wrong type.
+    """
+    if not isinstance(config, dict):
+        raise ValueError("Konfigurace musí být JSON objekt!")
+
+    for key, key_type in REQUIRED_KEYS.items():
+        if type(config.get(key)) != key_type:
+            raise ValueError(f"Klíč '{key}' v konfiguraci chybí nebo má nesprávný typ!")
+
+
+class ConfigWatcher:
+    """
+    Polls the modification time of the configuration file and applies the new configuration once it is changed and valid.
+
+    Polling the mtime needs no platform specific API, a `stat` call per interval costs nothing next to the server's work.
+    An invalid configuration (e.g. a file saved in the middle of editing) is reported and the current configuration stays in use.
+    """
+
+    def __init__(self, path, config, on_change, interval=1.0):
+        """
+        Initializes the ConfigWatcher instance.
+
+        :param path (str): Path to the configuration file.
+        :param config (dict): The configuration in use.
+        :param on_change (callable): Function applying a new valid configuration, it raises ValueError to reject it.
+        :param interval (float): Number of seconds between the checks.
+        """
+        if interval <= 0:
+            raise ValueError("Interval kontroly konfigurace musí být kladný!")
+
+        self.path = path
+        self.config = config
+        self.on_change = on_change
+        self.interval = interval
+
+        self._signature = self._stat()
+
+        self.reloads = 0
+        self.errors = 0
+
+
+    def _stat(self):
+        """
+        Returns the modification time and size of the file.
+
+        :return (tuple): The signature of the file version, None if the file is missing (e.g. while an editor replaces it).
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+
+    def check(self):
+        """
+        Applies the configuration if the file changed since the last check.
+
+        :return (bool): True if a new configuration was applied, False if the file or its content did not change.
+        :raises ValueError: If the changed configuration is not valid, the current one stays in use.
+        """
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+
+        self._signature = signature
+
+        try:
+            config = load_config(self.path)
+            if config == self.config:
+                return False
+
+            self.on_change(config)
+        except ValueError:
+            self.errors += 1
+            raise
+
+        self.config = config
+        self.reloads += 1
+        return True
+
+
+    async def run(self):
+        """
+        Checks the file every `interval` seconds until cancelled.
+        """
+        while True:
+            await asyncio.sleep(self.interval)
+
+            try:
+                if self.check():
+                    log.info("Configuration %s reloaded.", self.path)
+            except ValueError as e:
+                log.error("Configuration was not reloaded: %s", e)
+
+
+    def stats(self):
+        """
+        Returns the watcher counters.
+
+        :return (dict): Number of applied and rejected configurations.
+        """
+        return {
+            "reloads": self.reloads,
+            "errors": self.errors
+        }
@@ -0,0 +1,162 @@
+import re
+
+from collections import deque
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text):
+    """
+    Estimates the number of model tokens of the text without a tokenizer, Czech text has about 3 characters per token.
+
+    :param text (str): The text.
+    :return (int): The estimated number of tokens.
+    """
+    return len(text) // 3 + 1
+
+
+def _truncate(text, max_tokens):
+    """
+    Shortens the text to about `max_tokens` tokens.
+
+    :param text (str): The text.
+    :param max_tokens (int): The token budget.
+    :return (str): The text, shortened with an ellipsis if needed.
+    """
+    max_chars = max(1, max_tokens * 3)
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars - 1].rstrip() + "…"
+
+
+class Conversation:
+    """
+    Memory of one session's conversation with a hard token budget.
+
+    The recent turns are kept verbatim, older turns are rolled into an extractive summary (the question and the first sentence of the answer).
+    The turns are stored UTF-8 encoded, so the memory of a session stays small and bounded by the budget however long the session is.
+    """
+
+    __slots__ = ("max_tokens", "summary_tokens", "max_turns", "_turns", "_turn_tokens", "_summary_lines", "_summary_line_tokens", "_summary")
+
+    def __init__(self, max_tokens=1000, summary_tokens=250, max_turns=4):
+        """
+        Initializes the Conversation instance.
+
+        :param max_tokens (int): Maximum number of tokens of the whole history (summary and recent turns) sent with a question.
+        :param summary_tokens (int): Part of the budget reserved for the summary of the older turns.
+        :param max_turns (int): Maximum number of recent turns kept verbatim.
+        """
+        if type(max_tokens) != int or type(summary_tokens) != int or not 0 <= summary_tokens < max_tokens:
+            raise ValueError("Rozpočet tokenů konverzace musí být kladné celé číslo větší než rozpočet shrnutí!")
+
+        if type(max_turns) != int or max_turns < 1:
+            raise ValueError("Počet uchovaných výměn musí být kladné celé číslo!")
+
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.max_turns = max_turns
+
+        self._turns = deque()
+        self._turn_tokens = 0
+        self._summary_lines = deque()
+        self._summary_line_tokens = 0
+        self._summary = None
+
+
+    def __len__(self):
+        """
+        Returns the number of the turns kept verbatim.
+        """
+        return len(self._turns)
+
+
+    def __bool__(self):
+        """
+        Returns whether there is any history.
+        """
+        return bool(self._turns or self._summary_lines)
+
+
+    def add(self, question, answer):
+        """
+        Remembers a turn, the oldest turns are rolled into the summary to stay within the budget.
+
+        :param question (str): The user's question.
+        :param answer (str): The answer.
+        """
+        budget = self.max_tokens - self.summary_tokens
+
+        # A single turn never takes more than the budget of the recent turns
+        question = _truncate(question, budget // 4)
+        answer = _truncate(answer, budget - estimate_tokens(question) - 1)
+        tokens = estimate_tokens(question) + estimate_tokens(answer)
+
+        self._turns.append((question.encode("UTF-8"), answer.encode("UTF-8"), tokens))
+        self._turn_tokens += tokens
+
+        while len(self._turns) > self.max_turns or (len(self._turns) > 1 and self._turn_tokens > budget):
+            self._roll()
+
+
+    def _roll(self):
+        """
+        Moves the oldest recent turn into the summary, the oldest summary lines are dropped to stay within its budget.
+        """
+        question, answer, tokens = self._turns.popleft()
+        self._turn_tokens -= tokens
+
+        if not self.summary_tokens:
+            return
+
+        first_sentence = _SENTENCE_END.split(answer.decode("UTF-8"), 1)[0]
+        line = _truncate(f"- {question.decode('UTF-8')} -> {first_sentence}", self.summary_tokens // 2)
+        line_tokens = estimate_tokens(line)
+
+        self._summary_lines.append((line.encode("UTF-8"), line_tokens))
+        self._summary_line_tokens += line_tokens
+
+        while self._summary_line_tokens > self.summary_tokens:
+            _, dropped_tokens = self._summary_lines.popleft()
+            self._summary_line_tokens -= dropped_tokens
+
+        self._summary = None
+
+
+    def summary(self):
+        """
+        Returns the summary of the older turns, it is rebuilt only after a turn was rolled into it.
+
+        :return (str): The summary, empty if no turn was rolled yet.
+        """
+        if self._summary is None:
+            self._summary = "\n".join(line.decode("UTF-8") for line, _ in self._summary_lines)
+        return self._summary
+
+
+    def tokens(self):
+        """
+        Returns the estimated number of tokens of the history.
+
+        :return (int): The number of tokens of the summary and the recent turns.
+        """
+        return self._summary_line_tokens + self._turn_tokens
+
+
+    def messages(self):
+        """
+        Returns the history as chat messages to be sent before the current question.
+
+        :return (list): The summary as a system message (if any) followed by the recent turns.
+        """
+        messages = []
+
+        summary = self.summary()
+        if summary:
+            messages.append({"role": "system", "content": f"Shrnutí dřívější části konverzace:\n{summary}"})
+
+        for question, answer, _ in self._turns:
+            messages.append({"role": "user", "content": question.decode("UTF-8")})
+            messages.append({"role": "assistant", "content": answer.decode("UTF-8")})
+
+        return messages
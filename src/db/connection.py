@@ -2,9 +2,13 @@ import mysql.connector
 from dotenv import load_dotenv
 import os
 
+from .pool import ConnectionPool
+
 # Load .env file
 load_dotenv()
 
+_pool = None
+
 def get_connection():
     """
     Returns the connection data for database.
@@ -17,3 +21,32 @@ def get_connection():
         password=os.getenv("DB_PASSWORD"),
         database=os.getenv("DB_NAME")
     )
+
+
+def get_pool():
+    """
+    Returns the process-wide connection pool, creating it on first use.
+
+    The pool is configured by the DB_POOL_SIZE, DB_POOL_TIMEOUT and DB_POOL_IDLE_TIMEOUT environment variables.
+
+    Returns: ConnectionPool: pool of database connections created by `get_connection`.
+    """
+    global _pool
+
+    if _pool is None:
+        _pool = ConnectionPool(
+            get_connection,
+            size=int(os.getenv("DB_POOL_SIZE", "5")),
+            checkout_timeout=float(os.getenv("DB_POOL_TIMEOUT", "5")),
+            idle_timeout=float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+        )
+    return _pool
+
+
+def pooled_connection():
+    """
+    Returns a context manager checking out a connection from the pool and releasing it afterwards.
+
+    Returns: contextmanager: the pooled database connection.
+    """
+    return get_pool().connection()
@@ -0,0 +1,150 @@
+import asyncio
+import threading
+
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from .utils import hash_password, verify_password, get_rounds
+
+
+class HashingOverloadedError(Exception):
+    """
+    Raised when the password hashing service cannot accept or finish more work.
+    """
+
+
+class PasswordHasher:
+    """
+    Password hashing service running bcrypt in a bounded process pool, so it does not hold the CPU of the server process.
+    """
+
+    def __init__(self, rounds=12, workers=2, max_pending=32, timeout=10):
+        """
+        Initializes the PasswordHasher instance.
+
+        :param rounds (int): The bcrypt work factor (cost) used for new hashes.
+        :param workers (int): Number of worker processes.
+        :param max_pending (int): Maximum number of queued and running jobs, further jobs are rejected.
+        :param timeout (float): Maximum number of seconds to wait for a job.
+        """
+        if type(rounds) != int or not 4 <= rounds <= 31:
+            raise ValueError("Work factor bcryptu musí být celé číslo v rozsahu 4 až 31!")
+
+        if type(max_pending) != int or max_pending < 1:
+            raise ValueError("Maximální počet čekajících úloh musí být kladné celé číslo!")
+
+        self.rounds = rounds
+        self.timeout = timeout
+
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+        self.rejected = 0
+
+
+    def submit(self, function, *args):
+        """
+        Submits a job to the process pool if there is a free slot.
+
+        :param function (callable): Picklable function to run.
+        :return (concurrent.futures.Future): Future with the result of the job.
+        :raises HashingOverloadedError: If `max_pending` jobs are already queued or running.
+        """
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HashingOverloadedError("Too many pending password hashing jobs.")
+
+        try:
+            future = self._executor.submit(function, *args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+
+    def _wait(self, future):
+        """
+        Waits for the result of the job.
+
+        :param future (concurrent.futures.Future): Future of the job.
+        :return: The result of the job.
+        :raises HashingOverloadedError: If the job does not finish within the timeout.
+        """
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingOverloadedError("Password hashing timed out.")
+
+
+    def hash(self, password):
+        """
+        Hashes a password with the configured work factor.
+
+        :param password (str): The password to be hashed.
+        :returns (str): The hashed password.
+        """
+        return self._wait(self.submit(hash_password, password, self.rounds))
+
+
+    def verify(self, password, hashed_password):
+        """
+        Verifies if the provided password matches the hashed password.
+
+        :param password (str): The plain text password to verify.
+        :param hashed_password (str): The hashed password to compare against.
+        :returns (bool): True if the password matches the hashed password, False otherwise.
+        """
+        return self._wait(self.submit(verify_password, password, hashed_password))
+
+
+    async def _wait_async(self, future):
+        """
+        Waits for the result of the job without blocking the event loop.
+
+        :param future (concurrent.futures.Future): Future of the job.
+        :return: The result of the job.
+        :raises HashingOverloadedError: If the job does not finish within the timeout.
+        """
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise HashingOverloadedError("Password hashing timed out.")
+
+
+    async def hash_async(self, password):
+        """
+        Hashes a password with the configured work factor without blocking the event loop.
+
+        :param password (str): The password to be hashed.
+        :returns (str): The hashed password.
+        """
+        return await self._wait_async(self.submit(hash_password, password, self.rounds))
+
+
+    async def verify_async(self, password, hashed_password):
+        """
+        Verifies a password without blocking the event loop.
+
+        :param password (str): The plain text password to verify.
+        :param hashed_password (str): The hashed password to compare against.
+        :returns (bool): True if the password matches the hashed password, False otherwise.
+        """
+        return await self._wait_async(self.submit(verify_password, password, hashed_password))
+
+
+    def needs_rehash(self, hashed_password):
+        """
+        Checks whether the password was hashed with a different work factor than the configured one.
+
+        :param hashed_password (str): The stored hash.
+        :returns (bool): True if the password should be hashed again.
+        """
+        return get_rounds(hashed_password) != self.rounds
+
+
+    def shutdown(self):
+        """
+        Stops the worker processes.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
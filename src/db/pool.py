@@ -0,0 +1,189 @@
+import threading
+import time
+
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolExhaustedError(Exception):
+    """
+    Raised when no database connection becomes available within the checkout timeout.
+    """
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of reusable database connections.
+    """
+
+    def __init__(self, connect, size=5, checkout_timeout=5, idle_timeout=300, health_check=True):
+        """
+        Initializes the ConnectionPool instance, connections are created lazily on checkout.
+
+        :param connect (callable): Function creating a new database connection.
+        :param size (int): Maximum number of open connections.
+        :param checkout_timeout (float): Number of seconds to wait for a free connection before PoolExhaustedError is raised.
+        :param idle_timeout (float): Number of seconds after which an idle connection is closed instead of reused.
+        :param health_check (bool): Whether to check that an idle connection is still alive before handing it out.
+        """
+        if not callable(connect):
+            raise TypeError("Parametr connect musí být funkce vytvářející spojení s databází!")
+
+        if type(size) != int or size < 1:
+            raise ValueError("Velikost poolu musí být kladné celé číslo!")
+
+        self.connect = connect
+        self.size = size
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.health_check = health_check
+
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._open = 0
+
+        self.checkouts = 0
+        self.waits = 0
+        self.creates = 0
+        self.recycles = 0
+        self.timeouts = 0
+
+
+    def checkout(self):
+        """
+        Returns an idle connection, opens a new one if the pool is not full, or waits until one is released.
+
+        :return: The database connection.
+        :raises PoolExhaustedError: If no connection is released within the checkout timeout.
+        """
+        deadline = time.monotonic() + self.checkout_timeout
+
+        with self._condition:
+            while True:
+                while self._idle:
+                    connection, released_at = self._idle.pop()
+
+                    if time.monotonic() - released_at <= self.idle_timeout and self._is_alive(connection):
+                        self.checkouts += 1
+                        return connection
+
+                    self._discard(connection)
+
+                if self._open < self.size:
+                    # Reserves the slot so the connection can be opened outside of the lock
+                    self._open += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolExhaustedError(f"No database connection available within {self.checkout_timeout} s.")
+
+                self.waits += 1
+                self._condition.wait(remaining)
+
+        try:
+            connection = self.connect()
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self.creates += 1
+            self.checkouts += 1
+        return connection
+
+
+    def release(self, connection):
+        """
+        Returns the connection to the pool, uncommitted changes are rolled back.
+
+        :param connection: The connection obtained from `checkout`.
+        """
+        try:
+            connection.rollback()
+            broken = False
+        except Exception:
+            broken = True
+
+        with self._condition:
+            if broken:
+                self._discard(connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager checking out a connection and releasing it afterwards.
+
+        :return: The database connection.
+        """
+        connection = self.checkout()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+
+    def _is_alive(self, connection):
+        """
+        Checks that the connection is still usable.
+
+        :param connection: The connection to check.
+        :return (bool): True if the connection is alive or health checks are disabled.
+        """
+        if not self.health_check:
+            return True
+
+        try:
+            return connection.is_connected()
+        except Exception:
+            return False
+
+
+    def _discard(self, connection):
+        """
+        Closes the connection and frees its slot, the caller must hold the lock.
+
+        :param connection: The connection to close.
+        """
+        self._open -= 1
+        self.recycles += 1
+
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+    def stats(self):
+        """
+        Returns the pool counters.
+
+        :return (dict): Number of checkouts, waits, created, recycled and timed out checkouts, plus open and idle connections.
+        """
+        with self._condition:
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "creates": self.creates,
+                "recycles": self.recycles,
+                "timeouts": self.timeouts,
+                "open": self._open,
+                "idle": len(self._idle)
+            }
+
+
+    def close(self):
+        """
+        Closes all idle connections.
+        """
+        with self._condition:
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._discard(connection)
@@ -1,4 +1,4 @@
-from .connection import get_connection
+from .connection import pooled_connection
 
 
 def create_user(username, password_hash):
@@ -8,17 +8,17 @@ def create_user(username, password_hash):
     :param username (str): user's username.
     :param password_hash (str): user's password.
     """
-    connection = get_connection()
-    cursor = connection.cursor()
-    
-    try:
-        cursor.execute(
-            "INSERT INTO users (username, password_hash) VALUES (%s, %s)",
-            (username, password_hash),
-        )
-        connection.commit()
-    finally:
-        connection.close()
+    with pooled_connection() as connection:
+        cursor = connection.cursor()
+        
+        try:
+            cursor.execute(
+                "INSERT INTO users (username, password_hash) VALUES (%s, %s)",
+                (username, password_hash),
+            )
+            connection.commit()
+        finally:
+            cursor.close()
 
 
 def get_user_by_username(username):
@@ -28,10 +28,25 @@ def get_user_by_username(username):
     :param username: The username to search for.
     :return: A dictionary with user details or None if not found.
     """
-    connection = get_connection()
-    cursor = connection.cursor(dictionary=True)
-    try:
-        cursor.execute("SELECT id, password_hash FROM users WHERE username = %s", (username,))
-        return cursor.fetchone()
-    finally:
-        connection.close()
\ No newline at end of file
+    with pooled_connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT id, password_hash FROM users WHERE username = %s", (username,))
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+def update_password_hash(user_id, password_hash):
+    """
+    Replaces the stored password hash of a user (e.g. after rehashing with a new work factor).
+
+    :param user_id (int): The user's id.
+    :param password_hash (str): The new password hash.
+    """
+    with pooled_connection() as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("UPDATE users SET password_hash = %s WHERE id = %s", (password_hash, user_id))
+            connection.commit()
+        finally:
+            cursor.close()
\ No newline at end of file
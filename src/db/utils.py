@@ -2,14 +2,15 @@ import bcrypt
 import uuid
 
 
-def hash_password(password):
+def hash_password(password, rounds=12):
     """
     Hashes a password using bcrypt.
 
     :param password (str): The password to be hashed.
+    :param rounds (int): The bcrypt work factor (cost).
     :returns (str): The hashed password as a string.
     """
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
 
 def verify_password(password, hashed_password):
     """
@@ -19,4 +20,13 @@ def verify_password(password, hashed_password):
     :param hashed_password (str): The hashed password to compare against.
     :returns (bool): True if the password matches the hashed password, False otherwise.
     """
-    return bcrypt.checkpw(password.encode(), hashed_password.encode())
\ No newline at end of file
+    return bcrypt.checkpw(password.encode(), hashed_password.encode())
+
+def get_rounds(hashed_password):
+    """
+    Returns the work factor the password was hashed with.
+
+    :param hashed_password (str): The bcrypt hash (e.g. "$2b$12$...").
+    :returns (int): The bcrypt work factor (cost).
+    """
+    return int(hashed_password.split("$")[2])
\ No newline at end of file
@@ -0,0 +1,131 @@
+import asyncio
+import contextlib
+import contextvars
+
+from collections import OrderedDict, deque
+
+# Flow of the requests made by the current task (e.g. the logged-in user of the session), inherited by its tasks
+current_flow = contextvars.ContextVar("current_flow", default=None)
+
+class FairScheduler:
+    """
+    Limits the number of concurrent upstream requests and grants the free slots to the waiting flows (e.g. sessions) in round-robin order.
+
+    A flow sending many requests waits for its turn behind the other flows instead of delaying all of them.
+    """
+
+    def __init__(self, max_concurrency):
+        """
+        Initializes the FairScheduler instance.
+
+        :param max_concurrency (int): Maximum number of requests running at once.
+        """
+        if type(max_concurrency) != int or max_concurrency < 1:
+            raise ValueError("Maximální počet souběžných požadavků musí být kladné celé číslo!")
+
+        self.max_concurrency = max_concurrency
+        self.running = 0
+
+        # Waiting requests of every flow, the order of the flows is the round-robin order
+        self._queues = OrderedDict()
+
+        self.granted = 0
+        self.queued = 0
+
+
+    def waiting(self):
+        """
+        Returns the number of waiting requests.
+
+        :return (int): The number of requests waiting for a slot.
+        """
+        return sum(len(queue) for queue in self._queues.values())
+
+
+    def _grant_next(self):
+        """
+        Hands the free slots to the first waiting requests of the flows in turn, a served flow moves to the end of the round.
+        """
+        while self.running < self.max_concurrency and self._queues:
+            flow, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+
+            if queue:
+                self._queues.move_to_end(flow)
+            else:
+                del self._queues[flow]
+
+            # Cancelled before its cleanup ran
+            if future.done():
+                continue
+
+            self.running += 1
+            future.set_result(None)
+
+
+    async def acquire(self, flow):
+        """
+        Waits for a free slot.
+
+        :param flow (hashable): Key of the flow the request belongs to.
+        """
+        if self.running < self.max_concurrency and not self._queues:
+            self.running += 1
+            self.granted += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(flow, deque()).append(future)
+        self.queued += 1
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just before the cancellation
+                self.release()
+            else:
+                queue = self._queues.get(flow)
+                if queue is not None and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self._queues[flow]
+            raise
+
+        self.granted += 1
+
+
+    def release(self):
+        """
+        Frees a slot taken by `acquire`.
+        """
+        self.running -= 1
+        self._grant_next()
+
+
+    @contextlib.asynccontextmanager
+    async def slot(self, flow):
+        """
+        Holds a slot for the duration of the block.
+
+        :param flow (hashable): Key of the flow the request belongs to.
+        """
+        await self.acquire(flow)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+    def stats(self):
+        """
+        Returns the scheduler counters.
+
+        :return (dict): Number of running and waiting requests, granted slots and requests that had to wait.
+        """
+        return {
+            "running": self.running,
+            "waiting": self.waiting(),
+            "granted": self.granted,
+            "queued": self.queued
+        }
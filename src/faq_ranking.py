@@ -0,0 +1,364 @@
+import abc
+import heapq
+import math
+import time
+
+from collections import Counter, deque
+
+class Ranking(abc.ABC):
+    """
+    Base class of the time-aware rankings of the most asked questions, the top questions are kept ordered on every update in O(k).
+
+    Questions with the same score are ordered by their first occurrence.
+    """
+
+    mode = None
+
+    def __init__(self, top_k=3, clock=time.time):
+        """
+        Initializes the Ranking instance.
+
+        :param top_k (int): Number of the top questions to keep.
+        :param clock (callable): Function returning the current time in seconds since the epoch.
+        """
+        if type(top_k) != int or top_k < 1:
+            raise ValueError("Počet nejčastějších dotazů musí být kladné celé číslo!")
+
+        self.top_k = top_k
+        self.clock = clock
+
+        self.scores = Counter()
+        self.top_questions = []
+        self._first_seen = {}
+
+
+    def _rank(self, question):
+        """
+        Returns the sort key of the question, lower is better.
+        """
+        return -self.scores[question], self._first_seen[question]
+
+
+    def _increase(self, question, amount):
+        """
+        Increases the score of the question and updates the top questions in O(k).
+
+        :param question (str): The normalized question.
+        :param amount (float): The increase of the score.
+        """
+        self.scores[question] += amount
+        if question not in self._first_seen:
+            # Forgotten questions leave gaps, the order numbers grow with the insertion order of the dict
+            self._first_seen[question] = next(reversed(self._first_seen.values()), -1) + 1
+
+        if question not in self.top_questions:
+            if len(self.top_questions) >= self.top_k and self._rank(question) > self._rank(self.top_questions[-1]):
+                return
+            self.top_questions.append(question)
+
+        self.top_questions.sort(key=self._rank)
+        del self.top_questions[self.top_k:]
+
+
+    def _rebuild_top(self):
+        """
+        Recomputes the top questions from all scores in O(n log k), used only when scores decrease.
+        """
+        self.top_questions = heapq.nsmallest(self.top_k, (question for question, score in self.scores.items() if score > 0), key=self._rank)
+
+
+    @abc.abstractmethod
+    def add(self, question, timestamp=None):
+        """
+        Counts one occurrence of the question.
+
+        :param question (str): The normalized question.
+        :param timestamp (float): Time of the occurrence in seconds since the epoch, now if not provided.
+        """
+
+
+    def top(self):
+        """
+        Returns the current top questions.
+
+        :return (list): The top questions, the most asked first.
+        """
+        return list(self.top_questions)
+
+
+    def prune(self):
+        """
+        Forgets the questions that no longer count, called periodically by the owner of the ranking rather than on every read.
+        """
+
+
+    def discard(self, question):
+        """
+        Forgets the score of the question, e.g. when its cluster was evicted.
+
+        :param question (str): The normalized question.
+        """
+        self.scores.pop(question, None)
+        self._first_seen.pop(question, None)
+
+        if question in self.top_questions:
+            self._rebuild_top()
+
+
+class WindowRanking(Ranking):
+    """
+    Ranks the questions asked in the last `window_hours` hours, counted in time buckets that expire as the window slides.
+    """
+
+    mode = "window"
+
+    def __init__(self, top_k=3, window_hours=24, bucket_seconds=3600, clock=time.time):
+        """
+        Initializes the WindowRanking instance.
+
+        :param top_k (int): Number of the top questions to keep.
+        :param window_hours (float): Length of the window in hours.
+        :param bucket_seconds (int): Length of one time bucket in seconds, the window slides by whole buckets.
+        :param clock (callable): Function returning the current time in seconds since the epoch.
+        """
+        super().__init__(top_k, clock)
+
+        if window_hours <= 0 or bucket_seconds <= 0:
+            raise ValueError("Délka okna i časového úseku musí být kladná!")
+
+        self.window_hours = window_hours
+        self.bucket_seconds = bucket_seconds
+        self.buckets = deque()
+
+
+    def _expire(self, now):
+        """
+        Subtracts the buckets that left the window from the scores.
+
+        :param now (float): The current time in seconds since the epoch.
+        """
+        oldest = int((now - self.window_hours * 3600) // self.bucket_seconds)
+
+        expired = False
+        while self.buckets and self.buckets[0][0] <= oldest:
+            _, counts = self.buckets.popleft()
+            self.scores.subtract(counts)
+            expired = True
+
+        if expired:
+            for question in [question for question, score in self.scores.items() if score <= 0]:
+                del self.scores[question]
+                self._first_seen.pop(question, None)
+            self._rebuild_top()
+
+
+    def add(self, question, timestamp=None):
+        """
+        Counts one occurrence of the question in the bucket of its timestamp, occurrences older than the window are ignored.
+
+        :param question (str): The normalized question.
+        :param timestamp (float): Time of the occurrence in seconds since the epoch, now if not provided.
+        """
+        now = self.clock()
+        timestamp = now if timestamp is None else timestamp
+        self._expire(now)
+
+        bucket = int(timestamp // self.bucket_seconds)
+        if bucket <= (now - self.window_hours * 3600) // self.bucket_seconds:
+            return
+
+        # Records arrive nearly in order, so the bucket of a late one is searched from the newest
+        position = len(self.buckets)
+        while position > 0 and self.buckets[position - 1][0] > bucket:
+            position -= 1
+
+        if position == 0 or self.buckets[position - 1][0] != bucket:
+            self.buckets.insert(position, (bucket, Counter()))
+            position += 1
+
+        self.buckets[position - 1][1][question] += 1
+
+        self._increase(question, 1)
+
+
+    def discard(self, question):
+        """
+        Keeps the counts of the question, they leave the window with their buckets.
+
+        :param question (str): The normalized question.
+        """
+
+
+    def top(self):
+        """
+        Returns the top questions of the current window.
+
+        :return (list): The top questions, the most asked first.
+        """
+        self._expire(self.clock())
+        return list(self.top_questions)
+
+
+    def to_state(self):
+        """
+        Returns the buckets as a JSON serializable state.
+
+        :return (dict): The state.
+        """
+        return {"mode": self.mode, "first_seen": list(self._first_seen), "buckets": [[bucket, dict(counts)] for bucket, counts in self.buckets]}
+
+
+    def load_state(self, state):
+        """
+        Restores the buckets saved by `to_state`.
+
+        :param state (dict): The state.
+        """
+        self._first_seen = {question: i for i, question in enumerate(state["first_seen"])}
+        self.buckets = deque((bucket, Counter(counts)) for bucket, counts in state["buckets"])
+
+        self.scores = Counter()
+        for _, counts in self.buckets:
+            self.scores.update(counts)
+
+        self._rebuild_top()
+        self._expire(self.clock())
+
+
+class DecayRanking(Ranking):
+    """
+    Ranks the questions by exponentially decayed counts, an occurrence loses half of its weight every `half_life_hours` hours.
+
+    The scores are kept relative to a reference time, so the decay does not change their order and no rescoring is needed when the time passes.
+    Questions whose decayed score fell below `min_score` are forgotten by `prune`, the reads of the top questions do not scan the scores.
+    """
+
+    mode = "decay"
+
+    # Largest exponent before the scores are rescaled to a newer reference time
+    MAX_EXPONENT = 500
+
+    def __init__(self, top_k=3, half_life_hours=24, min_score=0.01, clock=time.time):
+        """
+        Initializes the DecayRanking instance.
+
+        :param top_k (int): Number of the top questions to keep.
+        :param half_life_hours (float): Number of hours after which an occurrence counts half.
+        :param min_score (float): Decayed score below which a question is forgotten, 0.01 is one occurrence about 7 half-lives old.
+        :param clock (callable): Function returning the current time in seconds since the epoch.
+        """
+        super().__init__(top_k, clock)
+
+        if half_life_hours <= 0:
+            raise ValueError("Poločas rozpadu musí být kladný!")
+
+        if min_score <= 0:
+            raise ValueError("Minimální skóre dotazu musí být kladné!")
+
+        self.half_life_hours = half_life_hours
+        self.min_score = min_score
+        self.decay_rate = math.log(2) / (half_life_hours * 3600)
+        self.reference = None
+
+
+    def add(self, question, timestamp=None):
+        """
+        Adds the weight of one occurrence of the question.
+
+        :param question (str): The normalized question.
+        :param timestamp (float): Time of the occurrence in seconds since the epoch, now if not provided.
+        """
+        timestamp = self.clock() if timestamp is None else timestamp
+
+        if self.reference is None:
+            self.reference = timestamp
+
+        exponent = self.decay_rate * (timestamp - self.reference)
+        if exponent > self.MAX_EXPONENT:
+            # Rescales all scores to the new reference time, the order does not change
+            factor = math.exp(-exponent)
+            for known in self.scores:
+                self.scores[known] *= factor
+            self.reference = timestamp
+            exponent = 0
+
+        self._increase(question, math.exp(exponent))
+
+
+    def score(self, question, now=None):
+        """
+        Returns the decayed score of the question.
+
+        :param question (str): The normalized question.
+        :param now (float): Time of the evaluation in seconds since the epoch, now if not provided.
+        :return (float): The weighted number of occurrences.
+        """
+        if self.reference is None:
+            return 0.0
+
+        now = self.clock() if now is None else now
+        return self.scores[question] * math.exp(-self.decay_rate * (now - self.reference))
+
+
+    def prune(self, now=None):
+        """
+        Forgets the questions whose decayed score fell below `min_score` in O(n).
+
+        The scores are compared in logarithms, the decay factor of a reference time far in the past would overflow.
+
+        :param now (float): The current time in seconds since the epoch, now if not provided.
+        """
+        if self.reference is None:
+            return
+
+        now = self.clock() if now is None else now
+        threshold = math.log(self.min_score) + self.decay_rate * (now - self.reference)
+        pruned = [question for question, score in self.scores.items() if score <= 0 or math.log(score) < threshold]
+
+        for question in pruned:
+            del self.scores[question]
+            self._first_seen.pop(question, None)
+
+        if any(question in self.top_questions for question in pruned):
+            self._rebuild_top()
+
+
+    def to_state(self):
+        """
+        Returns the scores as a JSON serializable state.
+
+        :return (dict): The state.
+        """
+        return {"mode": self.mode, "reference": self.reference, "scores": dict(self.scores)}
+
+
+    def load_state(self, state):
+        """
+        Restores the scores saved by `to_state`.
+
+        :param state (dict): The state.
+        """
+        self.reference = state["reference"]
+        self.scores = Counter(state["scores"])
+        self._first_seen = {question: i for i, question in enumerate(state["scores"])}
+        self._rebuild_top()
+
+
+def create_ranking(mode, top_k=3, window_hours=24, half_life_hours=24):
+    """
+    Creates the ranking of the given mode.
+
+    :param mode (str): "all" for the counts since the beginning of the log, "window" or "decay".
+    :param top_k (int): Number of the top questions.
+    :param window_hours (float): Length of the window of the "window" mode in hours.
+    :param half_life_hours (float): Half-life of the "decay" mode in hours.
+    :return (Ranking): The ranking, or None for the "all" mode.
+    """
+    if mode == "all":
+        return None
+    if mode == "window":
+        return WindowRanking(top_k, window_hours)
+    if mode == "decay":
+        return DecayRanking(top_k, half_life_hours)
+
+    raise ValueError("Režim řazení dotazů musí být 'all', 'window' nebo 'decay'!")
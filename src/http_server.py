@@ -0,0 +1,438 @@
+import asyncio
+import hmac
+import ipaddress
+import json
+import logging
+import re
+
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from metrics import Metrics
+from db.hashing import HashingOverloadedError
+from db.queries import get_user_by_username, create_user, update_password_hash
+
+log = logging.getLogger(__name__)
+
+
+class HttpError(Exception):
+    """
+    Raised when a request cannot be processed, carries the HTTP status of the response.
+    """
+
+    def __init__(self, status, message):
+        """
+        Initializes the HttpError instance.
+
+        :param status (int): HTTP status code of the response.
+        :param message (str): Error message sent to the client.
+        """
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class HttpServer:
+    """
+    Asynchronous HTTP/1.1 server for the authentication endpoints, running on the same event loop as the WebSocket server.
+    """
+
+    def __init__(self, config, password_hasher, metrics=None, token_signer=None):
+        """
+        Initializes the HttpServer instance.
+
+        :param config (dict): Server configuration.
+        :param password_hasher (PasswordHasher): Service hashing and verifying passwords off the event loop.
+        :param metrics (Metrics): Metrics exposed on /metrics, the process-wide instance is used if not provided.
+        :param token_signer (TokenSigner): Signer of the authentication tokens issued on login, no token is issued if not provided.
+        """
+        self.host = config.get("http_host", "0.0.0.0")
+        self.port = config.get("http_port", 5000)
+        self.workers = config.get("http_workers", 8)
+        self.keep_alive_timeout = config.get("http_keep_alive_timeout", 5)
+        self.request_timeout = config.get("http_request_timeout", 10)
+        self.max_requests_per_connection = config.get("http_max_requests_per_connection", 100)
+        self.max_connections = config.get("http_max_connections", 1000)
+        self.max_body_size = config.get("http_max_body_size", 16 * 1024)
+        self.max_headers = config.get("http_max_headers", 100)
+        self.allowed_origin = config.get("http_allowed_origin", "http://localhost:3000")
+
+        self.password_hasher = password_hasher
+        self.token_signer = token_signer
+        self.metrics = metrics if metrics is not None else Metrics.shared()
+        # Without a token the metrics are served only to the clients on the same machine (e.g. a local Prometheus agent)
+        self.metrics_token = config.get("metrics_token") or None
+
+        # Database queries are blocking, they run in a bounded thread pool
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="http-worker")
+        self._server = None
+        self.connections = 0
+
+        self.routes = {
+            ("POST", "/register"): self.register,
+            ("POST", "/login"): self.login,
+            ("GET", "/metrics"): self.metrics_endpoint,
+        }
+
+
+    async def start(self, **kwargs):
+        """
+        Start listening for HTTP connections.
+
+        :param kwargs: Additional arguments for `asyncio.start_server`.
+        """
+        self._server = await asyncio.start_server(self.handle_connection, self.host, self.port, **kwargs)
+        log.info("HTTP server started at http://%s:%s", self.host, self.port)
+
+
+    async def close(self):
+        """
+        Stop listening for HTTP connections and shut the worker threads down.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+        self._executor.shutdown(wait=False)
+
+
+    async def handle_connection(self, reader, writer):
+        """
+        Handle HTTP requests of a single (keep-alive) connection.
+
+        :param reader (asyncio.StreamReader): Stream to read the requests from.
+        :param writer (asyncio.StreamWriter): Stream to write the responses to.
+        """
+        if self.connections >= self.max_connections:
+            await self._write_response(writer, HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Too many connections"}, None, False)
+            writer.close()
+            return
+
+        self.connections += 1
+        try:
+            for handled in range(self.max_requests_per_connection):
+                timeout = self.keep_alive_timeout if handled else self.request_timeout
+
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), timeout)
+                except HttpError as e:
+                    await self._write_response(writer, e.status, {"error": e.message}, None, False)
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                if request is None:
+                    break
+
+                method, path, version, headers, body = request
+                keep_alive = self._wants_keep_alive(version, headers) and handled + 1 < self.max_requests_per_connection
+
+                status, payload, extra_headers = await self._dispatch(method, path, headers, body, writer.get_extra_info("peername"))
+                await self._write_response(writer, status, payload, headers.get("origin"), keep_alive, extra_headers)
+
+                if not keep_alive:
+                    break
+
+        except ConnectionError:
+            pass
+
+        finally:
+            self.connections -= 1
+            writer.close()
+
+
+    async def _read_request(self, reader):
+        """
+        Read and parse one HTTP request.
+
+        :param reader (asyncio.StreamReader): Stream to read the request from.
+        :returns (tuple): Method, path, HTTP version, headers (lowercase names) and body, or None if the client closed the connection.
+        :raises HttpError: If the request is malformed or exceeds the limits.
+        """
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return None
+
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+
+                if len(headers) >= self.max_headers:
+                    raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Too many headers")
+
+                name, separator, value = line.decode("latin-1").partition(":")
+                if not separator:
+                    raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed header")
+                headers[name.strip().lower()] = value.strip()
+
+        except (asyncio.LimitOverrunError, ValueError):
+            raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request line or header too long")
+
+        if "transfer-encoding" in headers:
+            raise HttpError(HTTPStatus.NOT_IMPLEMENTED, "Transfer-Encoding is not supported")
+
+        try:
+            content_length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+
+        if content_length < 0:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+
+        if content_length > self.max_body_size:
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body is too large")
+
+        body = await reader.readexactly(content_length) if content_length else b""
+
+        return method.upper(), target.split("?", 1)[0], version, headers, body
+
+
+    def _wants_keep_alive(self, version, headers):
+        """
+        Decide whether the connection should stay open after the response.
+
+        :param version (str): HTTP version of the request.
+        :param headers (dict): Request headers.
+        :returns (bool): True if the connection should be kept alive.
+        """
+        connection = headers.get("connection", "").lower()
+
+        if version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+    async def _dispatch(self, method, path, headers, body, peer=None):
+        """
+        Route the request to its handler.
+
+        :param method (str): HTTP method.
+        :param path (str): Request path without the query string.
+        :param headers (dict): Request headers.
+        :param body (bytes): Request body.
+        :param peer (tuple): Address of the client, optional.
+        :returns (tuple): Status, JSON payload and additional headers of the response.
+        """
+        allowed_methods = [route_method for route_method, route_path in self.routes if route_path == path]
+
+        if method == "OPTIONS" and allowed_methods:
+            return HTTPStatus.NO_CONTENT, None, {
+                "Access-Control-Allow-Methods": ", ".join(allowed_methods + ["OPTIONS"]),
+                "Access-Control-Allow-Headers": headers.get("access-control-request-headers", "Content-Type"),
+            }
+
+        handler = self.routes.get((method, path))
+        if handler is None:
+            if allowed_methods:
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Method not allowed"}, {}
+            return HTTPStatus.NOT_FOUND, {"error": "Not found"}, {}
+
+        if path == "/metrics":
+            rejected = self._authorize_metrics(headers, peer)
+            if rejected == HTTPStatus.UNAUTHORIZED:
+                return rejected, {"error": "Invalid metrics token"}, {"WWW-Authenticate": "Bearer"}
+            if rejected is not None:
+                return rejected, {"error": "Metrics are only available locally"}, {}
+
+        try:
+            data = json.loads(body) if body else {}
+            if not isinstance(data, dict):
+                raise ValueError("JSON object expected")
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, {"error": "Request body must be a JSON object"}, {}
+
+        try:
+            response = await handler(data)
+        except HashingOverloadedError:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Server is busy, please try again in a moment."}, {"Retry-After": "1"}
+        except Exception as e:
+            log.exception("Error handling %s %s: %s", method, path, e)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}, {}
+
+        status, payload = response
+        return status, payload, {}
+
+
+    async def _write_response(self, writer, status, payload, origin, keep_alive, extra_headers=None):
+        """
+        Write the JSON (or plain text) response.
+
+        :param writer (asyncio.StreamWriter): Stream to write the response to.
+        :param status (int): HTTP status code.
+        :param payload (dict | str): JSON payload, plain text body, or None for an empty body.
+        :param origin (str): Origin header of the request.
+        :param keep_alive (bool): Whether the connection stays open.
+        :param extra_headers (dict): Additional response headers.
+        """
+        status = HTTPStatus(status)
+        if isinstance(payload, str):
+            body = payload.encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+            content_type = "application/json"
+
+        headers = {
+            "Content-Type": content_type,
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+            "Vary": "Origin",
+        }
+        if keep_alive:
+            headers["Keep-Alive"] = f"timeout={self.keep_alive_timeout}"
+        if origin is not None and origin == self.allowed_origin:
+            headers["Access-Control-Allow-Origin"] = origin
+        headers.update(extra_headers or {})
+
+        head = f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await writer.drain()
+
+
+    async def _run_blocking(self, function, *args):
+        """
+        Run a blocking function (database query) in the worker threads.
+
+        :param function (callable): Function to run.
+        :returns: The result of the function.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+
+    async def register(self, data):
+        """
+        Handle user registration.
+
+        :param data (dict): JSON body of the request.
+        :returns (tuple): Status and JSON payload with a success message or an error.
+        """
+        username = data.get("username")
+        password = data.get("password")
+
+        if not username or not password:
+            return HTTPStatus.BAD_REQUEST, {"error": "Email and password are required"}
+
+        if not is_valid_password(password):
+            return HTTPStatus.BAD_REQUEST, {"error": (
+                "Password must have at least 1 number, 1 special character, "
+                "1 uppercase letter, 1 lowercase letter, and be at least 8 characters long."
+            )}
+
+        password_hash = await self.password_hasher.hash_async(password)
+
+        try:
+            await self._run_blocking(create_user, username, password_hash)
+
+            log.info("User registered successfully: %s", username)
+            return HTTPStatus.CREATED, {"message": "User registered successfully!"}
+
+        except Exception as e:
+            log.error("Error during registration: %s", e)
+            return HTTPStatus.BAD_REQUEST, {"error": "Registration failed. Email is might already taken."}
+
+
+    async def login(self, data):
+        """
+        Handle user login.
+
+        :param data (dict): JSON body of the request.
+        :returns (tuple): Status and JSON payload with a success message or an error.
+        """
+        username = data.get("username")
+        password = data.get("password")
+
+        if not username or not password:
+            return HTTPStatus.BAD_REQUEST, {"error": "Username and password are required"}
+
+        try:
+            user = await self._run_blocking(get_user_by_username, username)
+            if user is None or not await self.password_hasher.verify_async(password, user["password_hash"]):
+                return HTTPStatus.UNAUTHORIZED, {"error": "Invalid username or password"}
+
+            if self.password_hasher.needs_rehash(user["password_hash"]):
+                # The rehash is best-effort, the user is logged in even when it fails
+                try:
+                    password_hash = await self.password_hasher.hash_async(password)
+                    await self._run_blocking(update_password_hash, user["id"], password_hash)
+                except Exception as e:
+                    log.warning("Heslo uživatele %s se nepodařilo přehashovat: %s", user["id"], e)
+
+            payload = {"message": "Login successful!", "user_id": user["id"]}
+            if self.token_signer is not None:
+                payload["token"] = self.token_signer.issue(user["id"])
+                payload["expires_in"] = self.token_signer.ttl
+
+            return HTTPStatus.OK, payload
+
+        except HashingOverloadedError:
+            raise
+
+        except Exception as e:
+            log.error("Error during login: %s", e)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "An error occurred during login"}
+
+
+    def _authorize_metrics(self, headers, peer):
+        """
+        Decide whether the client may read the metrics.
+
+        With `metrics_token` configured the request must carry it as a bearer token, otherwise only loopback clients are served.
+
+        :param headers (dict): Request headers.
+        :param peer (tuple): Address of the client.
+        :returns (HTTPStatus): None if the client is allowed, otherwise the status of the rejection.
+        """
+        if self.metrics_token is not None:
+            scheme, _, token = headers.get("authorization", "").partition(" ")
+            if scheme.lower() == "bearer" and hmac.compare_digest(token.strip().encode(), self.metrics_token.encode()):
+                return None
+            return HTTPStatus.UNAUTHORIZED
+
+        try:
+            address = ipaddress.ip_address(peer[0])
+        except (TypeError, IndexError, ValueError):
+            return HTTPStatus.FORBIDDEN
+
+        if getattr(address, "ipv4_mapped", None) is not None:
+            address = address.ipv4_mapped
+
+        return None if address.is_loopback else HTTPStatus.FORBIDDEN
+
+
+    async def metrics_endpoint(self, data):
+        """
+        Expose the server metrics for Prometheus.
+
+        :param data (dict): JSON body of the request (unused).
+        :returns (tuple): Status and the metrics in the Prometheus text format.
+        """
+        return HTTPStatus.OK, self.metrics.render()
+
+
+def is_valid_password(password):
+    """
+    Validate the password strength.
+
+    :param password: The password to validate.
+    :return: True if the password meets the requirements, False otherwise.
+    """
+    if (
+        len(password) >= 8 and
+        re.search(r"[A-Z]", password) and
+        re.search(r"[a-z]", password) and
+        re.search(r"[0-9]", password) and
+        re.search(r"[!@#$%^&*(),.?\":{}|<>]", password)
+    ):
+        return True
+    return False
@@ -1,21 +1,57 @@
 import asyncio
+import contextvars
+import heapq
+import json
+import logging
+import os
 import re
+import tempfile
 import threading
+import time
 
 from collections import Counter
 from datetime import datetime
 
+from faq_ranking import create_ranking
+from metrics import Metrics
+from question_clusters import QuestionClusterer
+
+log = logging.getLogger(__name__)
+
 class LogManager:
     """
     A class to manage logging of questions and answers, analyze log files, and track the most frequently asked questions.
     """
     
-    def __init__(self, log_file="../logs/log.txt", stats_file="../logs/stats.txt"):
+    _shared = None
+
+    def __init__(self, log_file="../logs/log.txt", stats_file="../logs/stats.txt", state_file=None, top_k=3,
+                 batch_size=100, flush_interval=0.05, queue_size=10000, fsync="never", analysis_interval=5, shared_state=None,
+                 log_format="text", ranking="all", window_hours=24, half_life_hours=24,
+                 clustering=False, max_clusters=10000, cluster_threshold=0.6, state_max_questions=1000, state_save_interval=0):
         """
         Initializes the Log_Manager instance.
         
         :param log_file (str): Path to the log file where questions and answers are recorded.
         :param stats_file (str): Path to the stats file where the top questions are stored.
+        :param state_file (str): Path to the file with the running counts and the analyzed log offset, derived from stats_file if not provided.
+        :param top_k (int): Number of the most frequently asked questions to track.
+        :param batch_size (int): Maximum number of records written by the async writer at once.
+        :param flush_interval (float): Maximum number of seconds a queued record waits for the rest of its batch.
+        :param queue_size (int): Maximum number of queued records, `log_record_async` waits when the queue is full.
+        :param fsync (str): "batch" to fsync the log file after every written batch, "never" to leave it to the OS.
+        :param analysis_interval (float): Minimal number of seconds between two scheduled log analyses.
+        :param shared_state (SharedState): State published by the supervisor, when provided the supervisor analyzes the logs and this instance only follows its questions.
+        :param log_format (str): "text" for the log file, "binary" for the `LogStore` next to it (log file path without .txt), POSIX only.
+        :param ranking (str): "all" to rank the questions by all their occurrences, "window" by the occurrences in the last `window_hours` hours,
+                              "decay" by the occurrences weighted by their age with the half-life of `half_life_hours` hours.
+        :param window_hours (float): Length of the window of the "window" ranking in hours.
+        :param half_life_hours (float): Half-life of the "decay" ranking in hours.
+        :param clustering (bool): Whether to count near-duplicate questions (spelling variants) together under their most frequent phrasing.
+        :param max_clusters (int): Maximum number of question clusters kept in memory.
+        :param cluster_threshold (float): Minimal similarity of a question to join a cluster.
+        :param state_max_questions (int): Maximum number of the most asked questions whose counts are saved in the state file, the rare ones start from zero after a restart.
+        :param state_save_interval (float): Minimal number of seconds between two saves of the state file, it is saved only when new records were counted.
         """
         if type(log_file) != str:
             raise TypeError("Soubor s logy musí být poskytnut jako string!")
@@ -29,13 +65,144 @@ class LogManager:
         if not stats_file.endswith(".txt"):
             raise ValueError("Soubor se statistikami musí mít příponu .txt!")
         
+        if type(top_k) != int or top_k < 1:
+            raise ValueError("Počet nejčastějších dotazů musí být kladné celé číslo!")
+
+        if type(batch_size) != int or batch_size < 1:
+            raise ValueError("Velikost dávky logů musí být kladné celé číslo!")
+
+        if fsync not in ("never", "batch"):
+            raise ValueError("Režim fsync musí být 'never' nebo 'batch'!")
+
+        if log_format not in ("text", "binary"):
+            raise ValueError("Formát logů musí být 'text' nebo 'binary'!")
+
+        if type(state_max_questions) != int or state_max_questions < top_k:
+            raise ValueError("Počet uložených dotazů musí být celé číslo alespoň rovné počtu nejčastějších dotazů!")
+
         self.log_file = log_file
         self.stats_file = stats_file
+        self.state_file = state_file if state_file is not None else stats_file[:-len(".txt")] + ".state.json"
+        self.top_k = top_k
+        self.state_max_questions = state_max_questions
+        self.state_save_interval = state_save_interval
+
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.fsync = fsync
+        self.analysis_interval = analysis_interval
+        self.shared_state = shared_state
+        self.log_format = log_format
+        self.log_store = None
+        if log_format == "binary":
+            # Imported only when needed, the store locks its files with fcntl, which is not available on Windows
+            from log_store import LogStore
+            self.log_store = LogStore(log_file[:-len(".txt")], fsync=fsync == "batch")
+        # Workers of the supervisor follow the ranking of the supervisor
+        self.ranking = create_ranking(ranking, top_k, window_hours, half_life_hours) if shared_state is None else None
+
+        self.clusterer = None
+        if clustering and shared_state is None:
+            self.clusterer = QuestionClusterer(max_clusters=max_clusters, threshold=cluster_threshold)
+            self.clusterer.protected = self._is_top_question
         
+        # Guards only the in-memory counts, the disk I/O runs outside of it and the readers use the published snapshots
         self.lock = threading.Lock()
+        # Serializes the writes through the shared file handle and the analyses writing the stats and state files
+        self._file_lock = threading.Lock()
+        self._analysis_lock = threading.Lock()
+        self._file = None
+        self._queue = None
+        self._writer_task = None
+
+        self.analysis_requests = 0
+        self.analysis_runs = 0
+        self.analysis_skipped = 0
+        self._analysis_dirty = False
+        self._analysis_task = None
+        self._last_analysis = None
+
+        self.question_counts = Counter()
+        self.top_questions = []
+        self.offset = 0
+        self._first_seen = {}
+        self._saved_offset = None
+        self._last_state_save = None
+        self.load_state()
+
         self.most_asked_questions = self.load_stats()
+        self._written_questions = list(self.most_asked_questions)
+
+        # Snapshot of the top questions of the time-aware ranking, replaced (never modified) after every update
+        self._ranked_questions = []
+        self._publish_ranking()
+
+
+    @classmethod
+    def shared(cls):
+        """
+        Returns the process-wide LogManager instance with the default files, creating it on first use.
+
+        :return (LogManager): The shared instance.
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+
+    def _format_record(self, question, answer, timestamp=None):
+        """
+        Formats a user question and its corresponding answer as a log entry.
+
+        :param question (str): The user's question to log.
+        :param answer (str): The bot's answer corresponding to the question.
+        :param timestamp (float): Time of the record in seconds since the epoch, now if not provided.
+        :return (str): The log entry.
+        """
+        current_datetime = (datetime.fromtimestamp(timestamp) if timestamp is not None else datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+        return f"{current_datetime} | Question: {question} -> Answer: {answer}\n"
 
 
+    @Metrics.shared().timed("log_write")
+    def _write_records(self, records):
+        """
+        Appends the records to the log file with a single write through the shared file handle, or to the log store.
+
+        The lock of the counts is taken only to count the written records, not during the write and fsync.
+
+        :param records (list): List of (timestamp, question, answer) tuples.
+        """
+        if self.log_store is not None:
+            # The offset of the log store is the number of records
+            start, end = self.log_store.append(records)
+        else:
+            data = "".join(self._format_record(question, answer, timestamp) for timestamp, question, answer in records).encode("UTF-8")
+
+            with self._file_lock:
+                if self._file is None:
+                    self._file = open(self.log_file, "ab")
+
+                start = self._file.seek(0, os.SEEK_END)
+                self._file.write(data)
+                self._file.flush()
+
+                if self.fsync == "batch":
+                    os.fsync(self._file.fileno())
+
+            end = start + len(data)
+
+        # Count the records right away if everything before them has been analyzed already,
+        # otherwise the next analysis catches up from the offset.
+        with self.lock:
+            if start == self.offset:
+                self.offset = end
+                for timestamp, question, _ in records:
+                    self._count_question(question.strip().lower(), timestamp)
+                self._publish_ranking()
+
+
+    @Metrics.shared().timed("log_record")
     def log_record(self, question, answer):
         """
         Logs a user question and its corresponding answer to the log file.
@@ -43,38 +210,411 @@ class LogManager:
         :param question (str): The user's question to log.
         :param answer (str): The bot's answer corresponding to the question.
         """
-        current_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"{current_datetime} | Question: {question} -> Answer: {answer}\n"
-
-        with open(self.log_file, "a", encoding="UTF-8") as file:
-            file.write(log_entry)
+        timestamp = time.time()
+        self._write_records([(timestamp, question, answer)])
             
-        return log_entry
+        return self._format_record(question, answer, timestamp)
 
 
-    def analyze_logs(self):
+    @Metrics.shared().timed("log_enqueue")
+    async def log_record_async(self, question, answer):
         """
-        Analyzes the log file to identify the top 3 most frequently asked questions.        
+        Queues a user question and its corresponding answer for the batched log writer.
+
+        Waits only when the queue is full, so a slow disk slows the producers down instead of growing the memory.
+
+        :param question (str): The user's question to log.
+        :param answer (str): The bot's answer corresponding to the question.
+        :return (str): The log entry.
+        """
+        if self._writer_task is None or self._writer_task.done():
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            # The writer serves all sessions, it must not inherit the correlation ID and flow of the session that started it
+            self._writer_task = asyncio.create_task(self._run_writer(), context=contextvars.Context())
+
+        timestamp = time.time()
+        await self._queue.put((timestamp, question, answer))
+
+        return self._format_record(question, answer, timestamp)
+
+
+    async def _run_writer(self):
+        """
+        Writes the queued records in batches, a batch is written once it is full or `flush_interval` has passed since its first record.
         """
+        loop = asyncio.get_running_loop()
+
+        while True:
+            records = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+
+            while len(records) < self.batch_size:
+                try:
+                    records.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+
+                try:
+                    records.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await asyncio.to_thread(self._write_records, records)
+                self.request_analysis()
+            except Exception as e:
+                log.error("Chyba při zápisu logů: %s", e)
+            finally:
+                for _ in records:
+                    self._queue.task_done()
+
+
+    async def close(self):
+        """
+        Writes all queued records, stops the batched log writer, runs a pending log analysis and closes the log file.
+        """
+        if self._writer_task is not None:
+            if not self._writer_task.done():
+                await self._queue.join()
+            self._writer_task.cancel()
+            self._writer_task = None
+
+        if self._analysis_task is not None:
+            self._analysis_task.cancel()
+            self._analysis_task = None
+
+            if self._analysis_dirty:
+                self._analysis_dirty = False
+                await self.analyze_logs_async()
+
+        # The state is saved at most every `state_save_interval` seconds, the last counts are saved now.
+        # A cancelled analysis may still run in its thread, so the state is saved under the analysis lock.
+        if self.shared_state is None and self.offset != self._saved_offset:
+            try:
+                await asyncio.to_thread(self._save_pending_state)
+            except Exception as e:
+                log.error("Chyba při ukládání stavu analýzy logů: %s", e)
+
+        self.analysis_requests = 0
+        self.analysis_runs = 0
+        self.analysis_skipped = 0
+        self._analysis_dirty = False
+        self._analysis_task = None
+        self._last_analysis = None
+
+        with self._file_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+    def _count_question(self, question, timestamp=None):
+        """
+        Increments the running count of the question and keeps the top questions ordered in O(k).
+
+        Questions with the same count are ordered by their first occurrence in the log.
+
+        :param question (str): The normalized question.
+        :param timestamp (float): Time of the record in seconds since the epoch, used by the time-windowed ranking.
+        """
+        if self.clusterer is not None:
+            question, evicted = self.clusterer.add(question)
+            if evicted is not None:
+                self._forget_question(evicted)
+
+        if self.ranking is not None:
+            self.ranking.add(question, timestamp)
+
+        self.question_counts[question] += 1
+        self._first_seen.setdefault(question, len(self._first_seen))
+
+        rank = lambda q: (-self.question_counts[q], self._first_seen[q])
+
+        if question not in self.top_questions:
+            if len(self.top_questions) >= self.top_k and rank(question) > rank(self.top_questions[-1]):
+                return
+            self.top_questions.append(question)
+
+        self.top_questions.sort(key=rank)
+        del self.top_questions[self.top_k:]
+
+
+    def _forget_question(self, question):
+        """
+        Drops the counts of a question whose cluster was evicted, which keeps the memory bounded.
+
+        :param question (str): Key of the evicted cluster.
+        """
+        self.question_counts.pop(question, None)
+        self._first_seen.pop(question, None)
+
+        if self.ranking is not None:
+            self.ranking.discard(question)
+
+
+    def _is_top_question(self, question):
+        """
+        Checks whether the question is one of the current top questions, their clusters are never evicted.
+
+        :param question (str): Key of the cluster.
+        :return (bool): True if the question is in the top questions.
+        """
+        return question in self.top_questions or (self.ranking is not None and question in self.ranking.top_questions)
+
+
+    def _representatives(self, questions):
+        """
+        Replaces the cluster keys with the most frequent phrasings of the clusters.
+
+        :param questions (list): The counted questions.
+        :return (list): The questions to show.
+        """
+        if self.clusterer is None:
+            return list(questions)
+        return [self.clusterer.representative(question) for question in questions]
+
+
+    def _read_since(self, offset, max_records=10000):
+        """
+        Reads the questions of the records appended to the log since the offset, without holding the lock.
+
+        :param offset (int): Offset in the log file, or the number of records of the log store.
+        :param max_records (int): Maximum number of text records read at once.
+        :return (tuple): The offset after the read records and a list of their (normalized question, timestamp) tuples.
+        """
+        if self.log_store is not None:
+            end, question_ids, timestamps = self.log_store.records_since(offset)
+            return end, [(self.log_store.question(question_id), timestamp) for question_id, timestamp in zip(question_ids.tolist(), timestamps.tolist())]
+
+        questions = []
+
         try:
-            with open(self.log_file, "r", encoding="UTF-8") as file:
-                questions = []
+            with open(self.log_file, "rb") as file:
+                file.seek(offset)
+
                 for line in file:
-                    match = re.search(r"Question: (.*?) ->", line)
+                    # An incomplete last line is counted once it has been fully written
+                    if not line.endswith(b"\n") or len(questions) >= max_records:
+                        break
+
+                    offset += len(line)
+                    match = re.search(r"^(.*?) \| Question: (.*?) ->", line.decode("UTF-8", errors="replace"))
                     if match:
-                        questions.append(match.group(1).strip().lower())
+                        questions.append((match.group(2).strip().lower(), self._parse_timestamp(match.group(1))))
+
+        except FileNotFoundError:
+            pass
+
+        return offset, questions
 
-            most_asked = Counter(questions).most_common(3)
+
+    def _catch_up(self):
+        """
+        Counts the questions of the records appended to the log since the analyzed offset.
+
+        The records are read in batches without the lock, a batch is counted only if no writer counted its records meanwhile.
+        """
+        while True:
+            start = self.offset
+            end, questions = self._read_since(start)
+            if end == start:
+                return
 
             with self.lock:
-                with open(self.stats_file, "w", encoding="UTF-8") as stats:
-                    for question, count in most_asked:
-                        stats.write(f"{question}\n")
+                if self.offset != start:
+                    continue
+
+                self.offset = end
+                for question, timestamp in questions:
+                    self._count_question(question, timestamp)
+                self._publish_ranking()
+
+
+    def _parse_timestamp(self, text):
+        """
+        Parses the time of a text log record, only needed by the time-windowed ranking.
+
+        :param text (str): The time in the "%Y-%m-%d %H:%M:%S" format.
+        :return (float): Seconds since the epoch, or None if not needed or invalid.
+        """
+        if self.ranking is None:
+            return None
+
+        try:
+            return datetime.strptime(text, "%Y-%m-%d %H:%M:%S").timestamp()
+        except ValueError:
+            return None
+
 
-                self.most_asked_questions = [f"{q}" for q in most_asked]
+    def _current_top(self):
+        """
+        Returns the current top questions of the configured ranking, the caller must hold the lock.
+
+        :return (list): The top questions.
+        """
+        if self.ranking is not None:
+            return self._representatives(self.ranking.top())
+        return self._representatives(self.top_questions)
+
+
+    def _publish_ranking(self):
+        """
+        Replaces the snapshot of the time-aware ranking read by `get_questions`, the caller must hold the lock (or own the instance).
+        """
+        if self.ranking is not None:
+            self._ranked_questions = self._representatives(self.ranking.top())
+
+
+    @Metrics.shared().timed("analyze_logs")
+    def analyze_logs(self):
+        """
+        Analyzes the log file to identify the top 3 most frequently asked questions.        
+
+        Only the records appended since the last analysis are read and the stats file is rewritten only when the top questions change.
+        The lock of the counts is held only while counting the read records and copying the state, the files are read and written without it.
+        """
+        try:
+            with self._analysis_lock:
+                self._catch_up()
+
+                with self.lock:
+                    # The ranking scans all its scores only here, not on every counted batch
+                    if self.ranking is not None:
+                        self.ranking.prune()
+                    top_questions = self._current_top()
+                    self._publish_ranking()
+
+                state = None
+                if self.offset != self._saved_offset and (self._last_state_save is None or time.monotonic() - self._last_state_save >= self.state_save_interval):
+                    state = self._state()
+
+                if top_questions != self._written_questions:
+                    with open(self.stats_file, "w", encoding="UTF-8") as stats:
+                        for question in top_questions:
+                            stats.write(f"{question}\n")
+
+                    self._written_questions = top_questions
+                    self.most_asked_questions = top_questions
+
+                if state is not None:
+                    self.save_state(state)
 
         except Exception as e:
-            print(f"Chyba při analýze logů: {e}")
+            log.error("Chyba při analýze logů: %s", e)
+
+
+    def load_state(self):
+        """
+        Loads the running question counts and the analyzed log offset from the state file.
+        """
+        try:
+            with open(self.state_file, "r", encoding="UTF-8") as file:
+                state = json.load(file)
+
+        except FileNotFoundError:
+            return
+
+        except Exception as e:
+            log.warning("Chyba při načítání stavu analýzy logů: %s", e)
+            return
+
+        # The offset of a different log format is meaningless, the new log is analyzed from the beginning.
+        # Counts of raw questions and of clusters cannot be mixed either.
+        if state.get("format", "text") != self.log_format or state.get("clustering", False) != (self.clusterer is not None):
+            return
+
+        self.offset = state["offset"]
+        self._saved_offset = self.offset
+        self.question_counts = Counter(state["counts"])
+        self._first_seen = {question: i for i, question in enumerate(state["counts"])}
+
+        rank = lambda q: (-self.question_counts[q], self._first_seen[q])
+        self.top_questions = sorted(self.question_counts, key=rank)[:self.top_k]
+
+        if self.clusterer is not None:
+            for key, representative in state.get("clusters", {}).items():
+                self.clusterer.seed(key, representative)
+
+        # The saved ranking of a different mode is discarded, it starts empty from the saved offset
+        ranking_state = state.get("ranking")
+        if self.ranking is not None and ranking_state is not None and ranking_state["mode"] == self.ranking.mode:
+            self.ranking.load_state(ranking_state)
+
+
+    def _state(self):
+        """
+        Returns the state to be saved: the analyzed log offset and the counts of the `state_max_questions` most asked questions.
+
+        The counts are only copied under the lock, the most asked questions are selected without it, so the state stays bounded
+        and its cost does not block the writers however many distinct questions were asked.
+
+        :return (dict): The JSON serializable state.
+        """
+        with self.lock:
+            offset = self.offset
+            counts = list(self.question_counts.items())
+            ranking_state = self.ranking.to_state() if self.ranking is not None else None
+
+        if len(counts) > self.state_max_questions:
+            # The counts are in the order of the first occurrences, which is kept for the ordering of the ties
+            kept = heapq.nlargest(self.state_max_questions, range(len(counts)), key=lambda i: counts[i][1])
+            counts = [counts[i] for i in sorted(kept)]
+
+        clusters = None
+        if self.clusterer is not None:
+            with self.lock:
+                clusters = {key: self.clusterer.representative(key) for key, _ in counts}
+
+        return {
+            "format": self.log_format,
+            "offset": offset,
+            "counts": dict(counts),
+            "ranking": ranking_state,
+            "clustering": self.clusterer is not None,
+            "clusters": clusters
+        }
+
+
+    def _save_pending_state(self):
+        """
+        Saves the state not saved yet, waiting for a running analysis to finish first.
+        """
+        with self._analysis_lock:
+            if self.offset != self._saved_offset:
+                self.save_state()
+
+
+    def save_state(self, state=None):
+        """
+        Atomically saves the running question counts and the analyzed log offset to the state file, the file is written without the lock.
+
+        Every call writes its own temporary file, so concurrent saves cannot replace each other's file.
+
+        :param state (dict): The state from `_state`, the current one if not provided.
+        """
+        if state is None:
+            state = self._state()
+
+        descriptor, temporary_file = tempfile.mkstemp(
+            dir=os.path.dirname(self.state_file) or ".", prefix=os.path.basename(self.state_file) + ".", suffix=".tmp"
+        )
+
+        try:
+            with open(descriptor, "w", encoding="UTF-8") as file:
+                json.dump(state, file, ensure_ascii=False)
+
+            os.replace(temporary_file, self.state_file)
+        except BaseException:
+            if os.path.exists(temporary_file):
+                os.remove(temporary_file)
+            raise
+        self._saved_offset = state["offset"]
+        self._last_state_save = time.monotonic()
 
 
     def load_stats(self):
@@ -101,11 +641,87 @@ class LogManager:
         await asyncio.to_thread(self.analyze_logs)
 
 
+    def request_analysis(self):
+        """
+        Schedules a log analysis, requests are coalesced so that at most one analysis runs at a time and at most once per `analysis_interval`.
+        """
+        # The supervisor analyzes the logs of all worker processes
+        if self.shared_state is not None:
+            return
+
+        self.analysis_requests += 1
+
+        if self._analysis_dirty:
+            self.analysis_skipped += 1
+        self._analysis_dirty = True
+
+        # The task reference is kept so the analysis is not garbage-collected mid-flight
+        if self._analysis_task is None or self._analysis_task.done():
+            self._analysis_task = asyncio.create_task(self._run_analysis(), context=contextvars.Context())
+
+
+    async def _run_analysis(self):
+        """
+        Runs the log analysis while there are pending requests, waiting for `analysis_interval` since the previous run.
+        """
+        loop = asyncio.get_running_loop()
+
+        while self._analysis_dirty:
+            if self._last_analysis is not None:
+                delay = self._last_analysis + self.analysis_interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            self._analysis_dirty = False
+            await self.analyze_logs_async()
+
+            self.analysis_runs += 1
+            self._last_analysis = loop.time()
+
+
+    async def follow_shared_state(self):
+        """
+        Keeps the most asked questions in sync with the shared state, polling it every `analysis_interval` seconds.
+        """
+        version = None
+
+        while True:
+            try:
+                current_version, questions = await asyncio.to_thread(self.shared_state.get_questions)
+                if current_version != version:
+                    version = current_version
+                    self.most_asked_questions = questions
+            except Exception as e:
+                log.error("Chyba při načítání sdíleného stavu: %s", e)
+
+            await asyncio.sleep(self.analysis_interval)
+
+
+    def analysis_stats(self):
+        """
+        Returns the counters of the analysis scheduler.
+
+        :return (dict): Number of requested, executed and skipped (coalesced) analyses.
+        """
+        return {
+            "requests": self.analysis_requests,
+            "runs": self.analysis_runs,
+            "skipped": self.analysis_skipped
+        }
+
+
     def get_questions(self):
         """
         Returns the current list of the most frequently asked questions.
+
+        The published snapshots are returned without any lock, so a slow log write or analysis never delays the sessions.
+        The snapshot of the time-aware ranking is refreshed whenever records are counted, the questions of the last analysis are returned while it is empty.
+        The returned list must not be modified.
         
         :return: the (3) most asked questions.
         """
-        with self.lock:
-            return self.most_asked_questions
\ No newline at end of file
+        ranked_questions = self._ranked_questions
+        if ranked_questions:
+            return ranked_questions
+
+        return self.most_asked_questions
@@ -0,0 +1,417 @@
+import argparse
+import fcntl
+import mmap
+import os
+import re
+import struct
+import threading
+
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+# Record: total length, timestamp, question ID, length of the question text, then the question and answer text (UTF-8)
+RECORD_HEADER = struct.Struct("<IdII")
+
+# Entry of the question table: length of the normalized question text, then the text (UTF-8)
+QUESTION_HEADER = struct.Struct("<I")
+
+# Fixed-width entry of the sidecar index, one per record
+INDEX_DTYPE = np.dtype([("timestamp", "<f8"), ("question_id", "<u4"), ("offset", "<u8")])
+
+TEXT_RECORD = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) \| Question: (.*?) -> Answer: (.*)$")
+
+
+class LogStore:
+    """
+    Append-only binary log of questions and answers with interned questions and a fixed-width sidecar index.
+
+    Three files share the base path:
+    `<path>.dat` holds the length-prefixed records, `<path>.questions` the table of the normalized questions (the question ID is the position in the table)
+    and `<path>.idx` the timestamp, question ID and record offset of every record.
+    Analytics read the memory-mapped index only, so no answer text has to be decoded.
+    Appends are serialized with an exclusive file lock, so several processes can share one store.
+    """
+
+    def __init__(self, path, fsync=False):
+        """
+        Initializes the LogStore instance, opens (or creates) the files and repairs a record that was not completely written.
+
+        :param path (str): Base path of the store files, without extension.
+        :param fsync (bool): Whether to fsync the files after every append.
+        """
+        if type(path) != str:
+            raise TypeError("Cesta k úložišti logů musí být poskytnuta jako string!")
+
+        self.path = path
+        self.fsync = fsync
+
+        self.data_file = path + ".dat"
+        self.index_file = path + ".idx"
+        self.questions_file = path + ".questions"
+
+        self._data = open(self.data_file, "ab+")
+        self._index_handle = open(self.index_file, "ab+")
+        self._questions_handle = open(self.questions_file, "ab+")
+
+        self._lock = threading.Lock()
+
+        self.questions = []
+        self._question_ids = {}
+        self._questions_offset = 0
+
+        self._index = np.empty(0, dtype=INDEX_DTYPE)
+
+        with self._locked():
+            self._repair()
+
+
+    @contextmanager
+    def _locked(self):
+        """
+        Context manager holding both the thread lock and the exclusive lock of the data file, which serializes the appends of all processes.
+        """
+        with self._lock:
+            fcntl.flock(self._data.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._data.fileno(), fcntl.LOCK_UN)
+
+
+    def _repair(self):
+        """
+        Truncates incompletely written entries and indexes the records missing in the index, the caller must hold the lock.
+        """
+        self._load_questions(truncate=True)
+
+        index_size = os.fstat(self._index_handle.fileno()).st_size
+        if index_size % INDEX_DTYPE.itemsize:
+            self._index_handle.truncate(index_size - index_size % INDEX_DTYPE.itemsize)
+
+        index = self.index()
+        data_size = os.fstat(self._data.fileno()).st_size
+
+        position = 0
+        if len(index):
+            self._data.seek(int(index["offset"][-1]))
+            position = int(index["offset"][-1]) + RECORD_HEADER.unpack(self._data.read(RECORD_HEADER.size))[0]
+
+        missing = []
+        while position + RECORD_HEADER.size <= data_size:
+            self._data.seek(position)
+            length, timestamp, question_id, _ = RECORD_HEADER.unpack(self._data.read(RECORD_HEADER.size))
+
+            if position + length > data_size or question_id >= len(self.questions):
+                break
+
+            missing.append((timestamp, question_id, position))
+            position += length
+
+        if position < data_size:
+            self._data.truncate(position)
+
+        if missing:
+            self._index_handle.write(np.array(missing, dtype=INDEX_DTYPE).tobytes())
+            self._index_handle.flush()
+
+
+    def _load_questions(self, truncate=False):
+        """
+        Reads the questions appended to the question table since the last read (possibly by another process).
+
+        :param truncate (bool): Whether to truncate an incompletely written last entry, the caller must hold the lock.
+        """
+        self._questions_handle.seek(self._questions_offset)
+        data = self._questions_handle.read()
+
+        position = 0
+        while position + QUESTION_HEADER.size <= len(data):
+            length, = QUESTION_HEADER.unpack_from(data, position)
+            if position + QUESTION_HEADER.size + length > len(data):
+                break
+
+            question = data[position + QUESTION_HEADER.size:position + QUESTION_HEADER.size + length].decode("UTF-8")
+            self._question_ids[question] = len(self.questions)
+            self.questions.append(question)
+            position += QUESTION_HEADER.size + length
+
+        self._questions_offset += position
+
+        if truncate and position < len(data):
+            self._questions_handle.truncate(self._questions_offset)
+
+
+    def _intern(self, question):
+        """
+        Returns the ID of the normalized question, appending it to the question table if it is new, the caller must hold the lock.
+
+        :param question (str): The normalized question.
+        :return (tuple): The question ID and the bytes to append to the question table (empty if the question is known).
+        """
+        question_id = self._question_ids.get(question)
+        if question_id is not None:
+            return question_id, b""
+
+        question_id = len(self.questions)
+        self._question_ids[question] = question_id
+        self.questions.append(question)
+
+        encoded = question.encode("UTF-8")
+        return question_id, QUESTION_HEADER.pack(len(encoded)) + encoded
+
+
+    def append(self, records):
+        """
+        Appends the records with one write to each file.
+
+        :param records (list): List of (timestamp, question, answer) tuples, the timestamp in seconds since the epoch.
+        :return (tuple): Number of records in the store before and after the append.
+        """
+        with self._locked():
+            self._load_questions()
+
+            data_start = self._data.seek(0, os.SEEK_END)
+            index_start = os.fstat(self._index_handle.fileno()).st_size // INDEX_DTYPE.itemsize
+
+            new_questions = []
+            data = []
+            index = []
+            offset = data_start
+
+            for timestamp, question, answer in records:
+                question_id, question_entry = self._intern(question.strip().lower())
+                new_questions.append(question_entry)
+
+                question_bytes = question.encode("UTF-8")
+                answer_bytes = answer.encode("UTF-8")
+                length = RECORD_HEADER.size + len(question_bytes) + len(answer_bytes)
+
+                data.append(RECORD_HEADER.pack(length, timestamp, question_id, len(question_bytes)) + question_bytes + answer_bytes)
+                index.append((timestamp, question_id, offset))
+                offset += length
+
+            # The question table is written first and the index last, so a crash leaves at most a tail that `_repair` can fix
+            written = b"".join(new_questions)
+            if written:
+                self._questions_handle.write(written)
+                self._questions_handle.flush()
+                self._questions_offset += len(written)
+
+            self._data.write(b"".join(data))
+            self._data.flush()
+
+            self._index_handle.write(np.array(index, dtype=INDEX_DTYPE).tobytes())
+            self._index_handle.flush()
+
+            if self.fsync:
+                for handle in (self._questions_handle, self._data, self._index_handle):
+                    os.fsync(handle.fileno())
+
+        return index_start, index_start + len(records)
+
+
+    def index(self):
+        """
+        Returns the memory-mapped index, it is mapped again only when the index file grew.
+
+        :return (numpy.ndarray): Structured array with the timestamp, question_id and offset of every record.
+        """
+        count = os.stat(self.index_file).st_size // INDEX_DTYPE.itemsize
+
+        if count != len(self._index):
+            self._index = np.memmap(self.index_file, dtype=INDEX_DTYPE, mode="r", shape=(count,)) if count else np.empty(0, dtype=INDEX_DTYPE)
+
+        return self._index
+
+
+    def __len__(self):
+        """
+        Returns the number of records in the store.
+        """
+        return len(self.index())
+
+
+    def question(self, question_id):
+        """
+        Returns the normalized question with the given ID.
+
+        :param question_id (int): The question ID.
+        :return (str): The normalized question.
+        """
+        if question_id >= len(self.questions):
+            with self._lock:
+                self._load_questions()
+
+        return self.questions[question_id]
+
+
+    def records_since(self, start=0):
+        """
+        Returns the question IDs and timestamps of the records from the given position.
+
+        :param start (int): Position of the first record.
+        :return (tuple): Number of records in the store, the array of question IDs and the array of timestamps.
+        """
+        index = self.index()
+        return len(index), np.array(index["question_id"][start:]), np.array(index["timestamp"][start:])
+
+
+    def _select(self, start=None, end=None):
+        """
+        Returns the index entries of the records logged in the time range.
+
+        :param start (float): Start of the range (inclusive) in seconds since the epoch, unbounded if None.
+        :param end (float): End of the range (exclusive) in seconds since the epoch, unbounded if None.
+        :return (numpy.ndarray): The selected index entries.
+        """
+        index = self.index()
+        if start is None and end is None:
+            return index
+
+        timestamps = index["timestamp"]
+        mask = np.ones(len(index), dtype=bool)
+        if start is not None:
+            mask &= timestamps >= start
+        if end is not None:
+            mask &= timestamps < end
+
+        return index[mask]
+
+
+    def top_questions(self, k=3, start=None, end=None):
+        """
+        Returns the most frequent questions in the time range, ties are ordered by the first occurrence in the whole log.
+
+        :param k (int): Number of questions.
+        :param start (float): Start of the range in seconds since the epoch, optional.
+        :param end (float): End of the range in seconds since the epoch, optional.
+        :return (list): List of (question, count) tuples.
+        """
+        question_ids = self._select(start, end)["question_id"]
+        if not len(question_ids):
+            return []
+
+        counts = np.bincount(question_ids)
+        # Question IDs are assigned in the order of the first occurrence, a stable sort keeps it for ties
+        top = np.argsort(-counts, kind="stable")[:k]
+
+        return [(self.question(int(question_id)), int(counts[question_id])) for question_id in top if counts[question_id]]
+
+
+    def hourly_volume(self, start=None, end=None):
+        """
+        Returns the number of records per hour in the time range.
+
+        :param start (float): Start of the range in seconds since the epoch, optional.
+        :param end (float): End of the range in seconds since the epoch, optional.
+        :return (list): List of (start of the hour in seconds since the epoch, count) tuples ordered by time.
+        """
+        hours, counts = np.unique(self._select(start, end)["timestamp"] // 3600, return_counts=True)
+        return [(int(hour) * 3600, int(count)) for hour, count in zip(hours, counts)]
+
+
+    def scan(self, start=None, end=None):
+        """
+        Iterates over the records logged in the time range, only the selected records are decoded.
+
+        :param start (float): Start of the range in seconds since the epoch, optional.
+        :param end (float): End of the range in seconds since the epoch, optional.
+        :return: Iterator of (timestamp, question, answer) tuples.
+        """
+        entries = self._select(start, end)
+        if not len(entries):
+            return
+
+        with open(self.data_file, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for offset in entries["offset"]:
+                offset = int(offset)
+                length, timestamp, _, question_length = RECORD_HEADER.unpack_from(data, offset)
+
+                body = data[offset + RECORD_HEADER.size:offset + length]
+                yield timestamp, body[:question_length].decode("UTF-8"), body[question_length:].decode("UTF-8")
+
+
+    def close(self):
+        """
+        Closes the store files.
+        """
+        self._index = np.empty(0, dtype=INDEX_DTYPE)
+
+        for handle in (self._data, self._index_handle, self._questions_handle):
+            handle.close()
+
+
+def read_text_log(log_file):
+    """
+    Parses the records of the text log file, answers spanning several lines are joined.
+
+    :param log_file (str): Path to the text log file.
+    :return: Iterator of (timestamp, question, answer) tuples.
+    """
+    record = None
+
+    with open(log_file, "r", encoding="UTF-8", errors="replace") as file:
+        for line in file:
+            match = TEXT_RECORD.match(line.rstrip("\n"))
+
+            if match is None:
+                # Continuation of a multi-line answer
+                if record is not None:
+                    record[2] += "\n" + line.rstrip("\n")
+                continue
+
+            if record is not None:
+                yield tuple(record)
+
+            timestamp = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S").timestamp()
+            record = [timestamp, match.group(2), match.group(3)]
+
+    if record is not None:
+        yield tuple(record)
+
+
+def migrate_text_log(log_file, store, batch_size=1000):
+    """
+    Copies the records of the text log file into an empty store.
+
+    :param log_file (str): Path to the text log file.
+    :param store (LogStore): The target store.
+    :param batch_size (int): Number of records appended at once.
+    :return (int): Number of migrated records.
+    :raises ValueError: If the store is not empty.
+    """
+    if len(store):
+        raise ValueError("Úložiště logů již obsahuje záznamy, migrace by je zduplikovala!")
+
+    migrated = 0
+    batch = []
+
+    for record in read_text_log(log_file):
+        batch.append(record)
+
+        if len(batch) >= batch_size:
+            store.append(batch)
+            migrated += len(batch)
+            batch = []
+
+    if batch:
+        store.append(batch)
+        migrated += len(batch)
+
+    return migrated
+
+
+if __name__ == "__main__":
+    # One-shot migration of the text log into the binary log store
+    parser = argparse.ArgumentParser(description="Migrates log.txt into the binary log store.")
+    parser.add_argument("log_file", nargs="?", default="../logs/log.txt", help="path to the text log file")
+    parser.add_argument("store", nargs="?", help="base path of the store files (default: log file without .txt)")
+    args = parser.parse_args()
+
+    store = LogStore(args.store or os.path.splitext(args.log_file)[0])
+    try:
+        print(f"Migrated {migrate_text_log(args.log_file, store)} records to {store.data_file}.")
+    finally:
+        store.close()
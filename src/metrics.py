@@ -0,0 +1,264 @@
+import asyncio
+import bisect
+import contextlib
+import functools
+import inspect
+import logging
+import random
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram:
+    """
+    Cumulative histogram of observed durations, rendered in the Prometheus text format.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Initializes the Histogram instance.
+
+        :param buckets (tuple): Sorted upper bounds of the buckets in seconds, the +Inf bucket is added automatically.
+        """
+        if list(buckets) != sorted(buckets) or not buckets:
+            raise ValueError("Hranice histogramu musí být neprázdná vzestupně seřazená posloupnost!")
+
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+        self._lock = threading.Lock()
+
+
+    def observe(self, value):
+        """
+        Records one observation.
+
+        :param value (float): The observed value in seconds.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+    def render(self, name, labels=""):
+        """
+        Renders the bucket, sum and count samples.
+
+        :param name (str): Name of the metric.
+        :param labels (str): Rendered labels of the series without braces, e.g. 'stage="log_record"'.
+        :return (list): Lines of the Prometheus text format.
+        """
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+
+        prefix = f"{labels}," if labels else ""
+        lines = []
+        cumulative = 0
+
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else repr(float(bound))
+            lines.append(f'{name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {total}")
+        lines.append(f"{name}_count{suffix} {count}")
+        return lines
+
+
+class Metrics:
+    """
+    In-process registry of stage latency histograms, the event loop lag probe and counters of the other components.
+    """
+
+    _shared = None
+
+    def __init__(self, sample_rate=1.0, namespace="jecnabot"):
+        """
+        Initializes the Metrics instance.
+
+        :param sample_rate (float): Share of the calls of a timed stage that are measured, 0 disables the timers.
+        :param namespace (str): Prefix of the exported metric names.
+        """
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("Vzorkovací poměr metrik musí být v rozsahu 0 až 1!")
+
+        self.sample_rate = sample_rate
+        self.namespace = namespace
+
+        self.stages = {}
+        self.loop_lag = Histogram()
+        self.collectors = {}
+
+        self._lock = threading.Lock()
+        self._lag_task = None
+
+
+    @classmethod
+    def shared(cls):
+        """
+        Returns the process-wide Metrics instance, creating it on first use.
+
+        :return (Metrics): The shared instance.
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+
+    def observe(self, stage, duration):
+        """
+        Records the duration of one run of the stage.
+
+        :param stage (str): Name of the stage.
+        :param duration (float): Duration in seconds.
+        """
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.stages.setdefault(stage, Histogram())
+        histogram.observe(duration)
+
+
+    def timed(self, stage):
+        """
+        Decorator measuring the duration of a function, coroutine function or async generator function as the given stage.
+
+        An async generator is measured until it is exhausted, the time to its first item is recorded as the stage `<stage>_first_item`.
+        Only `sample_rate` of the calls are measured, the others cost one random number.
+
+        :param stage (str): Name of the stage.
+        :return (callable): The decorator.
+        """
+        def decorator(function):
+            if inspect.isasyncgenfunction(function):
+                @functools.wraps(function)
+                async def wrapper(*args, **kwargs):
+                    measured = random.random() < self.sample_rate
+                    start = time.perf_counter()
+                    first = True
+
+                    try:
+                        async with contextlib.aclosing(function(*args, **kwargs)) as items:
+                            async for item in items:
+                                if first and measured:
+                                    self.observe(f"{stage}_first_item", time.perf_counter() - start)
+                                first = False
+                                yield item
+                    finally:
+                        if measured:
+                            self.observe(stage, time.perf_counter() - start)
+            elif inspect.iscoroutinefunction(function):
+                @functools.wraps(function)
+                async def wrapper(*args, **kwargs):
+                    if random.random() >= self.sample_rate:
+                        return await function(*args, **kwargs)
+
+                    start = time.perf_counter()
+                    try:
+                        return await function(*args, **kwargs)
+                    finally:
+                        self.observe(stage, time.perf_counter() - start)
+            else:
+                @functools.wraps(function)
+                def wrapper(*args, **kwargs):
+                    if random.random() >= self.sample_rate:
+                        return function(*args, **kwargs)
+
+                    start = time.perf_counter()
+                    try:
+                        return function(*args, **kwargs)
+                    finally:
+                        self.observe(stage, time.perf_counter() - start)
+
+            return wrapper
+        return decorator
+
+
+    def register_collector(self, name, collect):
+        """
+        Registers a function returning the counters of a component, exported as gauges `<namespace>_<name>_<counter>`.
+
+        :param name (str): Name of the component.
+        :param collect (callable): Function returning a dict of numeric counters, e.g. `AnswerCache.stats`.
+        """
+        self.collectors[name] = collect
+
+
+    def start_lag_probe(self, interval=0.5):
+        """
+        Starts measuring how late the event loop wakes up a sleeping task, must be called from the running loop.
+
+        :param interval (float): Number of seconds between two measurements.
+        """
+        if self._lag_task is None or self._lag_task.done():
+            self._lag_task = asyncio.get_running_loop().create_task(self._probe_lag(interval))
+
+
+    async def _probe_lag(self, interval):
+        """
+        Sleeps for the interval and records the extra delay until the loop resumes the task.
+
+        :param interval (float): Number of seconds between two measurements.
+        """
+        loop = asyncio.get_running_loop()
+
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            self.loop_lag.observe(max(0.0, loop.time() - start - interval))
+
+
+    def stop_lag_probe(self):
+        """
+        Stops the event loop lag probe.
+        """
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+
+
+    def render(self):
+        """
+        Renders all metrics in the Prometheus text exposition format (version 0.0.4).
+
+        :return (str): The metrics.
+        """
+        stage_name = f"{self.namespace}_stage_duration_seconds"
+        lag_name = f"{self.namespace}_event_loop_lag_seconds"
+
+        lines = [
+            f"# HELP {stage_name} Duration of the processing stages (sampled, rate {self.sample_rate}).",
+            f"# TYPE {stage_name} histogram",
+        ]
+        for stage, histogram in sorted(self.stages.items()):
+            lines.extend(histogram.render(stage_name, f'stage="{stage}"'))
+
+        lines.append(f"# HELP {lag_name} Delay of the event loop in resuming a sleeping task.")
+        lines.append(f"# TYPE {lag_name} histogram")
+        lines.extend(self.loop_lag.render(lag_name))
+
+        for name, collect in sorted(self.collectors.items()):
+            try:
+                counters = collect()
+            except Exception as e:
+                log.warning("Chyba při sběru metrik %s: %s", name, e)
+                continue
+
+            for counter, value in sorted(counters.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = f"{self.namespace}_{name}_{counter}"
+                    lines.append(f"# TYPE {metric} gauge")
+                    lines.append(f"{metric} {value}")
+
+        return "\n".join(lines) + "\n"
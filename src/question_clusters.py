@@ -0,0 +1,256 @@
+import zlib
+
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+from answer_cache import normalize_question
+
+# Mersenne prime of the MinHash permutations, products with 31-bit values fit into 64 bits
+_PRIME = (1 << 31) - 1
+
+
+class _Cluster:
+    """
+    Near-duplicate questions sharing one count, the most frequent phrasing represents them.
+    """
+
+    __slots__ = ("key", "signature", "phrasings")
+
+    def __init__(self, key, signature):
+        self.key = key
+        self.signature = signature
+        self.phrasings = Counter()
+
+
+class QuestionClusterer:
+    """
+    Groups near-duplicate questions (diacritics, punctuation, typos, extra words) into clusters using MinHash signatures of character n-grams and LSH.
+
+    Questions are normalized first, identical normalized questions are resolved by a dictionary lookup without hashing.
+    The number of clusters is bounded, the least recently used cluster is evicted when the limit is reached.
+    """
+
+    def __init__(self, max_clusters=10000, threshold=0.6, num_perm=64, bands=16, ngram_size=3, max_phrasings=5, seed=1):
+        """
+        Initializes the QuestionClusterer instance.
+
+        :param max_clusters (int): Maximum number of clusters kept in memory.
+        :param threshold (float): Minimal estimated Jaccard similarity of the n-grams for a question to join a cluster.
+        :param num_perm (int): Number of MinHash permutations.
+        :param bands (int): Number of LSH bands, `num_perm` must be divisible by it.
+        :param ngram_size (int): Length of the character n-grams.
+        :param max_phrasings (int): Maximum number of phrasings counted per cluster to choose the representative one.
+        :param seed (int): Seed of the MinHash permutations.
+        """
+        if type(max_clusters) != int or max_clusters < 1:
+            raise ValueError("Maximální počet shluků musí být kladné celé číslo!")
+
+        if not 0 < threshold <= 1:
+            raise ValueError("Práh podobnosti musí být v rozsahu 0 až 1!")
+
+        if num_perm % bands:
+            raise ValueError("Počet permutací musí být dělitelný počtem pásem!")
+
+        self.max_clusters = max_clusters
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram_size = ngram_size
+        self.max_phrasings = max_phrasings
+
+        # Called with a cluster key, protected clusters (e.g. the current top questions) are not evicted
+        self.protected = lambda key: False
+
+        generator = np.random.default_rng(seed)
+        self._a = generator.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = generator.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+        self.clusters = OrderedDict()
+        self._keys = OrderedDict()
+        self._buckets = {}
+
+        self.merged = 0
+        self.evicted = 0
+
+
+    def _signature(self, normalized):
+        """
+        Computes the MinHash signature of the character n-grams of the normalized question.
+
+        :param normalized (str): The normalized question.
+        :return (numpy.ndarray): The signature.
+        """
+        padded = f" {normalized} "
+        ngrams = {padded[i:i + self.ngram_size] for i in range(max(1, len(padded) - self.ngram_size + 1))}
+
+        hashes = np.fromiter((zlib.crc32(ngram.encode("UTF-8")) % _PRIME for ngram in ngrams), dtype=np.uint64, count=len(ngrams))
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1)
+
+
+    def _band_keys(self, signature):
+        """
+        Returns the LSH bucket keys of the signature, one per band.
+
+        :param signature (numpy.ndarray): The signature.
+        :return (list): The bucket keys.
+        """
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+
+    def _find(self, signature):
+        """
+        Returns the most similar cluster sharing an LSH bucket with the signature, if it is similar enough.
+
+        :param signature (numpy.ndarray): The signature.
+        :return (_Cluster): The cluster or None.
+        """
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+
+        best, best_similarity = None, self.threshold
+        for key in candidates:
+            cluster = self.clusters[key]
+            similarity = float(np.mean(cluster.signature == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = cluster, similarity
+
+        return best
+
+
+    def _create(self, key, signature):
+        """
+        Creates a cluster, evicting the least recently used unprotected cluster if the limit is reached.
+
+        :param key (str): Key of the cluster, the normalized question that founded it.
+        :param signature (numpy.ndarray): Signature of the cluster.
+        :return (tuple): The new cluster and the key of the evicted cluster (or None).
+        """
+        evicted = None
+
+        if len(self.clusters) >= self.max_clusters:
+            for candidate in self.clusters:
+                if not self.protected(candidate):
+                    evicted = candidate
+                    break
+
+            if evicted is not None:
+                self._remove(evicted)
+
+        cluster = _Cluster(key, signature)
+        self.clusters[key] = cluster
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, set()).add(key)
+
+        return cluster, evicted
+
+
+    def _remove(self, key):
+        """
+        Removes the cluster and its LSH bucket entries.
+
+        :param key (str): Key of the cluster.
+        """
+        cluster = self.clusters.pop(key)
+        self.evicted += 1
+
+        for band_key in self._band_keys(cluster.signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+
+    def add(self, question):
+        """
+        Assigns the question to its cluster (creating one if no cluster is similar enough) and counts its phrasing.
+
+        :param question (str): The question as asked (stripped and lowercased).
+        :return (tuple): Key of the cluster and the key of a cluster evicted to make room (or None).
+        """
+        normalized = normalize_question(question) or question
+        evicted = None
+
+        key = self._keys.get(normalized)
+        cluster = self.clusters.get(key) if key is not None else None
+
+        if cluster is None:
+            signature = self._signature(normalized)
+            cluster = self._find(signature)
+
+            if cluster is None:
+                cluster, evicted = self._create(normalized, signature)
+            else:
+                self.merged += 1
+
+            self._keys[normalized] = cluster.key
+            if len(self._keys) > 4 * self.max_clusters:
+                self._keys.popitem(last=False)
+        else:
+            self._keys.move_to_end(normalized)
+
+        self.clusters.move_to_end(cluster.key)
+        self._count_phrasing(cluster, question)
+
+        return cluster.key, evicted
+
+
+    def _count_phrasing(self, cluster, question):
+        """
+        Counts the phrasing in the cluster, when the phrasings are full the least frequent one is replaced and its count inherited.
+
+        :param cluster (_Cluster): The cluster.
+        :param question (str): The phrasing.
+        """
+        phrasings = cluster.phrasings
+
+        if question not in phrasings and len(phrasings) >= self.max_phrasings:
+            least, count = min(phrasings.items(), key=lambda item: item[1])
+            del phrasings[least]
+            phrasings[question] = count
+
+        phrasings[question] += 1
+
+
+    def seed(self, key, representative):
+        """
+        Restores a cluster saved under its key with its representative phrasing.
+
+        :param key (str): Key of the cluster.
+        :param representative (str): The representative phrasing.
+        """
+        if key in self.clusters:
+            return
+
+        cluster, _ = self._create(key, self._signature(key))
+        cluster.phrasings[representative] += 1
+        self._keys[key] = key
+
+
+    def representative(self, key):
+        """
+        Returns the most frequent phrasing of the cluster.
+
+        :param key (str): Key of the cluster.
+        :return (str): The representative phrasing, the key itself for an unknown cluster.
+        """
+        cluster = self.clusters.get(key)
+        if cluster is None or not cluster.phrasings:
+            return key
+
+        return cluster.phrasings.most_common(1)[0][0]
+
+
+    def stats(self):
+        """
+        Returns the clustering counters.
+
+        :return (dict): Number of clusters, questions merged into an existing cluster by similarity and evicted clusters.
+        """
+        return {
+            "clusters": len(self.clusters),
+            "merged": self.merged,
+            "evicted": self.evicted
+        }
@@ -0,0 +1,148 @@
+import threading
+import time
+
+from collections import OrderedDict
+
+class TokenBucket:
+    """
+    Token bucket allowing `rate` actions per second on average with bursts of up to `burst` actions.
+    """
+
+    __slots__ = ("rate", "burst", "clock", "tokens", "updated")
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        """
+        Initializes the TokenBucket instance.
+
+        :param rate (float): Number of tokens added per second.
+        :param burst (float): Capacity of the bucket, the bucket starts full.
+        :param clock (callable): Function returning the current time in seconds.
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError("Rychlost musí být kladná a kapacita alespoň 1!")
+
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+
+        self.tokens = float(burst)
+        self.updated = clock()
+
+
+    def _refill(self):
+        """
+        Adds the tokens accumulated since the last update.
+        """
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+    def try_acquire(self, amount=1):
+        """
+        Takes the tokens if there are enough of them.
+
+        :param amount (float): Number of tokens to take.
+        :return (bool): True if the tokens were taken.
+        """
+        self._refill()
+
+        if self.tokens < amount:
+            return False
+
+        self.tokens -= amount
+        return True
+
+
+    def retry_after(self, amount=1):
+        """
+        Returns the number of seconds until the tokens are available.
+
+        :param amount (float): Number of tokens.
+        :return (float): The waiting time, 0 if they are available now.
+        """
+        self._refill()
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+
+class RateLimiter:
+    """
+    Token buckets of many keys (e.g. user IDs), the least recently used buckets are dropped when there are more than `max_keys` of them.
+
+    A dropped bucket would be full by now in most cases, so dropping it only forgets a little of the recent history.
+    """
+
+    def __init__(self, rate, burst, max_keys=10000, clock=time.monotonic):
+        """
+        Initializes the RateLimiter instance.
+
+        :param rate (float): Number of actions allowed per key per second on average.
+        :param burst (float): Number of actions allowed per key at once.
+        :param max_keys (int): Maximum number of tracked keys.
+        :param clock (callable): Function returning the current time in seconds.
+        """
+        if type(max_keys) != int or max_keys < 1:
+            raise ValueError("Maximální počet klíčů musí být kladné celé číslo!")
+
+        # Validates the parameters before any bucket is created
+        TokenBucket(rate, burst, clock)
+
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.clock = clock
+
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.allowed = 0
+        self.limited = 0
+
+
+    def _bucket(self, key):
+        """
+        Returns the bucket of the key, creating it if needed, the caller must hold the lock.
+        """
+        bucket = self._buckets.get(key)
+
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst, self.clock)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+
+        return bucket
+
+
+    def acquire(self, key, amount=1):
+        """
+        Takes the tokens from the bucket of the key.
+
+        :param key (hashable): The key.
+        :param amount (float): Number of tokens to take.
+        :return (float): 0 if the action is allowed, otherwise the number of seconds to wait before retrying.
+        """
+        with self._lock:
+            bucket = self._bucket(key)
+
+            if bucket.try_acquire(amount):
+                self.allowed += 1
+                return 0.0
+
+            self.limited += 1
+            return bucket.retry_after(amount)
+
+
+    def stats(self):
+        """
+        Returns the limiter counters.
+
+        :return (dict): Number of tracked keys, allowed and limited actions.
+        """
+        return {
+            "keys": len(self._buckets),
+            "allowed": self.allowed,
+            "limited": self.limited
+        }
@@ -1,41 +1,399 @@
+import asyncio
 import openai
 import json
+import logging
+
+from answer_cache import AnswerCache, normalize_question
+from fair_scheduler import FairScheduler, current_flow
+from metrics import Metrics
+from single_flight import SingleFlight
+
+log = logging.getLogger(__name__)
+
+# Answer returned when the OpenAI API fails, it is neither cached nor remembered in the conversation
+ERROR_ANSWER = "Omlouvám se, došlo k chybě při získávání odpovědi."
+
+
+class StreamInterrupted(Exception):
+    """
+    Raised when the streamed answer fails after some of its parts were already yielded, so the answer is incomplete.
+    """
 
 class ResponseLogic:
     """
     Class that processes answers dynamically using the OpenAI API.
     """
 
-    def __init__(self, config_file):
+    def __init__(self, config_file, cache=None, index=None):
         """
         Initializes the ResponseLogic instance.
-        
+
         :param config_file (str): Path to the JSON configuration file containing server settings
+        :param cache (AnswerCache): Cache of answers shared with other worker processes (a manager proxy), optional.
+        :param index (RetrievalIndex): Index of curated answers used before the OpenAI API, optional.
         """
         self.config = config_file
         openai.api_key = self.config["openai_api_key"]
 
+        self.max_concurrency = self.config.get("ai_max_concurrency", 16)
+        self.timeout = self.config.get("ai_timeout", 30)
+
+        # Every call on the shared cache is a round trip to the manager process, so it is kept off the event loop
+        # behind a local cache of this worker, answers found there are copied into the local one
+        self.cache = AnswerCache(max_size=self.config.get("cache_size", 1000), ttl=self.config.get("cache_ttl", 3600))
+        self.shared_cache = cache
+
+        # Writes to the shared cache in flight, they are not awaited by the sessions
+        self._replications = set()
+
+        self.index = index
+        self.retrieval_threshold = self.config.get("retrieval_threshold", 0.8)
+
+        self.single_flight = SingleFlight()
+
+        # Upstream requests of the sessions take turns for the `ai_max_concurrency` slots
+        self.scheduler = FairScheduler(self.max_concurrency)
+
+        self._async_client = None
+
+
+    def reconfigured(self, config, index=None):
+        """
+        Returns a new instance with the configuration, the state not depending on the changed keys is shared with this instance.
+
+        The cached answers are kept, they are cleared on their first lookup only if the prompt or model changed (see `AnswerCache.set_context`).
+        Requests in flight finish on this instance, the concurrency limit is kept across both instances unless `ai_max_concurrency` changed.
+
+        :param config (dict): The new configuration.
+        :param index (RetrievalIndex): Index of curated answers of the new instance, optional.
+        :return (ResponseLogic): The new instance.
+        """
+        changed = lambda *keys: any(config.get(key) != self.config.get(key) for key in keys)
+
+        logic = ResponseLogic(config, cache=self.shared_cache, index=index)
+
+        if not changed("cache_size", "cache_ttl"):
+            logic.cache = self.cache
+
+        if not changed("ai_max_concurrency"):
+            logic.scheduler = self.scheduler
+
+        if not changed("openai_api_key", "ai_prompt", "ai_model"):
+            logic.single_flight = self.single_flight
+
+        if not changed("openai_api_key", "ai_timeout"):
+            logic._async_client = self._async_client
+
+        return logic
+
+
+    def _build_messages(self, question, history=None):
+        """
+        Builds the chat messages sent to the OpenAI API for the given question.
+
+        :param question (str): The user's question to be answered.
+        :param history (list): Messages of the previous conversation, see `Conversation.messages`, optional.
+        :return (list): Messages for the chat completion request.
+        """
+        prompt = self.config["ai_prompt"] + f"User question: {question}"
+
+        return [
+            {"role": "system", "content": prompt},
+            *(history or ()),
+            {"role": "user", "content": question}
+        ]
 
-    def get_answer(self, question):
+
+    def _get_local_answer(self, question, history=None):
+        """
+        Returns a curated answer from the retrieval index or a cached answer, the cache is cleared first if the prompt or model changed.
+
+        Both hold answers independent of any conversation, so neither is used for a question asked with history
+        (a follow-up like "a kdy končí?" means something else in every conversation). The caller sends a question
+        that does not depend on the conversation (e.g. a FAQ picked by its number) without history to use them.
+
+        :param question (str): The user's question.
+        :param history (list): Messages of the previous conversation, optional.
+        :return (str | None): The local answer or None if the OpenAI API has to be called.
+        """
+        if history:
+            return None
+
+        if self.index is not None:
+            curated_answer = self.index.lookup(question, self.retrieval_threshold)
+            if curated_answer is not None:
+                return curated_answer
+
+        self.cache.set_context(self._cache_context())
+        return self.cache.get(question)
+
+
+    def _cache_context(self):
+        """
+        Returns the context of the cached answers, they are valid only for the prompt and model they were generated with.
+
+        :return (tuple): The prompt and the model.
+        """
+        return (self.config["ai_prompt"], self.config["ai_model"])
+
+
+    async def _get_shared_answer(self, question):
+        """
+        Returns the answer cached by another worker process and keeps it in the local cache.
+
+        The lookup runs in a thread, so the event loop is not blocked by the round trip to the manager process.
+
+        :param question (str): The user's question.
+        :return (str | None): The shared answer or None if there is no shared cache or the answer is missing.
+        """
+        if self.shared_cache is None:
+            return None
+
+        context = self._cache_context()
+
+        def lookup():
+            self.shared_cache.set_context(context)
+            return self.shared_cache.get(question)
+
+        try:
+            answer = await asyncio.to_thread(lookup)
+        except Exception as e:
+            log.warning("Sdílená cache odpovědí není dostupná: %s", e)
+            return None
+
+        if answer is not None:
+            self.cache.put(question, answer)
+        return answer
+
+
+    def _cache_answer(self, question, answer):
+        """
+        Caches the answer locally and replicates it to the shared cache in the background.
+
+        :param question (str): The user's question.
+        :param answer (str): The answer generated without conversation history.
+        """
+        self.cache.put(question, answer)
+
+        if self.shared_cache is None:
+            return
+
+        context = self._cache_context()
+
+        def replicate():
+            self.shared_cache.set_context(context)
+            self.shared_cache.put(question, answer)
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Called from the synchronous API, there is no event loop to block
+            replicate()
+            return
+
+        task = asyncio.create_task(asyncio.to_thread(replicate))
+        self._replications.add(task)
+        task.add_done_callback(self._replicated)
+
+
+    def _replicated(self, task):
+        """
+        Forgets a finished write to the shared cache and reports its failure.
+
+        :param task (asyncio.Task): The finished write.
+        """
+        self._replications.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.warning("Odpověď nebyla uložena do sdílené cache: %s", task.exception())
+
+
+    @Metrics.shared().timed("get_answer")
+    def get_answer(self, question, history=None):
         """
         Retrieves an answer from the OpenAI API based on the user's question.
 
         :param question (str): The user's question to be answered.
-        
+        :param history (list): Messages of the previous conversation, optional.
+
         :return: Opeanai response / error.
         """
-        prompt = self.config["ai_prompt"] + f"User question: {question}"
+        local_answer = self._get_local_answer(question, history)
+        if local_answer is not None:
+            return local_answer
 
         try:
             response = openai.chat.completions.create (
                 model=self.config["ai_model"],
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": question}
-                ],
+                messages=self._build_messages(question, history),
                 max_tokens=500
             )
-            return response.choices[0].message.content
+            answer = response.choices[0].message.content
+        except Exception as e:
+            log.error("Chyba při volání OpenAI API: %s", e)
+            return ERROR_ANSWER
+
+        if not history:
+            self._cache_answer(question, answer)
+        return answer
+
+
+    def _get_async_client(self):
+        """
+        Returns the shared asynchronous OpenAI client, creating it on first use.
+
+        :return (openai.AsyncOpenAI): The shared client.
+        """
+        if self._async_client is None:
+            self._async_client = openai.AsyncOpenAI(api_key=self.config["openai_api_key"], timeout=self.timeout)
+        return self._async_client
+
+
+    def _upstream_slot(self):
+        """
+        Returns the context manager holding one of the `ai_max_concurrency` upstream slots, granted to the flows in round-robin order.
+
+        The flow is set by the session (see `Session.flow`), so all sessions of one user take a single turn.
+
+        :return (contextlib.AbstractAsyncContextManager): The slot of the current flow.
+        """
+        return self.scheduler.slot(current_flow.get())
+
+
+    @Metrics.shared().timed("upstream")
+    async def _complete(self, question, history=None):
+        """
+        Requests the whole answer from the OpenAI API and caches it if it was asked without history.
+
+        :param question (str): The user's question to be answered.
+        :param history (list): Messages of the previous conversation, optional.
+        :return (str): The answer.
+        :raises Exception: If the request fails or times out.
+        """
+        async with self._upstream_slot():
+            response = await asyncio.wait_for(
+                self._get_async_client().chat.completions.create(
+                    model=self.config["ai_model"],
+                    messages=self._build_messages(question, history),
+                    max_tokens=500
+                ),
+                timeout=self.timeout
+            )
+
+        answer = response.choices[0].message.content
+        if not history:
+            self._cache_answer(question, answer)
+        return answer
+
+
+    @Metrics.shared().timed("upstream")
+    async def _stream_completion(self, question, history=None):
+        """
+        Streams the answer from the OpenAI API and caches it once complete if it was asked without history.
+
+        :param question (str): The user's question to be answered.
+        :param history (list): Messages of the previous conversation, optional.
+        :return: Async generator of answer parts.
+        :raises Exception: If the request fails or waiting for a part times out.
+        """
+        parts = []
+
+        async with self._upstream_slot():
+            stream = await asyncio.wait_for(
+                self._get_async_client().chat.completions.create(
+                    model=self.config["ai_model"],
+                    messages=self._build_messages(question, history),
+                    max_tokens=500,
+                    stream=True
+                ),
+                timeout=self.timeout
+            )
+
+            chunks = aiter(stream)
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(anext(chunks), timeout=self.timeout)
+                except StopAsyncIteration:
+                    break
+
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+
+        if not history:
+            self._cache_answer(question, "".join(parts))
+
+
+    @Metrics.shared().timed("get_answer_async")
+    async def get_answer_async(self, question, history=None):
+        """
+        Retrieves an answer from the OpenAI API without blocking the event loop.
+
+        At most `ai_max_concurrency` requests are in flight at once, the waiting sessions take turns, and each request is cancelled after `ai_timeout` seconds.
+        Concurrent identical questions without history share one request.
+
+        :param question (str): The user's question to be answered.
+        :param history (list): Messages of the previous conversation, optional.
+
+        :return: Opeanai response / error.
+        """
+        local_answer = self._get_local_answer(question, history)
+        if local_answer is None and not history:
+            local_answer = await self._get_shared_answer(question)
+        if local_answer is not None:
+            return local_answer
+
+        try:
+            if history:
+                return await self._complete(question, history)
+            return await self.single_flight.do(normalize_question(question), lambda: self._complete(question))
+        except asyncio.TimeoutError:
+            log.warning("Vypršel časový limit volání OpenAI API (%s s).", self.timeout)
+            return ERROR_ANSWER
+        except Exception as e:
+            log.error("Chyba při volání OpenAI API: %s", e)
+            return ERROR_ANSWER
+
+
+    async def stream_answer(self, question, history=None):
+        """
+        Streams the answer from the OpenAI API as it is generated.
+
+        Local (curated or cached) answers are yielded at once. Waiting for any part of the stream is limited by `ai_timeout`.
+        Concurrent identical questions without history share one stream.
+
+        :param question (str): The user's question to be answered.
+        :param history (list): Messages of the previous conversation, optional.
+
+        :return: Async generator of answer parts / error.
+        :raises StreamInterrupted: If the stream fails after some parts were yielded.
+        """
+        local_answer = self._get_local_answer(question, history)
+        if local_answer is None and not history:
+            local_answer = await self._get_shared_answer(question)
+        if local_answer is not None:
+            yield local_answer
+            return
+
+        streamed = False
+
+        if history:
+            stream = self._stream_completion(question, history)
+        else:
+            stream = self.single_flight.stream(normalize_question(question), lambda: self._stream_completion(question))
+
+        try:
+            async for delta in stream:
+                streamed = True
+                yield delta
+
+        except asyncio.TimeoutError as e:
+            log.warning("Vypršel časový limit volání OpenAI API (%s s).", self.timeout)
+            if streamed:
+                raise StreamInterrupted("Vypršel časový limit streamované odpovědi.") from e
+            yield ERROR_ANSWER
         except Exception as e:
-            print(f"Chyba při volání OpenAI API: {e}")  
-            return "Omlouvám se, došlo k chybě při získávání odpovědi."
\ No newline at end of file
+            log.error("Chyba při volání OpenAI API: %s", e)
+            if streamed:
+                raise StreamInterrupted(f"Streamovaná odpověď selhala: {e}") from e
+            yield ERROR_ANSWER
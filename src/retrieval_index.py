@@ -0,0 +1,135 @@
+import json
+import math
+import numpy as np
+
+from collections import Counter
+
+from answer_cache import normalize_question
+
+class RetrievalIndex:
+    """
+    In-memory TF-IDF index over character n-grams of curated question/answer pairs.
+    """
+
+    def __init__(self, pairs, ngram_size=3):
+        """
+        Initializes the RetrievalIndex instance and builds the TF-IDF matrix.
+
+        :param pairs (list): List of (question, answer) tuples.
+        :param ngram_size (int): Length of the character n-grams.
+        """
+        if type(ngram_size) != int or ngram_size < 1:
+            raise ValueError("Délka n-gramů musí být kladné celé číslo!")
+
+        self.ngram_size = ngram_size
+        self.questions = [question for question, _ in pairs]
+        self.answers = [answer for _, answer in pairs]
+
+        documents = [Counter(self._ngrams(question)) for question in self.questions]
+
+        self.vocabulary = {}
+        document_frequency = Counter()
+        for ngrams in documents:
+            for ngram in ngrams:
+                self.vocabulary.setdefault(ngram, len(self.vocabulary))
+            document_frequency.update(ngrams.keys())
+
+        self.idf = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for ngram, column in self.vocabulary.items():
+            self.idf[column] = math.log((1 + len(documents)) / (1 + document_frequency[ngram])) + 1
+
+        # Weight of the n-grams of a question missing in all curated questions (document frequency 0)
+        self.oov_idf = math.log(1 + len(documents)) + 1
+
+        self.matrix = np.zeros((len(documents), len(self.vocabulary)), dtype=np.float32)
+        for row, ngrams in enumerate(documents):
+            for ngram, count in ngrams.items():
+                column = self.vocabulary[ngram]
+                self.matrix[row, column] = count * self.idf[column]
+
+        norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        self.matrix /= norms
+
+
+    @classmethod
+    def from_jsonl(cls, data_file, ngram_size=3):
+        """
+        Builds the index from a JSONL file in the OpenAI fine-tuning format (`{"messages": [...]}` per line).
+
+        :param data_file (str): Path to the training data file.
+        :param ngram_size (int): Length of the character n-grams.
+        :return (RetrievalIndex): The built index.
+        """
+        pairs = []
+
+        with open(data_file, "r", encoding="UTF-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+
+                messages = json.loads(line)["messages"]
+                question = next((m["content"] for m in messages if m["role"] == "user"), None)
+                answer = next((m["content"] for m in messages if m["role"] == "assistant"), None)
+
+                if question and answer:
+                    pairs.append((question, answer))
+
+        return cls(pairs, ngram_size=ngram_size)
+
+
+    def _ngrams(self, text):
+        """
+        Splits the normalized text into character n-grams, word boundaries are marked with spaces.
+
+        :param text (str): Text to split.
+        :return (list): The n-grams.
+        """
+        text = f" {normalize_question(text)} "
+        return [text[i:i + self.ngram_size] for i in range(len(text) - self.ngram_size + 1)]
+
+
+    def search(self, question, top_k=1):
+        """
+        Finds the curated questions most similar to the given one.
+
+        :param question (str): The user's question.
+        :param top_k (int): Number of results to return.
+        :return (list): List of (score, question, answer) tuples ordered by cosine similarity.
+        """
+        counts = Counter(self._ngrams(question))
+        known = {ngram: count for ngram, count in counts.items() if ngram in self.vocabulary}
+        if not known or not self.questions:
+            return []
+
+        columns = np.fromiter((self.vocabulary[ngram] for ngram in known), dtype=np.intp, count=len(known))
+        weights = np.fromiter(known.values(), dtype=np.float32, count=len(known)) * self.idf[columns]
+
+        # The n-grams missing in the vocabulary do not contribute to the dot product, but they make the question
+        # less similar, so they count in its norm (otherwise "Kdy začíná výuka v Brně?" would match "Kdy začíná výuka?")
+        unknown = sum(count * count for ngram, count in counts.items() if ngram not in known) * self.oov_idf ** 2
+        norm = math.sqrt(float(weights @ weights) + unknown)
+
+        # Only the columns of n-grams present in the question contribute to the dot product
+        scores = self.matrix[:, columns] @ weights / norm
+
+        top_k = min(top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+
+        return [(float(scores[row]), self.questions[row], self.answers[row]) for row in best]
+
+
+    def lookup(self, question, threshold):
+        """
+        Returns the curated answer if the best match is at least as similar as the threshold.
+
+        :param question (str): The user's question.
+        :param threshold (float): Minimal cosine similarity of the match.
+        :return (str | None): The curated answer or None.
+        """
+        results = self.search(question, top_k=1)
+
+        if results and results[0][0] >= threshold:
+            return results[0][2]
+        return None
@@ -1,31 +1,146 @@
 import asyncio
 import json
-import re
+import logging
+import signal
+
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
 
-from threading import Thread
-from flask import Flask, request, jsonify
-from flask_cors import CORS
 from websockets import serve
 
+from app_logging import setup_logging
+from auth_tokens import InvalidTokenError, TokenSigner
+from config_watcher import ConfigWatcher
 from session import Session
+from session_registry import SessionRegistry
+from http_server import HttpServer
+from log_manager import LogManager
+from metrics import Metrics
+from rate_limit import RateLimiter
 from response_logic import ResponseLogic
+from retrieval_index import RetrievalIndex
+from wire_format import compression_extensions, select_subprotocol
+
+from db.hashing import PasswordHasher
+
+log = logging.getLogger(__name__)
+
+# Keys applied only when the server starts, a change of them is reported on reload (the other keys are applied by `apply_config`)
+RESTART_KEYS = (
+    "host", "port", "workers", "worker_restart_delay",
+    "http_host", "http_port", "http_workers", "http_keep_alive_timeout", "http_request_timeout", "http_max_requests_per_connection",
+    "http_max_connections", "http_max_body_size", "http_max_headers", "http_allowed_origin",
+    "log_batch_size", "log_flush_interval", "log_queue_size", "log_fsync", "log_analysis_interval", "log_format",
+    "log_state_max_questions", "log_state_save_interval",
+    "faq_top_k", "faq_ranking", "faq_window_hours", "faq_half_life_hours", "faq_clustering", "faq_max_clusters", "faq_cluster_threshold",
+    "bcrypt_rounds", "bcrypt_workers", "bcrypt_max_pending", "bcrypt_timeout",
+    "ws_compression", "ws_deflate_window_bits", "ws_deflate_mem_level", "ws_deflate_min_size",
+    "session_resume_ttl", "session_max_detached", "metrics_lag_interval", "config_watch",
+)
+
+# Keys of the token signer, it is rebuilt only when one of them changed (a signer without keys has a random one)
+AUTH_KEYS = ("auth_keys", "auth_active_key", "auth_token_ttl")
+
+# Keys of the logging setup
+LOGGING_KEYS = ("log_level", "log_json", "log_debug_rate")
+
+def create_log_manager(config, shared_state=None):
+    """
+    Create the LogManager configured by the log_* keys of the configuration.
+
+    :param config (dict): Server configuration.
+    :param shared_state (SharedState): State published by the supervisor, optional.
+    :returns (LogManager): The log manager.
+    """
+    return LogManager(
+        batch_size=config.get("log_batch_size", 100),
+        flush_interval=config.get("log_flush_interval", 0.05),
+        queue_size=config.get("log_queue_size", 10000),
+        fsync=config.get("log_fsync", "never"),
+        analysis_interval=config.get("log_analysis_interval", 5),
+        shared_state=shared_state,
+        log_format=config.get("log_format", "text"),
+        top_k=config.get("faq_top_k", 3),
+        ranking=config.get("faq_ranking", "all"),
+        window_hours=config.get("faq_window_hours", 24),
+        half_life_hours=config.get("faq_half_life_hours", 24),
+        clustering=config.get("faq_clustering", False),
+        max_clusters=config.get("faq_max_clusters", 10000),
+        cluster_threshold=config.get("faq_cluster_threshold", 0.6),
+        state_max_questions=config.get("log_state_max_questions", 1000),
+        state_save_interval=config.get("log_state_save_interval", 30),
+    )
 
-from db.utils import verify_password, hash_password
-from db.queries import get_user_by_username, create_user
 
 class WebSocketServer:
     """
     WebSocket server for handling communication with users.
     """
 
-    def __init__(self, config_file):
+    def __init__(self, config_file, cache=None, shared_state=None):
         """
         Initialize the WebSocket server.
 
         :param config_file (str): Path to the configuration file.
+        :param cache (AnswerCache): Answer cache shared with the other worker processes, optional.
+        :param shared_state (SharedState): State published by the supervisor, optional.
         """
         self.config = self._load_config(config_file)
-        self.logic = ResponseLogic(self.config)
+        setup_logging(
+            level=self.config.get("log_level", "INFO"),
+            json_output=self.config.get("log_json", False),
+            debug_rate=self.config.get("log_debug_rate", 10),
+        )
+
+        self.index = self._load_index(self.config.get("training_data_file", "../data/training_data.jsonl"))
+        self.logic = ResponseLogic(self.config, cache=cache, index=self.index)
+        self.logger = create_log_manager(self.config, shared_state)
+        self.user_limiter = self._create_user_limiter(self.config)
+        self.password_hasher = PasswordHasher(
+            rounds=self.config.get("bcrypt_rounds", 12),
+            workers=self.config.get("bcrypt_workers", 2),
+            max_pending=self.config.get("bcrypt_max_pending", 32),
+            timeout=self.config.get("bcrypt_timeout", 10),
+        )
+
+        self.registry = None
+        if self.config.get("session_resume_ttl", 120):
+            self.registry = SessionRegistry(
+                ttl=self.config.get("session_resume_ttl", 120),
+                max_detached=self.config.get("session_max_detached", 1000),
+            )
+
+        self.metrics = Metrics.shared()
+        self.metrics.sample_rate = self.config.get("metrics_sample_rate", 0.1)
+        self.metrics.register_collector("answer_cache", lambda: self.logic.cache.stats())
+        self.metrics.register_collector("single_flight", lambda: self.logic.single_flight.stats())
+        self.metrics.register_collector("log_analysis", lambda: self.logger.analysis_stats())
+        self.metrics.register_collector("upstream_scheduler", lambda: self.logic.scheduler.stats())
+        self.metrics.register_collector("user_rate_limit", lambda: self.user_limiter.stats() if self.user_limiter is not None else {})
+        if self.registry is not None:
+            self.metrics.register_collector("session_registry", lambda: self.registry.stats())
+
+        self.token_signer = TokenSigner.from_config(self.config)
+        self.auth_required = self.config.get("auth_required", False)
+
+        self.http_server = HttpServer(self.config, self.password_hasher, self.metrics, self.token_signer)
+
+        # Per-message deflate tuned by the ws_* keys, the frames are encoded in the format negotiated by the client
+        self.extensions = compression_extensions(self.config)
+
+        # Changes of the configuration file are applied to the running sessions, see `apply_config`
+        self.config_watcher = ConfigWatcher(
+            config_file,
+            self.config,
+            self.apply_config,
+            interval=self.config.get("config_watch_interval", 1.0),
+        )
+        self.metrics.register_collector("config_reload", lambda: self.config_watcher.stats())
+
+        self.drain_timeout = self.config.get("worker_drain_timeout", 30)
+        self.sessions = set()
+        self._server = None
+        self._drain_task = None
 
 
     def _load_config(self, config_file):
@@ -43,133 +158,284 @@ class WebSocketServer:
             raise ValueError(f"Error loading config: {e}")
 
 
-    async def handle_client(self, websocket):
+    def _create_user_limiter(self, config):
         """
-        Handle WebSocket client connection.
+        Create the rate limiter of the logged-in users configured by the rate_limit_user_* keys.
 
-        :param websocket (WebSocket): WebSocket connection object.
+        :param config (dict): Server configuration.
+        :returns (RateLimiter): The limiter, or None if the limit is disabled.
         """
-        session = Session(websocket, self.logic)
-        await session.handle_session()
+        if not config.get("rate_limit_user_rate", 2):
+            return None
 
+        return RateLimiter(
+            rate=config.get("rate_limit_user_rate", 2),
+            burst=config.get("rate_limit_user_burst", 10),
+        )
 
-    async def run(self):
+
+    def _load_index(self, data_file):
         """
-        Start WebSocket server.
+        Build the retrieval index of curated answers.
 
-        :raises Exception: If the server fails to start.
+        :param data_file (str): Path to the training data file.
+        :returns (RetrievalIndex): The index, or None if the data cannot be loaded.
         """
-        server = await serve(
-            self.handle_client,
-            self.config["host"],
-            self.config["port"],
-            ping_interval=60,
-            ping_timeout=30,
-        )
-        print(f"WebSocket server started at ws://{self.config['host']}:{self.config['port']}")
-        await server.wait_closed()
+        try:
+            index = RetrievalIndex.from_jsonl(data_file)
+            log.info("Retrieval index loaded with %s curated answers.", len(index.questions))
+            return index
+        except Exception as e:
+            log.warning("Retrieval index is disabled, error loading training data: %s", e)
+            return None
 
 
-# Flask HTTP server
-app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}})
+    def apply_config(self, config):
+        """
+        Swap a ResponseLogic built from the new configuration into the server and all its sessions at once.
 
+        The swap happens between two steps of the event loop, so every message is answered by either the old or the new logic.
+        The answer cache and the retrieval index are kept unless the keys they depend on changed.
+        The token signer (auth_* keys), the limiter of the users, the logging setup and the metrics settings are replaced as well,
+        the session settings (session rate limit, conversation, replay buffer) apply to new sessions.
+        A change of the `RESTART_KEYS` is reported, they are applied after a restart.
 
-@app.route("/register", methods=["POST"])
-def register():
-    """
-    Handle user registration.
+        :param config (dict): The new validated configuration.
+        :raises ValueError: If the configuration cannot be applied, the current one stays in use.
+        """
+        changed = lambda *keys: any(config.get(key) != self.config.get(key) for key in keys)
 
-    :returns (Response): JSON response with a success message or an error.
-    """
-    data = request.json
-    
-    print(data)
-    
-    username = data.get("username")
-    password = data.get("password")
-
-    if not username or not password:
-        return jsonify({"error": "Email and password are required"}), 400
-
-    if not is_valid_password(password):
-        return jsonify({"error": (
-            "Password must have at least 1 number, 1 special character, "
-            "1 uppercase letter, 1 lowercase letter, and be at least 8 characters long."
-        )}), 400
+        index = self.index
+        data_file = config.get("training_data_file", "../data/training_data.jsonl")
+        if data_file != self.config.get("training_data_file", "../data/training_data.jsonl"):
+            index = self._load_index(data_file)
 
-    try:
-        password_hash = hash_password(password)
-        
-        create_user(username, password_hash)
+        # Everything is built before anything is replaced, so an invalid configuration changes nothing
+        try:
+            logic = self.logic.reconfigured(config, index=index)
+            token_signer = TokenSigner.from_config(config) if changed(*AUTH_KEYS) else self.token_signer
+            user_limiter = self._create_user_limiter(config) if changed("rate_limit_user_rate", "rate_limit_user_burst") else self.user_limiter
+            watch_interval = config.get("config_watch_interval", 1.0)
+            sample_rate = config.get("metrics_sample_rate", 0.1)
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Error applying the configuration: {e}")
+
+        level = config.get("log_level", "INFO")
+        if not isinstance(level, str) or level.upper() not in logging.getLevelNamesMapping():
+            raise ValueError(f"Neznámá úroveň logování '{level}'!")
+
+        if not isinstance(watch_interval, (int, float)) or watch_interval <= 0:
+            raise ValueError("Interval kontroly konfigurace musí být kladný!")
+
+        if not isinstance(sample_rate, (int, float)) or not 0 <= sample_rate <= 1:
+            raise ValueError("Vzorkovací poměr metrik musí být v rozsahu 0 až 1!")
+
+        for key in RESTART_KEYS:
+            if changed(key):
+                log.warning("Configuration key %s changed, it is applied after a restart.", key)
+
+        if changed(*LOGGING_KEYS):
+            setup_logging(
+                level=level,
+                json_output=config.get("log_json", False),
+                debug_rate=config.get("log_debug_rate", 10),
+            )
+
+        self.token_signer = token_signer
+        self.http_server.token_signer = token_signer
+        self.auth_required = config.get("auth_required", False)
+        self.http_server.metrics_token = config.get("metrics_token") or None
+        self.metrics.sample_rate = sample_rate
+        self.config_watcher.interval = watch_interval
+        self.drain_timeout = config.get("worker_drain_timeout", 30)
+        self.user_limiter = user_limiter
+
+        self.config = config
+        self.index = index
+        self.logic = logic
+
+        for session in self.sessions:
+            session.logic = logic
+            session.user_limiter = user_limiter
+
+        log.info("Response logic replaced in %s sessions.", len(self.sessions))
+
+
+    def process_request(self, connection, request):
+        """
+        Authenticate the WebSocket handshake by the signed token from /login, before any session is allocated.
 
-        print(f"User registered successfully: {username}")  
-        return jsonify({"message": "User registered successfully!"}), 201
+        The token is taken from the `token` query parameter or the `Authorization: Bearer` header and verified without a database query.
+        Connections without a token are anonymous unless `auth_required` is set, connections with an invalid token are rejected.
 
-    except Exception as e:
-        print(f"Error during registration: {e}")
-        return jsonify({"error": "Registration failed. Email is might already taken."}), 400
+        :param connection (ServerConnection): The connection being opened.
+        :param request (Request): The handshake request.
+        :returns (Response): The rejection response, or None to accept the connection.
+        """
+        token = parse_qs(urlsplit(request.path).query).get("token", [None])[0]
 
+        authorization = request.headers.get("Authorization", "")
+        if token is None and authorization.startswith("Bearer "):
+            token = authorization[len("Bearer "):].strip()
 
-def is_valid_password(password):
-    """
-    Validate the password strength.
+        connection.user_id = None
 
-    :param password: The password to validate.
-    :return: True if the password meets the requirements, False otherwise.
-    """
-    if (
-        len(password) >= 8 and
-        re.search(r"[A-Z]", password) and  
-        re.search(r"[a-z]", password) and  
-        re.search(r"[0-9]", password) and  
-        re.search(r"[!@#$%^&*(),.?\":{}|<>]", password)  
-    ):
-        return True
-    return False
-
-
-@app.route("/login", methods=["POST"])
-def login():
-    """
-    Handle user login.
+        if token is None:
+            if self.auth_required:
+                return connection.respond(HTTPStatus.UNAUTHORIZED, "Přihlášení je vyžadováno.\n")
+            return None
 
-    :returns (Response): JSON response with a success message and token or an error.
-    """
-    data = request.json
-    username = data.get("username")
-    password = data.get("password")
+        try:
+            connection.user_id = self.token_signer.verify(token)
+        except InvalidTokenError as e:
+            log.info("WebSocket handshake rejected: %s", e)
+            return connection.respond(HTTPStatus.UNAUTHORIZED, "Neplatný nebo prošlý token.\n")
 
-    if not username or not password:
-        return jsonify({"error": "Username and password are required"}), 400
+        return None
 
-    try:
-        user = get_user_by_username(username)
-        if user is None or not verify_password(password, user["password_hash"]):
-            return jsonify({"error": "Invalid username or password"}), 401
 
-        return jsonify({"message": "Login successful!", "user_id": user["id"]}), 200
+    async def handle_client(self, websocket):
+        """
+        Handle WebSocket client connection.
 
-    except Exception as e:
-        print(f"Error during login: {e}")
-        return jsonify({"error": "An error occurred during login"}), 500
+        A client reconnecting with `?resume=<token>&received=<frames>` continues its session if it can still be resumed.
 
+        :param websocket (WebSocket): WebSocket connection object.
+        """
+        query = parse_qs(urlsplit(websocket.request.path).query) if getattr(websocket, "request", None) else {}
+        token = query.get("resume", [None])[0]
+        user_id = getattr(websocket, "user_id", None)
+
+        session = self.registry.claim(token, user_id) if self.registry is not None and token else None
+
+        if session is not None:
+            try:
+                received = int(query.get("received", ["0"])[0])
+            except ValueError:
+                received = 0
+
+            # The session may have been detached while the configuration changed
+            session.logic = self.logic
+            session.user_limiter = self.user_limiter
+
+            self.sessions.add(session)
+            try:
+                await session.resume(websocket, received)
+            except Exception:
+                # A closed connection detaches the session, it is forgotten only on an unexpected error
+                self.registry.remove(session)
+                raise
+            finally:
+                if session.websocket is websocket:
+                    self.sessions.discard(session)
+            return
+
+        session = Session(websocket, self.logic, self.logger, user_id=user_id, user_limiter=self.user_limiter, registry=self.registry,
+                          reload_config=self.config_watcher.check)
+        if self.registry is not None:
+            self.registry.register(session)
+
+        self.sessions.add(session)
+        try:
+            await session.handle_session()
+        except Exception:
+            if self.registry is not None:
+                self.registry.remove(session)
+            raise
+        finally:
+            if session.websocket is websocket:
+                self.sessions.discard(session)
 
-def run_flask():
-    """
-    Run the Flask HTTP server.
-    """
-    app.run(host="0.0.0.0", port=5000, debug=True, use_reloader=False)
 
+    async def drain(self):
+        """
+        Stop accepting connections and close the open sessions once their current messages are answered.
 
-if __name__ == "__main__":
-    # Start Flask server in a separate thread
-    flask_thread = Thread(target=run_flask)
-    flask_thread.start()
+        Sessions still open after `worker_drain_timeout` seconds are closed right away.
+        """
+        log.info("Draining %s sessions...", len(self.sessions))
+        self._server.close(close_connections=False)
+        await self.http_server.close()
+
+        await asyncio.gather(*(session.close_when_idle() for session in list(self.sessions)), return_exceptions=True)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(self._server.wait_closed()), self.drain_timeout)
+        except asyncio.TimeoutError:
+            log.warning("Closing %s sessions after the drain timeout.", len(self.sessions))
+            await asyncio.gather(*(session.websocket.close(1001) for session in list(self.sessions)), return_exceptions=True)
+
+
+    def _handle_sigterm(self):
+        """
+        Start draining the server on SIGTERM.
+        """
+        if self._drain_task is None:
+            self._drain_task = asyncio.create_task(self.drain())
+
+
+    async def run(self, reuse_port=False, ready=None):
+        """
+        Start WebSocket server together with the HTTP server for authentication on the same event loop.
+
+        The server drains its sessions and stops on SIGTERM.
+
+        :param reuse_port (bool): Whether to bind with SO_REUSEPORT, so that several worker processes share the port.
+        :param ready (multiprocessing.Event): Event set once the server is listening, optional.
+        :raises Exception: If the server fails to start.
+        """
+        await self.http_server.start(reuse_port=reuse_port)
+        self.metrics.start_lag_probe(self.config.get("metrics_lag_interval", 0.5))
+
+        follow_task = None
+        if self.logger.shared_state is not None:
+            follow_task = asyncio.create_task(self.logger.follow_shared_state())
 
-    # Start WebSocket server
+        watch_task = None
+        if self.config.get("config_watch", True):
+            watch_task = asyncio.create_task(self.config_watcher.run())
+
+        self._server = await serve(
+            self.handle_client,
+            self.config["host"],
+            self.config["port"],
+            process_request=self.process_request,
+            select_subprotocol=select_subprotocol,
+            extensions=self.extensions,
+            compression=None,
+            ping_interval=60,
+            ping_timeout=30,
+            reuse_port=reuse_port,
+        )
+        log.info("WebSocket server started at ws://%s:%s", self.config["host"], self.config["port"])
+
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, self._handle_sigterm)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+        if ready is not None:
+            ready.set()
+
+        try:
+            await self._server.wait_closed()
+            if self._drain_task is not None:
+                await self._drain_task
+        finally:
+            if follow_task is not None:
+                follow_task.cancel()
+            if watch_task is not None:
+                watch_task.cancel()
+            self.metrics.stop_lag_probe()
+            await self.http_server.close()
+            await self.logger.close()
+            self.password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    # Start WebSocket and HTTP server
     try:
         websocket_server = WebSocketServer(config_file="../config.json")
         asyncio.run(websocket_server.run())
     except KeyboardInterrupt:
-        print("\nServer terminated by user.")
\ No newline at end of file
+        log.info("Server terminated by user.")
\ No newline at end of file
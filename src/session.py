@@ -1,108 +1,452 @@
 import websockets
 import asyncio
-import json
+import logging
+import math
+import uuid
 
+from collections import deque
+
+from app_logging import correlation_id
+from conversation import Conversation
+from fair_scheduler import current_flow
 from log_manager import LogManager
-from response_logic import ResponseLogic
+from metrics import Metrics
+from rate_limit import TokenBucket
+from response_logic import ERROR_ANSWER, ResponseLogic, StreamInterrupted
+from wire_format import JSON, format_for
+
+log = logging.getLogger(__name__)
 
 class Session:
     """
     Handles a single WebSocket session with a client.
     """
 
-    def __init__(self, websocket, logic):
+    # Most asked questions and the serialized welcome frame shared by all sessions by the wire format, rebuilt only when the questions change
+    _welcome_frames = {}
+
+    def __init__(self, websocket, logic, logger=None, user_id=None, user_limiter=None, registry=None, reload_config=None):
         """
         Initializes new Session instance.
 
         :param websocket (websockets.WebSocketServerProtocol): WebSocket connection with the client.
         :param logic (ResponseLogic): An instance of ResponseLogic to generate answers for user input.
+        :param logger (LogManager): LogManager shared by all sessions, the process-wide instance is used if not provided.
+        :param user_id (int): ID of the logged-in user, None for anonymous sessions.
+        :param user_limiter (RateLimiter): Rate limiter of the messages of the logged-in users shared by all sessions, optional.
+        :param registry (SessionRegistry): Registry of the resumable sessions, the session cannot be resumed after a disconnection if not provided.
+        :param reload_config (callable): Function applying the changed configuration file for the "reload" command of the logged-in users (see `ConfigWatcher.check`), optional.
         """
-        if type(logic) != ResponseLogic:
+        if not isinstance(logic, ResponseLogic):
             raise TypeError("Parametr logic musí být instancí třídy ResponseLogic.")
         
         self.websocket = websocket
-        self.client_id = id(websocket)
+        # Format of the frames negotiated by the client (WebSocket subprotocol), JSON by default
+        self.wire_format = format_for(websocket)
+        # Correlation ID of the records logged while handling the session
+        self.client_id = uuid.uuid4().hex[:12]
         self.logic = logic
-        self.logger = LogManager()
+        self.logger = logger if logger is not None else LogManager.shared()
+
+        self.user_id = user_id
+        self.user_limiter = user_limiter
+
+        # Upstream requests of all sessions of one user share a turn of the scheduler, anonymous sessions get their own turn
+        # (keyed by the session rather than the address, so clients behind one NAT do not share a turn)
+        self.flow = ("user", user_id) if user_id is not None else ("session", self.client_id)
+        self.reload_config = reload_config
+
+        rate = logic.config.get("rate_limit_session_rate", 1)
+        self.rate_limit = TokenBucket(rate, logic.config.get("rate_limit_session_burst", 5)) if rate else None
+
+        # Previous turns sent with the questions, so that follow-up questions keep their context
+        max_tokens = logic.config.get("conversation_max_tokens", 1000)
+        self.conversation = Conversation(
+            max_tokens=max_tokens,
+            summary_tokens=logic.config.get("conversation_summary_tokens", 250),
+            max_turns=logic.config.get("conversation_max_turns", 4),
+        ) if max_tokens else None
+
+        # Frames not yet acknowledged by the client as (sequence number, data), replayed when the session is resumed.
+        # The sequence number of a frame is the number of frames sent before it, not counting the welcome and resumed frames.
+        self.registry = registry
+        self.token = registry.new_token() if registry is not None else None
+        self.replay_buffer = deque()
+        self.replay_bytes = 0
+        self.max_replay_bytes = logic.config.get("session_replay_bytes", 65536)
+        self.sent_frames = 0
+
+        self._send_lock = asyncio.Lock()
+        self._process_lock = asyncio.Lock()
+
+        self._close_task = None
+
+        self.busy = False
+        self.closing = False
+        self.ended = False
 
 
     async def handle_session(self):
         """
         Manages a WebSocket session with the client.
         """
-        print(f"\n > Uživatel ({self.client_id}) se připojil.")
-        
-        await self._welcome_message()
-        
+        # The handler runs in its own task, so the ID is set only for the records of this session
+        correlation_id.set(self.client_id)
+        current_flow.set(self.flow)
+        log.info("Uživatel se připojil.")
+
+        try:
+            await self._welcome_message()
+        except websockets.ConnectionClosed:
+            self._disconnected(self.websocket)
+            return
+
+        await self._serve(self.websocket)
+
+
+    async def resume(self, websocket, received):
+        """
+        Continues the session on a new connection, the frames the client did not receive are replayed first.
+
+        An answer still being generated for the session is sent to the new connection once it is replayed.
+        If the new connection negotiated another wire format, the replayed frames are converted to it.
+
+        :param websocket (websockets.WebSocketServerProtocol): The new connection.
+        :param received (int): Number of the frames of the session the client received.
+        """
+        correlation_id.set(self.client_id)
+        current_flow.set(self.flow)
+        previous = self.websocket
+
+        async with self._send_lock:
+            self.websocket = websocket
+
+            try:
+                frames = await self._replay(websocket, received)
+            except websockets.ConnectionClosed:
+                # The session was claimed, it has to be detached again to stay resumable and expire
+                self._disconnected(websocket)
+                return
+
+        log.info("Uživatel obnovil relaci, znovu odesláno %s zpráv.", len(frames))
+
+        if previous is not None and previous is not websocket:
+            # The client may reconnect before the server noticed the old connection dropped, the closing handshake
+            # of a dead connection waits for its timeout, so it does not delay the resumed session
+            self._close_task = asyncio.create_task(previous.close(1000, "Relace byla obnovena v jiném spojení."))
+
+        await self._serve(websocket)
+
+
+    async def _replay(self, websocket, received):
+        """
+        Sends the "resumed" frame and the frames the client did not receive to the new connection, called with the send lock held.
+
+        :param websocket (websockets.WebSocketServerProtocol): The new connection.
+        :param received (int): Number of the frames of the session the client received.
+        :return (list): The replayed frames.
+        :raises websockets.ConnectionClosed: If the new connection is closed meanwhile.
+        """
+        wire_format = format_for(websocket)
+        if wire_format is not self.wire_format:
+            self.replay_buffer = deque((seq, wire_format.encode(self.wire_format.decode(data))) for seq, data in self.replay_buffer)
+            self.replay_bytes = sum(len(data) for _, data in self.replay_buffer)
+            self.wire_format = wire_format
+
+        received = min(max(received, 0), self.sent_frames)
+        first_buffered = self.replay_buffer[0][0] if self.replay_buffer else self.sent_frames
+        frames = [data for seq, data in self.replay_buffer if seq >= received]
+
+        await websocket.send(wire_format.encode({
+            "type": "resumed",
+            "replayed": len(frames),
+            "missed": max(0, first_buffered - received)
+        }))
+        for data in frames:
+            await websocket.send(data)
+
+        return frames
+
+
+    async def _serve(self, websocket):
+        """
+        Answers the messages received on the connection until it is closed.
+
+        :param websocket (websockets.WebSocketServerProtocol): The connection.
+        """
         while True:
             try:
-                client_message = await self.websocket.recv()
-                await self._process_message(client_message)
+                client_message = await websocket.recv()
+
+                async with self._process_lock:
+                    self.busy = True
+                    try:
+                        # The client sends its next message once the previous answer arrived
+                        self._acknowledge()
+                        await self._process_message(client_message)
+                    finally:
+                        self.busy = False
+
+                if self.closing:
+                    await websocket.close(1001, "Server se restartuje.")
 
             except websockets.ConnectionClosed:
-                print(f"\n > Uživatel ({self.client_id}) se odpojil.")
+                self._disconnected(websocket)
                 break
             
-            except Exception as e:
-                print(f"Chyba: {e}")
+            except Exception:
+                log.exception("Chyba při zpracování zprávy.")
+                if self.registry is not None:
+                    self.registry.remove(self)
                 break
 
 
+    def _disconnected(self, websocket):
+        """
+        Detaches the session whose connection was closed, so that it can be resumed until the registry expires it.
+
+        :param websocket (websockets.WebSocketServerProtocol): The closed connection.
+        """
+        if websocket is not self.websocket:
+            # The session continues on a newer connection
+            return
+
+        if self.registry is not None and not self.ended:
+            self.registry.detach(self)
+            log.info("Uživatel se odpojil, relaci lze obnovit.")
+        else:
+            log.info("Uživatel se odpojil.")
+
+
+    async def _send(self, message):
+        """
+        Sends a frame to the client, the frames of a resumable session are kept in the replay buffer until acknowledged.
+
+        A resumable session keeps generating its answer when the connection drops, the frames are delivered when it is resumed.
+
+        :param message (dict): The message.
+        :raises websockets.ConnectionClosed: If the connection is closed and the session cannot be resumed.
+        """
+        data = self.wire_format.encode(message)
+
+        async with self._send_lock:
+            if self.registry is not None:
+                self.replay_buffer.append((self.sent_frames, data))
+                self.replay_bytes += len(data)
+
+                while self.replay_bytes > self.max_replay_bytes and len(self.replay_buffer) > 1:
+                    _, dropped = self.replay_buffer.popleft()
+                    self.replay_bytes -= len(dropped)
+
+            self.sent_frames += 1
+
+            try:
+                await self.websocket.send(data)
+            except websockets.ConnectionClosed:
+                if self.registry is None:
+                    raise
+
+
+    def _acknowledge(self):
+        """
+        Drops the frames sent so far from the replay buffer.
+        """
+        self.replay_buffer.clear()
+        self.replay_bytes = 0
+
+
+    async def close_when_idle(self):
+        """
+        Closes the connection with the "going away" code once the message being processed is answered.
+        """
+        self.closing = True
+
+        if not self.busy:
+            await self.websocket.close(1001, "Server se restartuje.")
+
+
+    @classmethod
+    def _welcome_frame_for(cls, common_questions, wire_format=JSON):
+        """
+        Returns the serialized welcome frame for the most asked questions, serializing it only when they changed.
+
+        :param common_questions (list): The most asked questions.
+        :param wire_format (JsonFormat | MsgpackFormat): Format of the frame.
+        :return (bytes): The welcome message, UTF-8 encoded JSON or MessagePack.
+        """
+        questions, frame = cls._welcome_frames.get(wire_format.name, (None, None))
+
+        if questions != common_questions:
+            formatted_questions = [{"id": i + 1, "text": q} for i, q in enumerate(common_questions)]
+
+            welcome_message = {
+                "type": "welcome",
+                "message": "Ahoj, Co pro Vás mohu udělat?",
+                "questions": formatted_questions
+            }
+
+            frame = wire_format.encode_welcome(welcome_message)
+            cls._welcome_frames[wire_format.name] = (list(common_questions), frame)
+
+        return frame
+
+
+    @Metrics.shared().timed("welcome_message")
     async def _welcome_message(self):
         """
         Sends a welcome message and frequently asked questions separately.
         """
-        common_questions = self.logger.get_questions()
-        formatted_questions = [{"id": i + 1, "text": q} for i, q in enumerate(common_questions)]
+        frame = self._welcome_frame_for(self.logger.get_questions(), self.wire_format)
 
-        welcome_message = {
-            "type": "welcome",
-            "message": "Ahoj, Co pro Vás mohu udělat?",
-            "questions": formatted_questions
-        }
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Sending welcome message: %s", self.wire_format.decode(frame))
 
-        print("Sending welcome message:", json.dumps(welcome_message))  # Debug
-        await self.websocket.send(json.dumps(welcome_message))
+        if self.token is not None:
+            # The token of the session is added to the shared frame instead of serializing the message again
+            frame = self.wire_format.with_token(frame, self.token)
+
+        # The encoded JSON is sent as a text frame as is, without decoding and encoding it again
+        await self.websocket.send(frame, text=not self.wire_format.binary)
         
         
+    @Metrics.shared().timed("process_message")
     async def _process_message(self, client_message):
         """
         Processes the client's message and responds accordingly.
+
+        The message is answered by the logic the session had when it arrived, even if the configuration is reloaded meanwhile.
         """
+        logic = self.logic
         common_questions = self.logger.get_questions()
 
-        if client_message.isdigit() and 1 <= int(client_message) <= len(common_questions):
+        # A FAQ picked by its number does not depend on the conversation, it is answered from the index or cache
+        faq = client_message.isdigit() and 1 <= int(client_message) <= len(common_questions)
+        if faq:
             client_message = common_questions[int(client_message) - 1]
 
-        print(f"\n    - Uživatel ({self.client_id}): {client_message}")
+        log.debug("Dotaz uživatele: %s", client_message)
 
         if client_message.lower() == "exit":
             response_message = {
                 "type": "info",
                 "message": " -> Odpojuji se. Nashledanou!"
             }
-            await self.websocket.send(json.dumps(response_message))
-            print(f"\n > Uživatel ({self.client_id}) se odpojil.")
+            self.ended = True
+            if self.registry is not None:
+                self.registry.remove(self)
+
+            await self._send(response_message)
+            log.info("Uživatel se odpojil.")
             return
 
-        if client_message.lower() == "reload" and self.server:
+        retry_after = self._check_rate_limit()
+        if retry_after:
+            log.info("Uživatel překročil limit zpráv.")
             response_message = {
-                "type": "info",
-                "message": " -> Konfigurace byla úspěšně aktualizována."
+                "type": "error",
+                "code": "rate_limited",
+                "message": f" -> Posíláte zprávy příliš rychle, zkuste to znovu za {math.ceil(retry_after)} s.",
+                "retry_after": round(retry_after, 2)
             }
-            await self.websocket.send(json.dumps(response_message))
+            await self._send(response_message)
+            return
+
+        if client_message.lower() == "reload" and self.reload_config is not None:
+            # Reloading reads the file on the server, anonymous clients must not trigger it
+            if self.user_id is None:
+                message = " -> Konfiguraci mohou načíst jen přihlášení uživatelé."
+            else:
+                message = self._reload()
+            await self._send({"type": "info", "message": message})
             return
 
+        history = self.conversation.messages() if self.conversation and not faq else None
+
         # Process the answer
-        answer = self.logic.get_answer(client_message)
-        response_message = {
-            "type": "response",
-            "message": answer
-        }
+        if logic.config.get("stream_responses", False):
+            answer = await self._stream_answer(logic, client_message, history)
+            if answer is None:
+                return
+        else:
+            answer = await logic.get_answer_async(client_message, history)
+            response_message = {
+                "type": "response",
+                "message": answer
+            }
+
+            await self._send(response_message)
+
+        if self.conversation is not None and answer != ERROR_ANSWER:
+            self.conversation.add(client_message, answer)
+
+        # The log writer schedules the (coalesced) log analysis once the record is written
+        await self.logger.log_record_async(question=client_message, answer=answer)
+
+        log.debug("Odpověď bota: %s", answer)
+
+
+    def _reload(self):
+        """
+        Applies the configuration file if it changed.
+
+        :return (str): The message for the user.
+        """
+        try:
+            if self.reload_config():
+                log.info("Konfigurace byla aktualizována příkazem uživatele.")
+                return " -> Konfigurace byla úspěšně aktualizována."
+        except ValueError as e:
+            log.error("Konfigurace nebyla aktualizována: %s", e)
+            return " -> Nová konfigurace je neplatná, zůstává původní."
+
+        return " -> Konfigurace se nezměnila."
+
+
+    def _check_rate_limit(self):
+        """
+        Takes a message from the limits of the session and of the logged-in user.
+
+        :return (float): 0 if the message is allowed, otherwise the number of seconds to wait before sending another one.
+        """
+        if self.rate_limit is not None and not self.rate_limit.try_acquire():
+            return self.rate_limit.retry_after()
 
-        await self.websocket.send(json.dumps(response_message))
+        if self.user_id is not None and self.user_limiter is not None:
+            retry_after = self.user_limiter.acquire(self.user_id)
+            if retry_after:
+                # The message is not processed, so it does not count against the session
+                if self.rate_limit is not None:
+                    self.rate_limit.tokens += 1
+                return retry_after
+
+        return 0.0
+
+
+    async def _stream_answer(self, logic, client_message, history=None):
+        """
+        Forwards the answer to the client part by part as "chunk" frames followed by a "done" frame.
+
+        If the stream fails after some parts were sent, an "error" frame ends the answer instead of the "done" frame.
+
+        :param logic (ResponseLogic): The logic answering the message.
+        :param client_message (str): The user's question.
+        :param history (list): Messages of the previous conversation, optional.
+        :return (str): The full answer, None if it is incomplete (it is then neither logged nor remembered).
+        """
+        parts = []
 
-        self.logger.log_record(question=client_message, answer=answer)
-        asyncio.create_task(self.logger.analyze_logs_async())
+        try:
+            async for delta in logic.stream_answer(client_message, history):
+                parts.append(delta)
+                await self._send({"type": "chunk", "message": delta})
+        except StreamInterrupted as e:
+            log.warning("Odpověď byla přerušena: %s", e)
+            await self._send({
+                "type": "error",
+                "code": "upstream_failed",
+                "message": f" -> {ERROR_ANSWER}"
+            })
+            return None
 
-        print(f"    └ Odpověď bota uživateli ({self.client_id}): {answer}")
\ No newline at end of file
+        await self._send({"type": "done"})
+        return "".join(parts)
\ No newline at end of file
@@ -0,0 +1,142 @@
+import secrets
+import time
+
+from collections import OrderedDict
+
+class SessionRegistry:
+    """
+    Sessions of the process by their resumption tokens.
+
+    A session whose connection dropped is kept for `ttl` seconds, so that the client can reconnect with the token and receive the frames it missed.
+    At most `max_detached` disconnected sessions are kept, the ones disconnected first are dropped first.
+    """
+
+    def __init__(self, ttl=120, max_detached=1000, clock=time.monotonic):
+        """
+        Initializes the SessionRegistry instance.
+
+        :param ttl (float): Number of seconds a disconnected session can be resumed.
+        :param max_detached (int): Maximum number of disconnected sessions kept.
+        :param clock (callable): Function returning the current time in seconds.
+        """
+        if ttl <= 0:
+            raise ValueError("Doba pro obnovení relace musí být kladná!")
+
+        if type(max_detached) != int or max_detached < 1:
+            raise ValueError("Maximální počet odpojených relací musí být kladné celé číslo!")
+
+        self.ttl = ttl
+        self.max_detached = max_detached
+        self.clock = clock
+
+        self._sessions = {}
+        # Disconnected sessions in the order of their disconnection, with the time of it
+        self._detached = OrderedDict()
+
+        self.resumed = 0
+        self.expired = 0
+
+
+    def new_token(self):
+        """
+        Returns a new unguessable resumption token.
+
+        :return (str): The token.
+        """
+        return secrets.token_urlsafe(18)
+
+
+    def register(self, session):
+        """
+        Registers a connected session under its token.
+
+        :param session (Session): The session.
+        """
+        self._expire()
+        self._sessions[session.token] = session
+
+
+    def detach(self, session):
+        """
+        Marks the session as disconnected, it can be resumed within `ttl` seconds.
+
+        :param session (Session): The session.
+        """
+        if self._sessions.get(session.token) is not session:
+            return
+
+        self._detached[session.token] = self.clock()
+        self._detached.move_to_end(session.token)
+
+        while len(self._detached) > self.max_detached:
+            token, _ = self._detached.popitem(last=False)
+            self._sessions.pop(token, None)
+            self.expired += 1
+
+
+    def remove(self, session):
+        """
+        Forgets the session, e.g. when the client ended it.
+
+        :param session (Session): The session.
+        """
+        if self._sessions.get(session.token) is session:
+            del self._sessions[session.token]
+            self._detached.pop(session.token, None)
+
+
+    def claim(self, token, user_id=None):
+        """
+        Returns the session of the token to be resumed on a new connection.
+
+        :param token (str): The resumption token presented by the client.
+        :param user_id (int): ID of the user authenticated on the new connection, it must be the user of the session.
+        :return (Session): The session, or None if the token is unknown, expired or belongs to another user.
+        """
+        self._expire()
+
+        session = self._sessions.get(token)
+        if session is None or session.user_id != user_id:
+            return None
+
+        self._detached.pop(token, None)
+        self.resumed += 1
+        return session
+
+
+    def _expire(self):
+        """
+        Drops the sessions disconnected for longer than `ttl` seconds.
+        """
+        deadline = self.clock() - self.ttl
+
+        while self._detached:
+            token, detached_at = next(iter(self._detached.items()))
+            if detached_at > deadline:
+                break
+
+            del self._detached[token]
+            self._sessions.pop(token, None)
+            self.expired += 1
+
+
+    def __len__(self):
+        """
+        Returns the number of the registered sessions.
+        """
+        return len(self._sessions)
+
+
+    def stats(self):
+        """
+        Returns the registry counters.
+
+        :return (dict): Number of registered and disconnected sessions, resumed and expired sessions.
+        """
+        self._expire()
+        return {
+            "sessions": len(self._sessions),
+            "detached": len(self._detached),
+            "resumed": self.resumed,
+            "expired": self.expired
+        }
@@ -0,0 +1,56 @@
+import threading
+
+from multiprocessing.managers import BaseManager
+
+from answer_cache import AnswerCache
+
+class SharedState:
+    """
+    State shared by the worker processes, the most asked questions are published by the supervisor.
+    """
+
+    def __init__(self, questions=None):
+        """
+        Initializes the SharedState instance.
+
+        :param questions (list): The initial most asked questions.
+        """
+        self._questions = list(questions or [])
+        self._version = 0
+        self._lock = threading.Lock()
+
+
+    def get_questions(self):
+        """
+        Returns the version and the list of the most asked questions.
+
+        :return (tuple): Version, incremented on every change, and the questions.
+        """
+        with self._lock:
+            return self._version, list(self._questions)
+
+
+    def set_questions(self, questions):
+        """
+        Publishes the most asked questions.
+
+        :param questions (list): The most asked questions.
+        :return (bool): True if the questions changed.
+        """
+        with self._lock:
+            if list(questions) == self._questions:
+                return False
+
+            self._questions = list(questions)
+            self._version += 1
+            return True
+
+
+class StateManager(BaseManager):
+    """
+    Process serving the shared answer cache and the shared state to the worker processes over local IPC.
+    """
+
+
+StateManager.register("AnswerCache", AnswerCache)
+StateManager.register("SharedState", SharedState)
@@ -0,0 +1,158 @@
+import asyncio
+
+
+class _SharedStream:
+    """
+    Parts of a streamed result shared by all consumers of one in-flight call.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.done = False
+        self.error = None
+        self.changed = asyncio.Condition()
+        self.task = None
+
+
+class _SharedCall:
+    """
+    Task of one in-flight call and the number of its callers still waiting for it.
+    """
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls with the same key, so that they share one execution and its result.
+    """
+
+    def __init__(self):
+        """
+        Initializes the SingleFlight instance.
+        """
+        self._calls = {}
+        self._streams = {}
+
+        self.calls = 0
+        self.saved = 0
+
+
+    async def do(self, key, function):
+        """
+        Runs the coroutine function unless a call with the same key is already in flight, in which case its result is awaited instead.
+
+        The call runs in a separate task owned by all its callers, a cancelled caller leaves the others waiting,
+        the call itself is cancelled only when its last caller is. Exceptions are propagated to all callers sharing the call.
+
+        :param key (hashable): Key identifying identical calls.
+        :param function (callable): Function returning the awaitable to run.
+        :return: The result of the shared call.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            self.calls += 1
+            call = _SharedCall(asyncio.ensure_future(function()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._finished(key, call))
+        else:
+            self.saved += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                self._finished(key, call)
+
+
+    def _finished(self, key, call):
+        """
+        Removes the finished or abandoned call, so that the next caller starts a new one.
+
+        :param key (hashable): Key of the call.
+        :param call (_SharedCall): The call.
+        """
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+        # Marks the exception as retrieved in case nobody else is waiting for it
+        if call.task.done() and not call.task.cancelled():
+            call.task.exception()
+
+
+    async def stream(self, key, function):
+        """
+        Iterates over the async generator unless a stream with the same key is already in flight, in which case its parts are replayed and followed.
+
+        The generator is consumed by a separate task, so a consumer that stops early does not interrupt the others.
+
+        :param key (hashable): Key identifying identical calls.
+        :param function (callable): Function returning the async generator to consume.
+        :return: Async generator of the shared parts.
+        """
+        shared = self._streams.get(key)
+
+        if shared is None:
+            self.calls += 1
+            shared = _SharedStream()
+            self._streams[key] = shared
+            shared.task = asyncio.create_task(self._produce(key, shared, function))
+        else:
+            self.saved += 1
+
+        position = 0
+        while True:
+            async with shared.changed:
+                await shared.changed.wait_for(lambda: position < len(shared.parts) or shared.done)
+                parts = shared.parts[position:]
+                done = shared.done
+
+            for part in parts:
+                yield part
+            position += len(parts)
+
+            if done and position == len(shared.parts):
+                if shared.error is not None:
+                    raise shared.error
+                return
+
+
+    async def _produce(self, key, shared, function):
+        """
+        Consumes the async generator and publishes its parts to the shared stream.
+
+        :param key (hashable): Key of the stream.
+        :param shared (_SharedStream): The shared stream.
+        :param function (callable): Function returning the async generator to consume.
+        """
+        try:
+            async for part in function():
+                async with shared.changed:
+                    shared.parts.append(part)
+                    shared.changed.notify_all()
+        except Exception as e:
+            shared.error = e
+        finally:
+            del self._streams[key]
+
+            async with shared.changed:
+                shared.done = True
+                shared.changed.notify_all()
+
+
+    def stats(self):
+        """
+        Returns the deduplication counters.
+
+        :return (dict): Number of executed calls, calls saved by sharing an in-flight one, and calls currently in flight.
+        """
+        return {
+            "calls": self.calls,
+            "saved": self.saved,
+            "in_flight": len(self._calls) + len(self._streams)
+        }
@@ -0,0 +1,214 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import secrets
+import signal
+import time
+
+from app_logging import setup_logging
+from auth_tokens import KEY_ENVIRONMENT_VARIABLE
+from server import WebSocketServer, create_log_manager
+from shared_state import StateManager
+
+log = logging.getLogger(__name__)
+
+def run_worker(config_file, cache, shared_state, ready):
+    """
+    Entry point of a worker process serving the WebSocket and HTTP servers on the shared port.
+
+    :param config_file (str): Path to the configuration file.
+    :param cache (AnswerCache): Proxy of the shared answer cache.
+    :param shared_state (SharedState): Proxy of the shared state.
+    :param ready (multiprocessing.Event): Event set once the worker is listening.
+    """
+    # Ctrl+C is handled by the supervisor, which drains the workers with SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+
+    server = WebSocketServer(config_file, cache=cache, shared_state=shared_state)
+    asyncio.run(server.run(reuse_port=True, ready=ready))
+
+
+class Supervisor:
+    """
+    Runs several worker processes bound to the same host and port with SO_REUSEPORT and keeps them alive.
+
+    The answer cache and the most asked questions are served to the workers by a manager process, the supervisor analyzes the logs of all workers.
+    SIGTERM (or Ctrl+C) drains and stops the workers, SIGHUP restarts them one by one without downtime.
+    """
+
+    def __init__(self, config_file):
+        """
+        Initializes the Supervisor instance.
+
+        :param config_file (str): Path to the configuration file.
+        :raises ValueError: If the configuration file cannot be loaded.
+        """
+        try:
+            with open(config_file, "r", encoding="utf-8") as f:
+                self.config = json.load(f)
+        except Exception as e:
+            raise ValueError(f"Error loading config: {e}")
+
+        setup_logging(
+            level=self.config.get("log_level", "INFO"),
+            json_output=self.config.get("log_json", False),
+            debug_rate=self.config.get("log_debug_rate", 10),
+        )
+
+        self.config_file = config_file
+        self.workers = self.config.get("workers", 0) or os.cpu_count() or 1
+        self.drain_timeout = self.config.get("worker_drain_timeout", 30)
+        self.restart_delay = self.config.get("worker_restart_delay", 1)
+        self.analysis_interval = self.config.get("log_analysis_interval", 5)
+
+        self.processes = []
+        self.restarts = 0
+
+        self._stopping = False
+        self._restart_requested = False
+
+
+    def _start_worker(self):
+        """
+        Start a worker process.
+
+        :returns (tuple): The process and its ready event.
+        """
+        ready = multiprocessing.Event()
+        process = multiprocessing.Process(
+            target=run_worker,
+            args=(self.config_file, self.cache, self.shared_state, ready),
+            name=f"jecnabot-worker-{len(self.processes) + self.restarts}",
+        )
+        process.start()
+
+        self.processes.append(process)
+        return process, ready
+
+
+    def _stop_worker(self, process):
+        """
+        Drain and stop a worker process, it is killed if it does not stop within the drain timeout.
+
+        :param process (multiprocessing.Process): The worker process.
+        """
+        if process.is_alive():
+            process.terminate()
+        process.join(self.drain_timeout + 5)
+
+        if process.is_alive():
+            log.warning("Worker %s did not stop in time, killing it.", process.pid)
+            process.kill()
+            process.join()
+
+        if process in self.processes:
+            self.processes.remove(process)
+
+
+    def _check_workers(self):
+        """
+        Replace the workers that exited unexpectedly.
+        """
+        for process in list(self.processes):
+            if not process.is_alive():
+                log.error("Worker %s exited with code %s, restarting it.", process.pid, process.exitcode)
+                self.processes.remove(process)
+                self.restarts += 1
+
+                time.sleep(self.restart_delay)
+                self._start_worker()
+
+
+    def _restart_workers(self):
+        """
+        Restart the workers one by one, the old worker is drained only once its replacement is listening.
+        """
+        log.info("Restarting workers...")
+
+        for process in list(self.processes):
+            self.restarts += 1
+            _, ready = self._start_worker()
+
+            if not ready.wait(self.drain_timeout):
+                log.error("The new worker did not start in time, keeping the old one.")
+                continue
+
+            self._stop_worker(process)
+
+
+    def _publish_questions(self):
+        """
+        Analyze the logs of all workers and publish the most asked questions.
+        """
+        self.logger.analyze_logs()
+        self.shared_state.set_questions(self.logger.get_questions())
+
+
+    def _handle_signal(self, signum, frame):
+        """
+        Record the received signal, it is handled by the supervision loop.
+        """
+        if signum == signal.SIGHUP:
+            self._restart_requested = True
+        else:
+            self._stopping = True
+
+
+    def run(self):
+        """
+        Start the shared state, the workers and supervise them until SIGTERM or Ctrl+C.
+        """
+        self.manager = StateManager()
+        self.manager.start(signal.signal, (signal.SIGINT, signal.SIG_IGN))
+
+        self.cache = self.manager.AnswerCache(self.config.get("cache_size", 1000), self.config.get("cache_ttl", 3600))
+        self.logger = create_log_manager(self.config)
+        self.shared_state = self.manager.SharedState(self.logger.get_questions())
+
+        # Tokens issued by one worker must be accepted by the others
+        if not self.config.get("auth_keys"):
+            os.environ.setdefault(KEY_ENVIRONMENT_VARIABLE, secrets.token_hex(32))
+
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, self._handle_signal)
+
+        for _ in range(self.workers):
+            self._start_worker()
+        log.info("Supervisor started %s workers at ws://%s:%s", self.workers, self.config["host"], self.config["port"])
+
+        next_analysis = time.monotonic() + self.analysis_interval
+
+        try:
+            while not self._stopping:
+                if self._restart_requested:
+                    self._restart_requested = False
+                    self._restart_workers()
+
+                self._check_workers()
+
+                if time.monotonic() >= next_analysis:
+                    self._publish_questions()
+                    next_analysis = time.monotonic() + self.analysis_interval
+
+                time.sleep(0.2)
+
+        finally:
+            log.info("Stopping workers...")
+            for process in list(self.processes):
+                if process.is_alive():
+                    process.terminate()
+            for process in list(self.processes):
+                self._stop_worker(process)
+
+            self._publish_questions()
+            self.manager.shutdown()
+            log.info("Supervisor stopped.")
+
+
+if __name__ == "__main__":
+    # Start the WebSocket and HTTP server in several worker processes
+    Supervisor(config_file="../config.json").run()
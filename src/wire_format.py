@@ -0,0 +1,291 @@
+import json
+
+from websockets.extensions.permessage_deflate import PerMessageDeflate, ServerPerMessageDeflateFactory
+from websockets.frames import CTRL_OPCODES, Opcode
+
+try:
+    import msgpack
+except ImportError:
+    # MessagePack is optional, without it only JSON is offered
+    msgpack = None
+
+
+class JsonFormat:
+    """
+    The JSON text frames, used also when the client does not negotiate a subprotocol (e.g. the web UI).
+    """
+
+    name = "json"
+    subprotocol = "jecnabot.json"
+    binary = False
+
+    def encode(self, message):
+        """
+        Serializes the message.
+
+        :param message (dict): The message.
+        :return (str): The JSON text.
+        """
+        return json.dumps(message)
+
+
+    def decode(self, data):
+        """
+        Deserializes a frame.
+
+        :param data (str): The frame.
+        :return (dict): The message.
+        """
+        return json.loads(data)
+
+
+    def encode_welcome(self, message):
+        """
+        Serializes the welcome message without its token, see `with_token`.
+
+        :param message (dict): The welcome message.
+        :return (bytes): The UTF-8 encoded JSON, sent as a text frame as is.
+        """
+        return json.dumps(message).encode("UTF-8")
+
+
+    def with_token(self, frame, token):
+        """
+        Splices the session token into a serialized welcome frame instead of serializing the message again.
+
+        :param frame (bytes): The frame from `encode_welcome`.
+        :param token (str): The token.
+        :return (bytes): The frame with the token.
+        """
+        return b'%s, "token": "%s"}' % (frame[:-1], token.encode("ascii"))
+
+
+class MsgpackFormat:
+    """
+    Compact binary frames, a MessagePack array of the frame type number followed by the fields of the type in the order of `SCHEMA`.
+
+    The field names are not sent, trailing fields without a value are left out and the FAQ questions of the welcome frame are sent
+    as a list of texts, their IDs are their positions. Frames of an unknown type are sent as a MessagePack map.
+    """
+
+    name = "msgpack"
+    subprotocol = "jecnabot.msgpack"
+    binary = True
+
+    # Frame types by their numbers and their fields, new types and fields are only ever appended
+    SCHEMA = (
+        ("welcome", ("message", "questions", "token")),
+        ("response", ("message",)),
+        ("info", ("message",)),
+        ("chunk", ("message",)),
+        ("done", ()),
+        ("error", ("code", "message", "retry_after")),
+        ("resumed", ("replayed", "missed")),
+    )
+
+    _TYPE_NUMBERS = {frame_type: number for number, (frame_type, _) in enumerate(SCHEMA)}
+
+    def encode(self, message):
+        """
+        Serializes the message.
+
+        :param message (dict): The message.
+        :return (bytes): The MessagePack array.
+        """
+        number = self._TYPE_NUMBERS.get(message.get("type"))
+        if number is None:
+            return msgpack.packb(message)
+
+        values = [number]
+        for field in self.SCHEMA[number][1]:
+            value = message.get(field)
+            if field == "questions" and value is not None:
+                value = [question["text"] for question in value]
+            values.append(value)
+
+        while len(values) > 1 and values[-1] is None:
+            values.pop()
+
+        return msgpack.packb(values)
+
+
+    def decode(self, data):
+        """
+        Deserializes a frame.
+
+        :param data (bytes): The frame.
+        :return (dict): The message.
+        :raises ValueError: If the frame is not valid.
+        """
+        try:
+            values = msgpack.unpackb(data)
+        except Exception as e:
+            raise ValueError(f"Neplatná MessagePack zpráva: {e}")
+
+        if isinstance(values, dict):
+            return values
+
+        if not isinstance(values, list) or not values or type(values[0]) != int or not 0 <= values[0] < len(self.SCHEMA):
+            raise ValueError("Neznámý typ MessagePack zprávy!")
+
+        frame_type, fields = self.SCHEMA[values[0]]
+        message = {"type": frame_type}
+
+        for field, value in zip(fields, values[1:]):
+            if field == "questions":
+                value = [{"id": i + 1, "text": text} for i, text in enumerate(value)]
+            message[field] = value
+
+        return message
+
+
+    def encode_welcome(self, message):
+        """
+        Serializes the welcome message without its token, see `with_token`.
+
+        :param message (dict): The welcome message.
+        :return (bytes): The MessagePack array.
+        """
+        return self.encode(message)
+
+
+    def with_token(self, frame, token):
+        """
+        Appends the session token to a serialized welcome frame instead of serializing the message again.
+
+        :param frame (bytes): The frame from `encode_welcome`, its array has the type, message and questions.
+        :param token (str): The token.
+        :return (bytes): The frame with the token.
+        """
+        # The array is short enough for the one byte header holding its length
+        return bytes((frame[0] + 1,)) + frame[1:] + msgpack.packb(token)
+
+
+JSON = JsonFormat()
+
+# The formats the server can speak by their subprotocols, in the order of preference
+FORMATS = {wire_format.subprotocol: wire_format for wire_format in ([MsgpackFormat()] if msgpack is not None else []) + [JSON]}
+
+
+def format_by_name(name):
+    """
+    Returns the format by its name.
+
+    :param name (str): "json" or "msgpack".
+    :return (JsonFormat | MsgpackFormat): The format.
+    :raises ValueError: If the format is unknown or its library is not installed.
+    """
+    for wire_format in FORMATS.values():
+        if wire_format.name == name:
+            return wire_format
+
+    raise ValueError(f"Formát zpráv '{name}' není podporován (pro 'msgpack' je potřeba balíček msgpack)!")
+
+
+def format_for(websocket):
+    """
+    Returns the format negotiated on the connection.
+
+    :param websocket (websockets.ServerConnection): The connection.
+    :return (JsonFormat | MsgpackFormat): The format, JSON if no subprotocol was negotiated.
+    """
+    subprotocol = getattr(websocket, "subprotocol", None)
+    return FORMATS.get(subprotocol, JSON) if isinstance(subprotocol, str) else JSON
+
+
+def select_subprotocol(connection, subprotocols):
+    """
+    Picks the first format offered by the client that the server supports, clients offering none of them get JSON.
+
+    :param connection (websockets.ServerConnection): The connection being opened.
+    :param subprotocols (list): Subprotocols offered by the client.
+    :return (str): The subprotocol, or None to continue without one.
+    """
+    for subprotocol in subprotocols:
+        if subprotocol in FORMATS:
+            return subprotocol
+    return None
+
+
+class ThresholdPerMessageDeflate(PerMessageDeflate):
+    """
+    Per-message deflate sending the messages shorter than `min_size` bytes uncompressed (RFC 7692 allows it per message).
+
+    Deflating a streamed chunk of a few words costs several times the CPU of serializing it to save a few bytes,
+    the threshold trades these bytes for CPU (see benchmarks/wire_formats.py).
+    """
+
+    def __init__(self, *args, min_size=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.min_size = min_size
+        self._skipping = False
+
+
+    def encode(self, frame):
+        """
+        Encodes an outgoing frame, a short unfragmented message is passed through as is.
+        """
+        if frame.opcode in CTRL_OPCODES:
+            return frame
+
+        if frame.opcode is not Opcode.CONT:
+            self._skipping = frame.fin and len(frame.data) < self.min_size
+
+        if self._skipping:
+            return frame
+
+        return super().encode(frame)
+
+
+class ThresholdPerMessageDeflateFactory(ServerPerMessageDeflateFactory):
+    """
+    Server-side factory of `ThresholdPerMessageDeflate`.
+    """
+
+    def __init__(self, min_size=0, **kwargs):
+        super().__init__(**kwargs)
+        self.min_size = min_size
+
+
+    def process_request_params(self, params, accepted_extensions):
+        response_params, extension = super().process_request_params(params, accepted_extensions)
+
+        return response_params, ThresholdPerMessageDeflate(
+            extension.remote_no_context_takeover,
+            extension.local_no_context_takeover,
+            extension.remote_max_window_bits,
+            extension.local_max_window_bits,
+            extension.compress_settings,
+            min_size=self.min_size,
+        )
+
+
+def compression_extensions(config):
+    """
+    Returns the WebSocket extensions configured by the ws_* keys of the configuration.
+
+    :param config (dict): Server configuration.
+    :return (list): The per-message deflate extension factory, empty if compression is disabled.
+    """
+    if not config.get("ws_compression", True):
+        return []
+
+    window_bits = config.get("ws_deflate_window_bits", 12)
+    mem_level = config.get("ws_deflate_mem_level", 5)
+    min_size = config.get("ws_deflate_min_size", 0)
+
+    if type(window_bits) != int or not 9 <= window_bits <= 15:
+        raise ValueError("Velikost okna kompresoru musí být celé číslo od 9 do 15!")
+
+    if type(mem_level) != int or not 1 <= mem_level <= 9:
+        raise ValueError("Úroveň paměti kompresoru musí být celé číslo od 1 do 9!")
+
+    if type(min_size) != int or min_size < 0:
+        raise ValueError("Minimální velikost komprimované zprávy musí být nezáporné celé číslo!")
+
+    return [ThresholdPerMessageDeflateFactory(
+        min_size=min_size,
+        server_max_window_bits=window_bits,
+        client_max_window_bits=window_bits,
+        compress_settings={"memLevel": mem_level},
+    )]
@@ -0,0 +1,94 @@
+import sys
+import os
+import time
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from answer_cache import AnswerCache, normalize_question
+
+import unittest
+
+class TestOfAnswerCache(unittest.TestCase):
+    """
+    Unit test class for testing the `AnswerCache` class methods.
+    """
+
+    def setUp(self):
+        """
+        Initializes a small `AnswerCache` instance.
+        """
+        self.cache = AnswerCache(max_size=2, ttl=60)
+
+
+    def test_normalize_question(self):
+        """
+        Verifies that casing, diacritics, punctuation and whitespace are folded.
+        """
+        self.assertEqual(normalize_question("Kdy začíná výuka?"), "kdy zacina vyuka")
+        self.assertEqual(normalize_question("  kdy  ZAČÍNÁ výuka ?"), "kdy zacina vyuka")
+        self.assertEqual(normalize_question("Kdo je ředitel školy, a jeho kontakt?"), "kdo je reditel skoly a jeho kontakt")
+
+    def test_init_invalid(self):
+        """
+        Ensures exceptions are raised for invalid sizes and TTLs.
+        """
+        with self.assertRaises(ValueError):
+            AnswerCache(max_size=0)
+        with self.assertRaises(ValueError):
+            AnswerCache(ttl=-1)
+
+
+    def test_get_put(self):
+        """
+        Validates storing and retrieving answers including the hit/miss counters.
+        """
+        self.assertIsNone(self.cache.get("Kdy začíná výuka?"))
+
+        self.cache.put("Kdy začíná výuka?", "V 7:30.")
+        self.assertEqual(self.cache.get("kdy zacina vyuka"), "V 7:30.")
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_lru_eviction(self):
+        """
+        Confirms that the least recently used answer is evicted first.
+        """
+        self.cache.put("a", "1")
+        self.cache.put("b", "2")
+        self.cache.get("a")
+        self.cache.put("c", "3")
+
+        self.assertEqual(self.cache.get("a"), "1")
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_ttl(self):
+        """
+        Confirms that expired answers are not returned.
+        """
+        cache = AnswerCache(ttl=0.01)
+        cache.put("a", "1")
+        time.sleep(0.02)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_set_context(self):
+        """
+        Verifies that the cache is cleared only when its context changes.
+        """
+        self.assertFalse(self.cache.set_context(("prompt", "model")))
+        self.cache.put("a", "1")
+
+        self.assertFalse(self.cache.set_context(("prompt", "model")))
+        self.assertEqual(self.cache.get("a"), "1")
+
+        self.assertTrue(self.cache.set_context(("prompt", "other-model")))
+        self.assertIsNone(self.cache.get("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import sys
+import os
+import io
+import json
+import logging
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from app_logging import SamplingFilter, correlation_id, setup_logging, stop_logging
+
+import asyncio
+import unittest
+
+class TestOfSamplingFilter(unittest.TestCase):
+    """
+    Unit test class for testing the `SamplingFilter` class.
+    """
+
+    def record(self, level=logging.DEBUG, msg="Dotaz uživatele: %s"):
+        return logging.LogRecord("session", level, __file__, 1, msg, ("kdy začíná výuka?",), None)
+
+    def test_filter(self):
+        """
+        Verifies that debug records of one template are rate-limited and the dropped ones are reported.
+        """
+        now = [0.0]
+        sampling = SamplingFilter(rate=2, clock=lambda: now[0])
+
+        self.assertEqual([sampling.filter(self.record()) for _ in range(5)], [True, True, False, False, False])
+        self.assertTrue(sampling.filter(self.record(msg="Odpověď bota: %s")))
+        self.assertTrue(sampling.filter(self.record(level=logging.INFO)))
+
+        now[0] = 0.5
+        record = self.record()
+        self.assertTrue(sampling.filter(record))
+        self.assertEqual(record.suppressed, 3)
+        self.assertEqual(sampling.dropped, 3)
+
+    def test_init_invalid(self):
+        """
+        Ensures that a non-positive rate is rejected.
+        """
+        with self.assertRaises(ValueError):
+            SamplingFilter(rate=0)
+
+
+class TestOfSetupLogging(unittest.TestCase):
+    """
+    Unit test class for testing the `setup_logging` function.
+    """
+
+    def tearDown(self):
+        stop_logging()
+        logging.getLogger().setLevel(logging.WARNING)
+
+    def test_json_output(self):
+        """
+        Verifies that the records are written as JSON lines with the correlation ID of the session that logged them.
+        """
+        stream = io.StringIO()
+        setup_logging(level="DEBUG", json_output=True, stream=stream)
+
+        async def session(client_id):
+            correlation_id.set(client_id)
+            await asyncio.to_thread(logging.getLogger("session").info, "Uživatel se připojil.")
+
+        async def main():
+            await asyncio.gather(session("a1"), session("b2"))
+            logging.getLogger("server").warning("Hotovo %s", 1)
+
+        asyncio.run(main())
+        stop_logging()
+
+        entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+        entries = [entry for entry in entries if entry["logger"] != "asyncio"]
+        self.assertEqual(sorted(entry.get("correlation_id") for entry in entries[:2]), ["a1", "b2"])
+        self.assertEqual(entries[2]["message"], "Hotovo 1")
+        self.assertEqual(entries[2]["level"], "WARNING")
+        self.assertNotIn("correlation_id", entries[2])
+
+    def test_text_output(self):
+        """
+        Verifies the plain text output and that records below the level are not written.
+        """
+        stream = io.StringIO()
+        setup_logging(level="INFO", json_output=False, stream=stream)
+
+        try:
+            raise ValueError("chyba")
+        except ValueError:
+            logging.getLogger("session").exception("Chyba při zpracování zprávy.")
+        logging.getLogger("session").debug("Dotaz uživatele: %s", "ahoj")
+        stop_logging()
+
+        output = stream.getvalue()
+        self.assertIn("ERROR session: Chyba při zpracování zprávy.", output)
+        self.assertIn("ValueError: chyba", output)
+        self.assertNotIn("Dotaz", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import sys
+import os
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from auth_tokens import MIN_KEY_LENGTH, InvalidTokenError, TokenSigner
+
+import unittest
+
+class TestOfTokenSigner(unittest.TestCase):
+    """
+    Unit test class for testing the `TokenSigner` class.
+    """
+
+    def setUp(self):
+        """
+        Creates a signer with two keys and a controllable clock.
+        """
+        self.now = [1_000_000.0]
+        self.signer = TokenSigner({"old": "stary-tajny-klic", "new": "novy-tajny-klic"}, "new", ttl=60, clock=lambda: self.now[0])
+
+    def test_verify(self):
+        """
+        Verifies that an issued token identifies its user until it expires.
+        """
+        token = self.signer.issue(7)
+
+        self.assertTrue(token.startswith("new."))
+        self.assertEqual(self.signer.verify(token), 7)
+
+        self.now[0] += 60
+        with self.assertRaises(InvalidTokenError):
+            self.signer.verify(token)
+
+    def test_verify_tampered(self):
+        """
+        Ensures that malformed tokens, tokens with a changed payload and tokens of unknown keys are rejected.
+        """
+        kid, payload, signature = self.signer.issue(7).split(".")
+        other_payload = TokenSigner({"new": "jiny-klic"}, "new", clock=lambda: self.now[0]).issue(1).split(".")[1]
+
+        for token in ("", "a.b", f"{kid}.{other_payload}.{signature}", f"unknown.{payload}.{signature}", f"{kid}.{payload}.{signature[:-2]}", f"{kid}.{payload}.ž"):
+            with self.assertRaises(InvalidTokenError):
+                self.signer.verify(token)
+
+    def test_rotation(self):
+        """
+        Verifies that tokens signed with a previous key stay valid until the key is removed.
+        """
+        old_signer = TokenSigner({"old": "stary-tajny-klic"}, "old", clock=lambda: self.now[0])
+        token = old_signer.issue(3)
+
+        self.assertEqual(self.signer.verify(token), 3)
+
+        with self.assertRaises(InvalidTokenError):
+            TokenSigner({"new": "novy-tajny-klic"}, "new", clock=lambda: self.now[0]).verify(token)
+
+    def test_init_invalid(self):
+        """
+        Ensures that the active key must be one of the keys.
+        """
+        with self.assertRaises(ValueError):
+            TokenSigner({"a": "klic"}, "b")
+        with self.assertRaises(ValueError):
+            TokenSigner({"a.b": "klic"}, "a.b")
+
+    def test_from_config_weak_key(self):
+        """
+        Ensures that the configured keys must not be the placeholder from the example configuration or too short.
+        """
+        for secret in ("change-me-to-a-long-random-secret", "kratky-klic"):
+            with self.assertRaises(ValueError):
+                TokenSigner.from_config({"auth_keys": {"a": secret}, "auth_active_key": "a"})
+
+        signer = TokenSigner.from_config({"auth_keys": {"a": "x" * MIN_KEY_LENGTH}, "auth_active_key": "a"})
+        self.assertEqual(signer.verify(signer.issue(1)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
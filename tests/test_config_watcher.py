@@ -0,0 +1,108 @@
+import sys
+import os
+import json
+import tempfile
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config_watcher import ConfigWatcher, load_config
+
+import unittest
+
+CONFIG = {"host": "localhost", "port": 7777, "ai_prompt": "prompt", "ai_model": "model", "openai_api_key": "key"}
+
+
+class TestOfConfigWatcher(unittest.TestCase):
+    """
+    Unit test class for testing the `ConfigWatcher` class.
+    """
+
+    def setUp(self):
+        """
+        Writes a valid configuration file and creates a watcher recording the applied configurations.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "config.json")
+        self.version = 0
+        self.write(CONFIG)
+
+        self.applied = []
+        self.watcher = ConfigWatcher(self.path, dict(CONFIG), self.applied.append)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, content):
+        """
+        Writes the configuration file with a new modification time.
+        """
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(content if isinstance(content, str) else json.dumps(content))
+
+        # Every version gets a later modification time, even if it is written within the resolution of the clock
+        self.version += 1
+        os.utime(self.path, (self.version, self.version))
+
+    def test_load_config(self):
+        """
+        Ensures that only a readable JSON object with the required keys is loaded.
+        """
+        self.assertEqual(load_config(self.path), CONFIG)
+
+        for content in ("{", "[]", json.dumps({**CONFIG, "port": "7777"}), json.dumps({key: value for key, value in CONFIG.items() if key != "ai_model"})):
+            self.write(content)
+            with self.assertRaises(ValueError):
+                load_config(self.path)
+
+        with self.assertRaises(ValueError):
+            load_config(os.path.join(self.directory.name, "missing.json"))
+
+    def test_check(self):
+        """
+        Verifies that a changed file is applied once, an unchanged content is ignored and an invalid one is rejected.
+        """
+        self.assertFalse(self.watcher.check())
+
+        self.write({**CONFIG, "ai_prompt": "new prompt"})
+        self.assertTrue(self.watcher.check())
+        self.assertFalse(self.watcher.check())
+        self.assertEqual(self.applied, [{**CONFIG, "ai_prompt": "new prompt"}])
+
+        # Saved again without a change
+        self.write({**CONFIG, "ai_prompt": "new prompt"})
+        self.assertFalse(self.watcher.check())
+
+        self.write('{"host": ')
+        with self.assertRaises(ValueError):
+            self.watcher.check()
+        self.assertEqual(self.watcher.config["ai_prompt"], "new prompt")
+
+        self.write({**CONFIG, "ai_model": "other"})
+        self.assertTrue(self.watcher.check())
+        self.assertEqual(self.watcher.stats(), {"reloads": 2, "errors": 1})
+
+    def test_check_rejected(self):
+        """
+        Ensures that a configuration rejected by the callback is not taken as the current one.
+        """
+        def reject(config):
+            raise ValueError("invalid")
+
+        watcher = ConfigWatcher(self.path, dict(CONFIG), reject)
+        self.write({**CONFIG, "ai_max_concurrency": 0})
+
+        with self.assertRaises(ValueError):
+            watcher.check()
+        self.assertEqual(watcher.config, CONFIG)
+
+    def test_init_invalid(self):
+        """
+        Ensures that a non-positive interval is rejected.
+        """
+        with self.assertRaises(ValueError):
+            ConfigWatcher(self.path, CONFIG, print, interval=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
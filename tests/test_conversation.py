@@ -0,0 +1,66 @@
+import sys
+import os
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from conversation import Conversation, estimate_tokens
+
+import unittest
+
+class TestOfConversation(unittest.TestCase):
+    """
+    Unit test class for testing the `Conversation` class.
+    """
+
+    def test_messages(self):
+        """
+        Verifies that the recent turns are sent verbatim and the older ones as a summary.
+        """
+        conversation = Conversation(max_tokens=1000, summary_tokens=250, max_turns=2)
+        self.assertFalse(conversation)
+        self.assertEqual(conversation.messages(), [])
+
+        conversation.add("Kde je škola?", "Ječná 30, Praha 2. Vchod je z ulice Ječná.")
+        conversation.add("a jaká je její dostupnost MHD?", "Zastávka Štěpánská je hned vedle.")
+        conversation.add("Kdy začíná výuka?", "V 7:30.")
+
+        self.assertEqual(len(conversation), 2)
+        self.assertEqual(conversation.messages(), [
+            {"role": "system", "content": "Shrnutí dřívější části konverzace:\n- Kde je škola? -> Ječná 30, Praha 2."},
+            {"role": "user", "content": "a jaká je její dostupnost MHD?"},
+            {"role": "assistant", "content": "Zastávka Štěpánská je hned vedle."},
+            {"role": "user", "content": "Kdy začíná výuka?"},
+            {"role": "assistant", "content": "V 7:30."}
+        ])
+
+    def test_budget(self):
+        """
+        Ensures that the history stays within the token budget however long the conversation is.
+        """
+        conversation = Conversation(max_tokens=300, summary_tokens=100, max_turns=10)
+
+        for i in range(1000):
+            conversation.add(f"Otázka číslo {i}?", "Dlouhá odpověď. " * (i % 50))
+            self.assertLessEqual(conversation.tokens(), 300)
+
+        self.assertLessEqual(sum(estimate_tokens(message["content"]) for message in conversation.messages()), 300 + 20)
+        self.assertIn("Otázka číslo 999?", conversation.messages()[-2]["content"])
+
+        # A single turn longer than the budget is shortened
+        conversation.add("Otázka?", "x" * 10000)
+        self.assertEqual(len(conversation), 1)
+        self.assertTrue(conversation.messages()[-1]["content"].endswith("…"))
+
+    def test_init_invalid(self):
+        """
+        Ensures that invalid budgets are rejected.
+        """
+        with self.assertRaises(ValueError):
+            Conversation(max_tokens=100, summary_tokens=100)
+        with self.assertRaises(ValueError):
+            Conversation(max_turns=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import sys
+import os
+import time
+import threading
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from db.pool import ConnectionPool, PoolExhaustedError
+
+import unittest
+
+class FakeConnection:
+    """
+    Local stand-in for a database connection.
+    """
+
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+
+    def is_connected(self):
+        return self.connected
+
+    def rollback(self):
+        if not self.connected:
+            raise ConnectionError("Connection lost.")
+
+    def close(self):
+        self.closed = True
+
+
+class TestOfConnectionPool(unittest.TestCase):
+    """
+    Unit test class for testing the `ConnectionPool` class methods.
+    """
+
+    def setUp(self):
+        """
+        Initializes a `ConnectionPool` instance backed by fake connections.
+        """
+        self.created = []
+        self.pool = ConnectionPool(self._connect, size=2, checkout_timeout=0.1)
+
+    def _connect(self):
+        """
+        Creates a fake connection and remembers it.
+        """
+        connection = FakeConnection()
+        self.created.append(connection)
+        return connection
+
+
+    def test_init_invalid(self):
+        """
+        Ensures exceptions are raised for invalid parameters.
+        """
+        with self.assertRaises(TypeError):
+            ConnectionPool(None)
+        with self.assertRaises(ValueError):
+            ConnectionPool(self._connect, size=0)
+
+
+    def test_reuse(self):
+        """
+        Verifies that released connections are reused instead of opening new ones.
+        """
+        for _ in range(5):
+            with self.pool.connection() as connection:
+                self.assertIs(connection, self.created[0])
+
+        stats = self.pool.stats()
+        self.assertEqual(stats["checkouts"], 5)
+        self.assertEqual(stats["creates"], 1)
+        self.assertEqual(stats["idle"], 1)
+
+    def test_exhausted(self):
+        """
+        Ensures that a checkout times out when all connections are in use.
+        """
+        self.pool.checkout()
+        self.pool.checkout()
+
+        with self.assertRaises(PoolExhaustedError):
+            self.pool.checkout()
+
+        stats = self.pool.stats()
+        self.assertEqual(stats["waits"], 1)
+        self.assertEqual(stats["timeouts"], 1)
+
+    def test_wait_for_release(self):
+        """
+        Verifies that a waiting checkout gets the connection released by another thread.
+        """
+        pool = ConnectionPool(self._connect, size=1, checkout_timeout=1)
+        connection = pool.checkout()
+
+        threading.Timer(0.05, pool.release, args=(connection,)).start()
+
+        self.assertIs(pool.checkout(), connection)
+        self.assertEqual(pool.stats()["waits"], 1)
+
+    def test_health_check(self):
+        """
+        Confirms that dead connections are replaced on checkout.
+        """
+        with self.pool.connection() as connection:
+            pass
+        connection.connected = False
+
+        with self.pool.connection() as new_connection:
+            self.assertIsNot(new_connection, connection)
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(self.pool.stats()["recycles"], 1)
+
+    def test_idle_timeout(self):
+        """
+        Confirms that connections idle for too long are recycled.
+        """
+        pool = ConnectionPool(self._connect, size=1, idle_timeout=0.01)
+
+        with pool.connection() as connection:
+            pass
+        time.sleep(0.02)
+
+        with pool.connection() as new_connection:
+            self.assertIsNot(new_connection, connection)
+        self.assertTrue(connection.closed)
+
+    def test_connect_error(self):
+        """
+        Ensures that a failed connect does not leak a pool slot.
+        """
+        pool = ConnectionPool(lambda: 1 / 0, size=1, checkout_timeout=0.01)
+
+        for _ in range(2):
+            with self.assertRaises(ZeroDivisionError):
+                pool.checkout()
+        self.assertEqual(pool.stats()["open"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
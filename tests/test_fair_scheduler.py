@@ -0,0 +1,80 @@
+import sys
+import os
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from fair_scheduler import FairScheduler
+
+import asyncio
+import unittest
+
+class TestOfFairScheduler(unittest.IsolatedAsyncioTestCase):
+    """
+    Unit test class for testing the `FairScheduler` class.
+    """
+
+    async def test_round_robin(self):
+        """
+        Verifies that a flow with many queued requests does not delay the requests of the other flows.
+        """
+        scheduler = FairScheduler(max_concurrency=1)
+        order = []
+
+        async def request(flow, i):
+            async with scheduler.slot(flow):
+                order.append(f"{flow}{i}")
+                await asyncio.sleep(0.001)
+
+        tasks = [asyncio.create_task(request("a", i)) for i in range(4)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(request("b", i)) for i in range(2)]
+        await asyncio.gather(*tasks)
+
+        self.assertEqual(order, ["a0", "a1", "b0", "a2", "b1", "a3"])
+        self.assertEqual(scheduler.stats(), {"running": 0, "waiting": 0, "granted": 6, "queued": 5})
+
+    async def test_concurrency_limit(self):
+        """
+        Ensures that at most `max_concurrency` requests hold a slot at once.
+        """
+        scheduler = FairScheduler(max_concurrency=2)
+        running = []
+
+        async def request(flow):
+            async with scheduler.slot(flow):
+                running.append(scheduler.running)
+                await asyncio.sleep(0.001)
+
+        await asyncio.gather(*(request(i % 3) for i in range(9)))
+        self.assertEqual(max(running), 2)
+
+    async def test_cancel(self):
+        """
+        Verifies that a cancelled waiting request gives up its place without blocking the others.
+        """
+        scheduler = FairScheduler(max_concurrency=1)
+        await scheduler.acquire("a")
+
+        waiting = asyncio.create_task(scheduler.acquire("b"))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+
+        self.assertEqual(scheduler.waiting(), 0)
+        scheduler.release()
+
+        await asyncio.wait_for(scheduler.acquire("c"), 1)
+        self.assertEqual(scheduler.running, 1)
+
+    def test_init_invalid(self):
+        """
+        Ensures that the concurrency must be a positive integer.
+        """
+        with self.assertRaises(ValueError):
+            FairScheduler(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import sys
+import os
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from faq_ranking import Ranking, WindowRanking, DecayRanking, create_ranking
+
+import unittest
+
+class TestOfFaqRanking(unittest.TestCase):
+    """
+    Unit test class for testing the time-windowed rankings of the most asked questions.
+    """
+
+    def setUp(self):
+        """
+        Sets up a controllable clock.
+        """
+        self.now = 100 * 3600
+        self.clock = lambda: self.now
+
+
+    def test_window(self):
+        """
+        Verifies that occurrences leave the ranking once their bucket leaves the window.
+        """
+        ranking = WindowRanking(top_k=2, window_hours=2, clock=self.clock)
+
+        ranking.add("kdy je oběd?", self.now - 3600)
+        ranking.add("kdy je oběd?", self.now - 3600)
+        ranking.add("kde je škola?")
+        ranking.add("kdy začíná výuka?")
+        ranking.add("kdy je oběd?", self.now - 5 * 3600)
+
+        self.assertEqual(ranking.top(), ["kdy je oběd?", "kde je škola?"])
+
+        self.now += 3600
+        self.assertEqual(ranking.top(), ["kde je škola?", "kdy začíná výuka?"])
+
+        self.now += 2 * 3600
+        self.assertEqual(ranking.top(), [])
+
+    def test_window_state(self):
+        """
+        Verifies that the buckets survive a restart.
+        """
+        ranking = WindowRanking(top_k=2, window_hours=2, clock=self.clock)
+        ranking.add("kde je škola?")
+        ranking.add("kdy je oběd?")
+        ranking.add("kdy je oběd?")
+
+        restored = WindowRanking(top_k=2, window_hours=2, clock=self.clock)
+        restored.load_state(ranking.to_state())
+
+        self.assertEqual(restored.top(), ["kdy je oběd?", "kde je škola?"])
+        self.assertEqual(restored.scores["kdy je oběd?"], 2)
+
+    def test_decay(self):
+        """
+        Verifies that recent occurrences outweigh older ones and that the scores decay by half every half-life.
+        """
+        ranking = DecayRanking(top_k=2, half_life_hours=1, clock=self.clock)
+
+        for _ in range(3):
+            ranking.add("kdy je oběd?", self.now - 3 * 3600)
+        ranking.add("kde je škola?")
+
+        self.assertEqual(ranking.top(), ["kde je škola?", "kdy je oběd?"])
+        self.assertAlmostEqual(ranking.score("kdy je oběd?"), 3 / 8)
+        self.assertAlmostEqual(ranking.score("kde je škola?", self.now + 3600), 0.5)
+
+        # Rescaling to a newer reference time keeps the scores
+        ranking.add("kde je škola?", self.now + 1000 * 3600)
+        self.assertAlmostEqual(ranking.score("kde je škola?", self.now + 1000 * 3600), 1)
+
+        restored = DecayRanking(top_k=2, half_life_hours=1, clock=self.clock)
+        restored.load_state(ranking.to_state())
+        self.assertEqual(restored.top(), ranking.top())
+
+    def test_decay_prune(self):
+        """
+        Verifies that the questions decayed below the minimal score are forgotten by `prune` and not when the top questions are read.
+        """
+        ranking = DecayRanking(top_k=2, half_life_hours=1, min_score=0.1, clock=self.clock)
+
+        ranking.add("kdy je oběd?", self.now - 4 * 3600)
+        ranking.add("kde je škola?", self.now - 3 * 3600)
+        ranking.add("kdo je ředitel?")
+
+        self.assertEqual(ranking.top(), ["kdo je ředitel?", "kde je škola?"])
+        self.assertIn("kdy je oběd?", ranking.scores)
+
+        ranking.prune()
+        self.assertEqual(ranking.top(), ["kdo je ředitel?", "kde je škola?"])
+        self.assertNotIn("kdy je oběd?", ranking.scores)
+
+        # Far in the future everything decayed, the decay factor does not overflow
+        self.now += 10000 * 3600
+        ranking.prune()
+        self.assertEqual(ranking.top(), [])
+        self.assertEqual(len(ranking.scores), 0)
+
+    def test_abstract(self):
+        """
+        Ensures that the base class cannot be instantiated without `add`.
+        """
+        with self.assertRaises(TypeError):
+            Ranking()
+
+    def test_create_ranking(self):
+        """
+        Validates the ranking modes.
+        """
+        self.assertIsNone(create_ranking("all"))
+        self.assertIsInstance(create_ranking("window"), WindowRanking)
+        self.assertIsInstance(create_ranking("decay"), DecayRanking)
+
+        with self.assertRaises(ValueError):
+            create_ranking("weekly")
+
+
+if __name__ == "__main__":
+    unittest.main()
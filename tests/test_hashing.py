@@ -0,0 +1,74 @@
+import sys
+import os
+import time
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from db.hashing import PasswordHasher, HashingOverloadedError
+from db.utils import hash_password, get_rounds
+
+import unittest
+
+class TestOfPasswordHasher(unittest.TestCase):
+    """
+    Unit test class for testing the `PasswordHasher` class methods.
+    """
+
+    def setUp(self):
+        """
+        Initializes a `PasswordHasher` instance with the lowest work factor to keep the tests fast.
+        """
+        self.hasher = PasswordHasher(rounds=4, workers=1, max_pending=1, timeout=5)
+
+    def tearDown(self):
+        """
+        Stops the worker processes.
+        """
+        self.hasher.shutdown()
+
+
+    def test_init_invalid(self):
+        """
+        Ensures exceptions are raised for invalid parameters.
+        """
+        with self.assertRaises(ValueError):
+            PasswordHasher(rounds=3)
+        with self.assertRaises(ValueError):
+            PasswordHasher(max_pending=0)
+
+
+    def test_hash_verify(self):
+        """
+        Verifies that hashes use the configured work factor and can be verified.
+        """
+        password_hash = self.hasher.hash("Heslo123!")
+
+        self.assertEqual(get_rounds(password_hash), 4)
+        self.assertTrue(self.hasher.verify("Heslo123!", password_hash))
+        self.assertFalse(self.hasher.verify("Spatne123!", password_hash))
+
+    def test_needs_rehash(self):
+        """
+        Confirms that hashes with an outdated work factor are detected.
+        """
+        self.assertTrue(self.hasher.needs_rehash(hash_password("Heslo123!", rounds=5)))
+        self.assertFalse(self.hasher.needs_rehash(hash_password("Heslo123!", rounds=4)))
+
+    def test_overloaded(self):
+        """
+        Ensures that jobs over the queue limit are rejected instead of queued.
+        """
+        busy = self.hasher.submit(time.sleep, 0.5)
+
+        with self.assertRaises(HashingOverloadedError):
+            self.hasher.hash("Heslo123!")
+        self.assertEqual(self.hasher.rejected, 1)
+
+        busy.result()
+        time.sleep(0.01)
+        self.assertTrue(self.hasher.verify("Heslo123!", hash_password("Heslo123!", rounds=4)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+import sys
+import os
+import json
+import asyncio
+
+from http import HTTPStatus
+from unittest.mock import patch, AsyncMock, MagicMock
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from auth_tokens import TokenSigner
+from http_server import HttpServer, is_valid_password
+from db.hashing import HashingOverloadedError
+
+import unittest
+
+class TestOfHttpServer(unittest.IsolatedAsyncioTestCase):
+    """
+    Unit test class for testing the `HttpServer` class methods.
+    """
+
+    async def asyncSetUp(self):
+        """
+        Starts an `HttpServer` instance on a free port with a stub password hasher.
+        """
+        self.hasher = MagicMock()
+        self.hasher.hash_async = AsyncMock(return_value="$2b$12$hash")
+        self.hasher.verify_async = AsyncMock(return_value=True)
+        self.hasher.needs_rehash.return_value = False
+
+        self.signer = TokenSigner({"test": "tajny-klic"}, "test")
+        self.server = HttpServer({"http_host": "127.0.0.1", "http_port": 0, "http_max_body_size": 1024}, self.hasher, token_signer=self.signer)
+        await self.server.start()
+        self.port = self.server._server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        """
+        Stops the server.
+        """
+        await self.server.close()
+
+
+    async def _request(self, reader, writer, method, path, payload=None, headers=""):
+        """
+        Sends a request over an open connection and reads the response.
+        """
+        body = json.dumps(payload).encode() if payload is not None else b""
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n{headers}\r\n".encode() + body
+        )
+
+        status = int((await reader.readline()).split()[1])
+        response_headers = {}
+        while (line := await reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(":")
+            response_headers[name.lower()] = value.strip()
+
+        response_body = await reader.readexactly(int(response_headers["content-length"]))
+        return status, response_headers, json.loads(response_body) if response_body else None
+
+
+    async def test_login_keep_alive(self):
+        """
+        Verifies that several requests are served over one keep-alive connection.
+        """
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+
+        with patch("http_server.get_user_by_username", return_value={"id": 7, "password_hash": "$2b$12$hash"}):
+            for _ in range(3):
+                status, headers, body = await self._request(reader, writer, "POST", "/login", {"username": "jan", "password": "Heslo123!"})
+                self.assertEqual(status, 200)
+                self.assertEqual(body["user_id"], 7)
+                self.assertEqual(self.signer.verify(body["token"]), 7)
+                self.assertEqual(headers["connection"], "keep-alive")
+
+        writer.close()
+
+    async def test_login_rehash(self):
+        """
+        Verifies that a password hashed with an outdated cost is rehashed on login.
+        """
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        self.hasher.needs_rehash.return_value = True
+
+        with patch("http_server.get_user_by_username", return_value={"id": 7, "password_hash": "$2b$10$hash"}), \
+             patch("http_server.update_password_hash") as update_password_hash:
+            status, _, _ = await self._request(reader, writer, "POST", "/login", {"username": "jan", "password": "Heslo123!"})
+
+        self.assertEqual(status, 200)
+        update_password_hash.assert_called_once_with(7, "$2b$12$hash")
+        writer.close()
+
+    async def test_login_rehash_overloaded(self):
+        """
+        Ensures that the login succeeds when the rehash is rejected by an overloaded hasher.
+        """
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        self.hasher.needs_rehash.return_value = True
+        self.hasher.hash_async.side_effect = HashingOverloadedError("busy")
+
+        with patch("http_server.get_user_by_username", return_value={"id": 7, "password_hash": "$2b$10$hash"}), \
+             patch("http_server.update_password_hash") as update_password_hash, \
+             self.assertLogs("http_server", "WARNING"):
+            status, _, body = await self._request(reader, writer, "POST", "/login", {"username": "jan", "password": "Heslo123!"})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(self.signer.verify(body["token"]), 7)
+        update_password_hash.assert_not_called()
+        writer.close()
+
+    async def test_register(self):
+        """
+        Verifies registration including the password strength validation and CORS headers.
+        """
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+
+        with patch("http_server.create_user") as create_user:
+            status, headers, _ = await self._request(
+                reader, writer, "POST", "/register", {"username": "jan", "password": "Heslo123!"}, "Origin: http://localhost:3000\r\n"
+            )
+            self.assertEqual(status, 201)
+            self.assertEqual(headers["access-control-allow-origin"], "http://localhost:3000")
+            create_user.assert_called_once_with("jan", "$2b$12$hash")
+
+            status, _, body = await self._request(reader, writer, "POST", "/register", {"username": "jan", "password": "slabe"})
+            self.assertEqual(status, 400)
+
+        writer.close()
+
+    async def test_overloaded(self):
+        """
+        Ensures that an overloaded password hasher results in 503.
+        """
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        self.hasher.hash_async.side_effect = HashingOverloadedError("busy")
+
+        status, headers, _ = await self._request(reader, writer, "POST", "/register", {"username": "jan", "password": "Heslo123!"})
+
+        self.assertEqual(status, 503)
+        self.assertEqual(headers["retry-after"], "1")
+        writer.close()
+
+    async def test_invalid_requests(self):
+        """
+        Ensures that unknown routes, wrong methods, invalid bodies and too large bodies are rejected.
+        """
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+
+        self.assertEqual((await self._request(reader, writer, "POST", "/unknown", {}))[0], 404)
+        self.assertEqual((await self._request(reader, writer, "GET", "/login"))[0], 405)
+        self.assertEqual((await self._request(reader, writer, "OPTIONS", "/login"))[0], 204)
+        self.assertEqual((await self._request(reader, writer, "POST", "/login", [1, 2]))[0], 400)
+
+        status, headers, _ = await self._request(reader, writer, "POST", "/login", {"password": "x" * 2000})
+        self.assertEqual(status, 413)
+        self.assertEqual(headers["connection"], "close")
+
+        writer.close()
+
+    async def test_metrics(self):
+        """
+        Verifies that the metrics are exposed in the Prometheus text format.
+        """
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        self.server.metrics.observe("log_record", 0.001)
+
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+        response = (await reader.read()).decode()
+
+        self.assertTrue(response.startswith("HTTP/1.1 200 OK"))
+        self.assertIn("Content-Type: text/plain; version=0.0.4", response)
+        self.assertIn('jecnabot_stage_duration_seconds_count{stage="log_record"}', response)
+        writer.close()
+
+    async def test_metrics_protected(self):
+        """
+        Ensures that the metrics are served only to loopback clients, or to the clients with the token if it is configured.
+        """
+        self.assertIsNone(self.server._authorize_metrics({}, ("::ffff:127.0.0.1", 5000, 0, 0)))
+        self.assertEqual(self.server._authorize_metrics({}, ("10.0.0.5", 5000)), HTTPStatus.FORBIDDEN)
+        self.assertEqual(self.server._authorize_metrics({}, None), HTTPStatus.FORBIDDEN)
+
+        self.server.metrics_token = "tajny-token"
+        self.assertIsNone(self.server._authorize_metrics({"authorization": "Bearer tajny-token"}, ("10.0.0.5", 5000)))
+
+        for authorization in ("", "Bearer jiny-token"):
+            reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+            writer.write(f"GET /metrics HTTP/1.1\r\nHost: localhost\r\nAuthorization: {authorization}\r\nConnection: close\r\n\r\n".encode())
+            response = (await reader.read()).decode()
+
+            self.assertTrue(response.startswith("HTTP/1.1 401"))
+            self.assertIn("WWW-Authenticate: Bearer", response)
+            writer.close()
+
+
+
+    def test_is_valid_password(self):
+        """
+        Validates the password strength rules.
+        """
+        self.assertTrue(is_valid_password("Heslo123!"))
+        self.assertFalse(is_valid_password("heslo123!"))
+        self.assertFalse(is_valid_password("Heslo!"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,16 @@
 import sys
 import os
 import json
+import time
+import asyncio
+import threading
 from datetime import datetime
 
 # Add the 'src' directory to the module search path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
+from app_logging import correlation_id
+from fair_scheduler import current_flow
 from log_manager import LogManager
 
 import unittest
@@ -23,6 +28,7 @@ class TestOfLogManager(unittest.TestCase):
         
         self.log_file = "test_log_file.txt"
         self.stats_file = "test_stats_file.txt"
+        self.state_file = "test_stats_file.state.json"
 
     def tearDown(self):
         """
@@ -32,6 +38,11 @@ class TestOfLogManager(unittest.TestCase):
                 os.remove(self.log_file)
         if os.path.exists(self.stats_file):
             os.remove(self.stats_file)
+        if os.path.exists(self.state_file):
+            os.remove(self.state_file)
+        for extension in (".dat", ".idx", ".questions"):
+            if os.path.exists("test_log_file" + extension):
+                os.remove("test_log_file" + extension)
             
     
     def test_init(self):
@@ -116,6 +127,168 @@ class TestOfLogManager(unittest.TestCase):
         self.assertEqual(results, expected_stats)
         
         
+    def test_analyze_logs_incremental(self):
+        """
+        Verifies that logged records are counted right away and that the analysis resumes from the saved offset.
+        """
+        test_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file)
+
+        test_logger.log_record("Kde se dá koupit jídlo?", "V jídelně.")
+        test_logger.log_record("Kdy se otevírá škola?", "V 7:00.")
+        test_logger.log_record("kdy se otevírá škola?", "V 7:00.")
+
+        self.assertEqual(test_logger.top_questions, ["kdy se otevírá škola?", "kde se dá koupit jídlo?"])
+        self.assertEqual(test_logger.offset, os.path.getsize(self.log_file))
+
+        test_logger.analyze_logs()
+        self.assertEqual(test_logger.load_stats(), ["kdy se otevírá škola?", "kde se dá koupit jídlo?"])
+
+        # Records written by someone else are caught up from the saved offset after a restart
+        with open(self.log_file, "a", encoding="UTF-8") as log_file:
+            log_file.write("2024-12-17 16:39:46 | Question: Kde se dá koupit jídlo? -> Answer: V bufetu.\n" * 2)
+
+        restarted_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file)
+        self.assertEqual(restarted_logger.question_counts["kde se dá koupit jídlo?"], 1)
+
+        restarted_logger.analyze_logs()
+        self.assertEqual(restarted_logger.question_counts["kde se dá koupit jídlo?"], 3)
+        self.assertEqual(restarted_logger.get_questions(), ["kde se dá koupit jídlo?", "kdy se otevírá škola?"])
+
+    def test_analyze_logs_binary(self):
+        """
+        Verifies logging to the binary log store, including the catch up on records appended by another writer.
+        """
+        test_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file, log_format="binary")
+
+        test_logger.log_record("Kde se dá koupit jídlo?", "V jídelně -> v přízemí.\nNebo v bufetu.")
+        test_logger.log_record("Kdy se otevírá škola?", "V 7:00.")
+        test_logger.log_record("kdy se otevírá škola?", "V 7:00.")
+
+        self.assertFalse(os.path.exists(self.log_file))
+        self.assertEqual(test_logger.offset, 3)
+        self.assertEqual(test_logger.top_questions, ["kdy se otevírá škola?", "kde se dá koupit jídlo?"])
+
+        test_logger.analyze_logs()
+        test_logger.log_store.append([(time.time(), "Kde se dá koupit jídlo?", "V bufetu.")] * 2)
+
+        restarted_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file, log_format="binary")
+        restarted_logger.analyze_logs()
+
+        self.assertEqual(restarted_logger.question_counts["kde se dá koupit jídlo?"], 3)
+        self.assertEqual(restarted_logger.get_questions(), ["kde se dá koupit jídlo?", "kdy se otevírá škola?"])
+
+    def test_analyze_logs_window(self):
+        """
+        Verifies that the windowed ranking ignores old records and is returned fresh without an analysis.
+        """
+        with open(self.log_file, "w", encoding="UTF-8") as log_file:
+            log_file.write("2024-12-17 16:39:46 | Question: Kde se dá koupit jídlo? -> Answer: V jídelně.\n" * 3)
+
+        test_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file, ranking="window", window_hours=1)
+        test_logger.analyze_logs()
+
+        self.assertEqual(test_logger.top_questions, ["kde se dá koupit jídlo?"])
+        self.assertEqual(test_logger.ranking.top(), [])
+
+        test_logger.log_record("Kdy se otevírá škola?", "V 7:00.")
+        self.assertEqual(test_logger.get_questions(), ["kdy se otevírá škola?"])
+
+        test_logger.analyze_logs()
+        restarted_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file, ranking="window", window_hours=1)
+        self.assertEqual(restarted_logger.get_questions(), ["kdy se otevírá škola?"])
+
+    def test_analyze_logs_clustering(self):
+        """
+        Verifies that spelling variants are counted together under their most frequent phrasing, also after a restart.
+        """
+        with open(self.log_file, "w", encoding="UTF-8") as log_file:
+            log_file.write(
+                "2024-12-17 16:32:58 | Question: Kde se dá koupit jídlo? -> Answer: V jídelně.\n" * 2 +
+                "2024-12-17 16:36:40 | Question: Kdy začíná výuka? -> Answer: V 7:30.\n" +
+                "2024-12-17 16:36:49 | Question: kdy zacina vyuka -> Answer: V 7:30.\n" +
+                "2024-12-17 16:36:49 | Question: kdy začíná výuka ? -> Answer: V 7:30.\n"
+            )
+
+        test_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file, clustering=True)
+        test_logger.analyze_logs()
+
+        self.assertEqual(test_logger.load_stats(), ["kdy začíná výuka?", "kde se dá koupit jídlo?"])
+        self.assertEqual(test_logger.question_counts["kdy zacina vyuka"], 3)
+
+        restarted_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file, clustering=True)
+        restarted_logger.log_record("Kdy zacina vyuka?", "V 7:30.")
+
+        self.assertEqual(restarted_logger.question_counts["kdy zacina vyuka"], 4)
+        restarted_logger.analyze_logs()
+        self.assertEqual(restarted_logger.get_questions(), ["kdy začíná výuka?", "kde se dá koupit jídlo?"])
+
+    def test_save_state_bounded(self):
+        """
+        Verifies that only the counts of the most asked questions are saved and the state is saved only when records were counted.
+        """
+        test_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file, top_k=1, state_max_questions=2)
+
+        for question in ["a?", "b?", "b?", "c?", "d?", "d?", "d?"]:
+            test_logger.log_record(question, "Odpověď.")
+        test_logger.analyze_logs()
+
+        with open(self.state_file, "r", encoding="UTF-8") as file:
+            self.assertEqual(list(json.load(file)["counts"].items()), [("b?", 2), ("d?", 3)])
+
+        modified = os.path.getmtime(self.state_file)
+        os.utime(self.state_file, (modified - 10, modified - 10))
+        test_logger.analyze_logs()
+        self.assertEqual(os.path.getmtime(self.state_file), modified - 10)
+
+        restarted_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file, top_k=1, state_max_questions=2)
+        self.assertEqual(restarted_logger.get_questions(), ["d?"])
+        self.assertEqual(restarted_logger.offset, os.path.getsize(self.log_file))
+
+        with self.assertRaises(ValueError):
+            LogManager(log_file=self.log_file, stats_file=self.stats_file, top_k=3, state_max_questions=2)
+
+    def test_save_state_concurrent(self):
+        """
+        Ensures that concurrent saves of the state (e.g. an analysis and the shutdown) do not replace each other's temporary file.
+        """
+        test_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file)
+        test_logger.log_record("Kdy začíná výuka?", "V 7:30.")
+        errors = []
+
+        def save():
+            try:
+                for _ in range(50):
+                    test_logger.save_state()
+            except OSError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=save) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual([name for name in os.listdir(".") if name.startswith(self.state_file) and name.endswith(".tmp")], [])
+
+    def test_analyze_logs_unchanged(self):
+        """
+        Ensures that the stats file is not rewritten when the top questions do not change.
+        """
+        test_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file, top_k=1)
+
+        test_logger.log_record("Kdy se otevírá škola?", "V 7:00.")
+        test_logger.analyze_logs()
+        modified = os.path.getmtime(self.stats_file)
+        os.utime(self.stats_file, (modified - 10, modified - 10))
+
+        test_logger.log_record("Kdy se otevírá škola?", "V 7:00.")
+        test_logger.log_record("Kde se dá koupit jídlo?", "V jídelně.")
+        test_logger.analyze_logs()
+
+        self.assertEqual(os.path.getmtime(self.stats_file), modified - 10)
+
+
     def test_load_stats(self):
         """
         Verifies correct loading of statistics from the stats file.
@@ -180,7 +353,139 @@ class TestOfLogManager(unittest.TestCase):
         test_logger.most_asked_questions = ["kdy se otevírá škola?", "jaká je její dostupnost mhd?", "kde se dá koupit jídlo?"]
 
         self.assertEqual(test_logger.get_questions(), test_logger.most_asked_questions)
+
+    def test_get_questions_without_lock(self):
+        """
+        Ensures that the questions are read without the lock and that records written during an analysis are counted exactly once.
+        """
+        test_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file, ranking="window")
+        test_logger.log_record("Kdy se otevírá škola?", "V 7:00.")
+
+        with test_logger.lock:
+            self.assertEqual(test_logger.get_questions(), ["kdy se otevírá škola?"])
+
+        with open(self.log_file, "a", encoding="UTF-8") as log_file:
+            log_file.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} | Question: Kde se dá koupit jídlo? -> Answer: V jídelně.\n" * 50)
+
+        writers = [threading.Thread(target=lambda: [test_logger.log_record("Kde se dá koupit jídlo?", "V bufetu.") for _ in range(50)]) for _ in range(4)]
+        for writer in writers:
+            writer.start()
+        test_logger.analyze_logs()
+        for writer in writers:
+            writer.join()
+        test_logger.analyze_logs()
+
+        self.assertEqual(test_logger.question_counts["kde se dá koupit jídlo?"], 250)
+        self.assertEqual(test_logger.offset, os.path.getsize(self.log_file))
+        self.assertEqual(test_logger.get_questions(), ["kde se dá koupit jídlo?", "kdy se otevírá škola?"])
         
-        
+
+
+class TestOfLogManagerWriter(unittest.IsolatedAsyncioTestCase):
+    """
+    Unit test class for testing the batched asynchronous log writer of `LogManager`.
+    """
+
+    def setUp(self):
+        """
+        Sets up the names of temporary test files.
+        """
+        self.log_file = "test_log_file.txt"
+        self.stats_file = "test_stats_file.txt"
+
+    def tearDown(self):
+        """
+        Cleans up temporary files created during tests.
+        """
+        for file in (self.log_file, self.stats_file, "test_stats_file.state.json"):
+            if os.path.exists(file):
+                os.remove(file)
+
+
+    async def test_log_record_async(self):
+        """
+        Verifies that records from many concurrent sessions are written in a few batches.
+        """
+        test_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file, batch_size=50, flush_interval=0.05)
+
+        writes = []
+        write_records = test_logger._write_records
+        test_logger._write_records = lambda records: (writes.append(len(records)), write_records(records))
+
+        await asyncio.gather(*(test_logger.log_record_async(f"Otázka {i % 3}", "Odpověď") for i in range(200)))
+        await test_logger.close()
+
+        with open(self.log_file, "r", encoding="UTF-8") as log_file:
+            self.assertEqual(len(log_file.readlines()), 200)
+
+        self.assertEqual(sum(writes), 200)
+        self.assertLessEqual(len(writes), 5)
+        self.assertEqual(test_logger.question_counts["otázka 0"], 67)
+
+    async def test_log_record_async_backpressure(self):
+        """
+        Ensures that producers wait when the queue of records is full.
+        """
+        test_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file, queue_size=1, flush_interval=0.01)
+
+        # Simulates a slow disk
+        write_records = test_logger._write_records
+        test_logger._write_records = lambda records: (time.sleep(0.2), write_records(records))
+
+        await test_logger.log_record_async("Otázka", "Odpověď")
+        await asyncio.sleep(0.05)
+        await test_logger.log_record_async("Otázka", "Odpověď")
+
+        blocked = asyncio.create_task(test_logger.log_record_async("Otázka", "Odpověď"))
+        await asyncio.sleep(0.05)
+        self.assertFalse(blocked.done())
+
+        await asyncio.wait_for(blocked, 1)
+        await test_logger.close()
+
+    async def test_writer_context(self):
+        """
+        Ensures that the writer started by one session does not report the errors of other sessions under its correlation ID.
+        """
+        test_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file, flush_interval=0.01)
+
+        contexts = []
+        def write_records(records):
+            contexts.append((correlation_id.get(), current_flow.get()))
+            raise OSError("Disk je plný")
+        test_logger._write_records = write_records
+
+        async def session(session_id):
+            correlation_id.set(session_id)
+            current_flow.set(("session", session_id))
+            await test_logger.log_record_async("Otázka", "Odpověď")
+            await test_logger._queue.join()
+
+        with self.assertLogs("log_manager", "ERROR"):
+            await asyncio.create_task(session("relace-1"))
+            await asyncio.create_task(session("relace-2"))
+        await test_logger.close()
+
+        self.assertEqual(contexts, [(None, None), (None, None)])
+
+    async def test_request_analysis(self):
+        """
+        Verifies that analysis requests are coalesced into at most one run per interval.
+        """
+        test_logger = LogManager(log_file=self.log_file, stats_file=self.stats_file, analysis_interval=0.1)
+        test_logger.log_record("Kdy se otevírá škola?", "V 7:00.")
+
+        for _ in range(100):
+            test_logger.request_analysis()
+        await asyncio.sleep(0.05)
+
+        test_logger.request_analysis()
+        test_logger.request_analysis()
+        await test_logger._analysis_task
+
+        self.assertEqual(test_logger.analysis_stats(), {"requests": 102, "runs": 2, "skipped": 100})
+        self.assertEqual(test_logger.load_stats(), ["kdy se otevírá škola?"])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,97 @@
+import sys
+import os
+import shutil
+import tempfile
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from log_store import LogStore, migrate_text_log, read_text_log
+
+import unittest
+
+class TestOfLogStore(unittest.TestCase):
+    """
+    Unit test class for testing the `LogStore` class and the migration of the text log.
+    """
+
+    def setUp(self):
+        """
+        Creates a store in a temporary directory.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "log")
+        self.store = LogStore(self.path)
+
+    def tearDown(self):
+        """
+        Closes the store and removes the temporary directory.
+        """
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+
+    def test_append_scan(self):
+        """
+        Verifies that records are interned and read back, including answers that would break the text format.
+        """
+        self.assertEqual(self.store.append([(3600, "Kdy je oběd?", "Ve 12:00 -> v jídelně.\nDobrou chuť.")]), (0, 1))
+        self.assertEqual(self.store.append([(3700, "kdy je oběd? ", "Ve 12:00."), (7300, "Kde je škola?", "Ve Štěpánské.")]), (1, 3))
+
+        self.assertEqual(self.store.questions, ["kdy je oběd?", "kde je škola?"])
+        self.assertEqual(list(self.store.index()["question_id"]), [0, 0, 1])
+        self.assertEqual(list(self.store.scan(end=3700)), [(3600, "Kdy je oběd?", "Ve 12:00 -> v jídelně.\nDobrou chuť.")])
+        self.assertEqual(len(list(self.store.scan(start=3700))), 2)
+
+    def test_analytics(self):
+        """
+        Verifies the top questions and the hourly volume computed from the index.
+        """
+        self.store.append([(3600, "A?", "a"), (3601, "B?", "b"), (7200, "B?", "b"), (7201, "C?", "c"), (7202, "A?", "a")])
+
+        self.assertEqual(self.store.top_questions(2), [("a?", 2), ("b?", 2)])
+        self.assertEqual(self.store.top_questions(3, start=7200), [("a?", 1), ("b?", 1), ("c?", 1)])
+        self.assertEqual(self.store.hourly_volume(), [(3600, 2), (7200, 3)])
+        self.assertEqual(self.store.hourly_volume(end=7201), [(3600, 2), (7200, 1)])
+
+    def test_repair(self):
+        """
+        Ensures that an incompletely written record is truncated and a record missing in the index is indexed again.
+        """
+        self.store.append([(3600, "A?", "a"), (3601, "B?", "b")])
+        self.store.close()
+
+        with open(self.path + ".idx", "rb+") as index:
+            index.truncate(os.path.getsize(self.path + ".idx") - 1)
+        with open(self.path + ".dat", "ab") as data:
+            data.write(b"\x40\x00")
+
+        self.store = LogStore(self.path)
+
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(list(self.store.scan())[-1], (3601, "B?", "b"))
+
+        self.store.append([(3602, "C?", "c")])
+        self.assertEqual(list(self.store.scan())[-1], (3602, "C?", "c"))
+
+    def test_migrate_text_log(self):
+        """
+        Verifies the migration of the text log, including a multi-line answer.
+        """
+        log_file = os.path.join(self.directory, "log.txt")
+        with open(log_file, "w", encoding="UTF-8") as file:
+            file.write(
+                "2024-12-17 16:32:41 | Question: Kdy je oběd? -> Answer: Ve 12:00.\n" +
+                "2024-12-17 16:32:45 | Question: Kde je škola? -> Answer: Ve Štěpánské\nulici.\n"
+            )
+
+        self.assertEqual([record[1:] for record in read_text_log(log_file)], [("Kdy je oběd?", "Ve 12:00."), ("Kde je škola?", "Ve Štěpánské\nulici.")])
+        self.assertEqual(migrate_text_log(log_file, self.store), 2)
+        self.assertEqual(list(self.store.scan())[1][2], "Ve Štěpánské\nulici.")
+
+        with self.assertRaises(ValueError):
+            migrate_text_log(log_file, self.store)
+
+
+if __name__ == "__main__":
+    unittest.main()
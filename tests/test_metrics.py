@@ -0,0 +1,102 @@
+import sys
+import os
+import asyncio
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from metrics import Histogram, Metrics
+
+import unittest
+
+class TestOfMetrics(unittest.IsolatedAsyncioTestCase):
+    """
+    Unit test class for testing the `Metrics` and `Histogram` classes.
+    """
+
+    def test_histogram(self):
+        """
+        Verifies the cumulative buckets, sum and count of a histogram.
+        """
+        histogram = Histogram(buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value)
+
+        lines = histogram.render("latency", 'stage="x"')
+
+        self.assertIn('latency_bucket{stage="x",le="0.1"} 2', lines)
+        self.assertIn('latency_bucket{stage="x",le="1.0"} 3', lines)
+        self.assertIn('latency_bucket{stage="x",le="+Inf"} 4', lines)
+        self.assertIn('latency_sum{stage="x"} 2.65', lines)
+        self.assertIn('latency_count{stage="x"} 4', lines)
+
+        with self.assertRaises(ValueError):
+            Histogram(buckets=(1, 0.1))
+
+    async def test_timed(self):
+        """
+        Verifies that sync and async functions are timed and that the sampling rate is respected.
+        """
+        metrics = Metrics(sample_rate=1.0)
+
+        @metrics.timed("sync")
+        def add(a, b):
+            return a + b
+
+        @metrics.timed("async")
+        async def wait():
+            await asyncio.sleep(0.01)
+            return "done"
+
+        self.assertEqual(add(1, 2), 3)
+        self.assertEqual(await wait(), "done")
+        self.assertEqual(metrics.stages["sync"].count, 1)
+        self.assertGreaterEqual(metrics.stages["async"].sum, 0.01)
+
+        metrics.sample_rate = 0
+        add(1, 2)
+        self.assertEqual(metrics.stages["sync"].count, 1)
+
+        with self.assertRaises(ValueError):
+            Metrics(sample_rate=2)
+
+    async def test_timed_stream(self):
+        """
+        Verifies that an async generator is timed until it is exhausted and the time to its first item is recorded.
+        """
+        metrics = Metrics(sample_rate=1.0)
+
+        @metrics.timed("stream")
+        async def stream():
+            for part in ("a", "b"):
+                await asyncio.sleep(0.01)
+                yield part
+
+        self.assertEqual([part async for part in stream()], ["a", "b"])
+        self.assertGreaterEqual(metrics.stages["stream_first_item"].sum, 0.01)
+        self.assertGreaterEqual(metrics.stages["stream"].sum, 0.02)
+        self.assertLess(metrics.stages["stream_first_item"].sum, metrics.stages["stream"].sum)
+
+    async def test_render(self):
+        """
+        Verifies the lag probe and the exported collectors in the text format.
+        """
+        metrics = Metrics()
+        metrics.register_collector("cache", lambda: {"hits": 3, "name": "lru"})
+        metrics.observe("log_record", 0.002)
+
+        metrics.start_lag_probe(interval=0.01)
+        await asyncio.sleep(0.05)
+        metrics.stop_lag_probe()
+
+        text = metrics.render()
+
+        self.assertGreater(metrics.loop_lag.count, 0)
+        self.assertIn('jecnabot_stage_duration_seconds_count{stage="log_record"} 1', text)
+        self.assertIn("# TYPE jecnabot_event_loop_lag_seconds histogram", text)
+        self.assertIn("jecnabot_cache_hits 3", text)
+        self.assertNotIn("jecnabot_cache_name", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import sys
+import os
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from question_clusters import QuestionClusterer
+
+import unittest
+
+class TestOfQuestionClusterer(unittest.TestCase):
+    """
+    Unit test class for testing the `QuestionClusterer` class.
+    """
+
+    def test_add(self):
+        """
+        Verifies that spelling variants share a cluster while different questions do not.
+        """
+        clusterer = QuestionClusterer()
+
+        key, _ = clusterer.add("kdy začíná výuka?")
+        self.assertEqual(clusterer.add("kdy zacina vyuka")[0], key)
+        self.assertEqual(clusterer.add("kdy začíná výuka ?")[0], key)
+        self.assertEqual(clusterer.add("kdy zacina vyuk?")[0], key)
+
+        self.assertNotEqual(clusterer.add("kdy končí výuka?")[0], key)
+        self.assertNotEqual(clusterer.add("kdy je oběd?")[0], clusterer.add("kdy je ples?")[0])
+
+        self.assertEqual(clusterer.representative(key), "kdy začíná výuka?")
+        self.assertEqual(clusterer.stats()["merged"], 1)
+
+    def test_bounded(self):
+        """
+        Ensures that the least recently used unprotected cluster is evicted when the limit is reached.
+        """
+        clusterer = QuestionClusterer(max_clusters=2, max_phrasings=2)
+        clusterer.protected = lambda key: key == "kde je skola"
+
+        clusterer.add("kde je škola?")
+        clusterer.add("kdy je oběd?")
+        key, evicted = clusterer.add("jaký je rozvrh?")
+
+        self.assertEqual(evicted, "kdy je obed")
+        self.assertEqual(list(clusterer.clusters), ["kde je skola", key])
+
+        for phrasing in ("kde je skola", "kde je škola ?", "kde je škola ?"):
+            clusterer.add(phrasing)
+        self.assertEqual(len(clusterer.clusters["kde je skola"].phrasings), 2)
+        self.assertEqual(clusterer.representative("kde je skola"), "kde je škola ?")
+
+    def test_seed(self):
+        """
+        Verifies that a restored cluster keeps its key and representative phrasing.
+        """
+        clusterer = QuestionClusterer()
+        clusterer.seed("kdy zacina vyuka", "kdy začíná výuka?")
+
+        self.assertEqual(clusterer.add("Kdy začíná výuka")[0], "kdy zacina vyuka")
+        self.assertEqual(clusterer.representative("kdy zacina vyuka"), "kdy začíná výuka?")
+
+
+if __name__ == "__main__":
+    unittest.main()
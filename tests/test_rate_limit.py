@@ -0,0 +1,67 @@
+import sys
+import os
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from rate_limit import TokenBucket, RateLimiter
+
+import unittest
+
+class TestOfTokenBucket(unittest.TestCase):
+    """
+    Unit test class for testing the `TokenBucket` class.
+    """
+
+    def test_try_acquire(self):
+        """
+        Verifies that a burst is allowed and the tokens are refilled at the given rate.
+        """
+        now = [0.0]
+        bucket = TokenBucket(rate=2, burst=3, clock=lambda: now[0])
+
+        self.assertEqual([bucket.try_acquire() for _ in range(4)], [True, True, True, False])
+        self.assertAlmostEqual(bucket.retry_after(), 0.5)
+
+        now[0] = 0.5
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+        now[0] = 100
+        self.assertEqual(bucket.retry_after(), 0)
+        self.assertEqual(bucket.tokens, 3)
+
+    def test_init_invalid(self):
+        """
+        Ensures that invalid parameters are rejected.
+        """
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0, burst=1)
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=1, burst=0)
+
+
+class TestOfRateLimiter(unittest.TestCase):
+    """
+    Unit test class for testing the `RateLimiter` class.
+    """
+
+    def test_acquire(self):
+        """
+        Verifies that the keys are limited independently and the number of tracked keys is bounded.
+        """
+        now = [0.0]
+        limiter = RateLimiter(rate=1, burst=2, max_keys=2, clock=lambda: now[0])
+
+        self.assertEqual([limiter.acquire(1) for _ in range(3)], [0, 0, 1.0])
+        self.assertEqual(limiter.acquire(2), 0)
+
+        limiter.acquire(3)
+        self.assertEqual(limiter.stats(), {"keys": 2, "allowed": 4, "limited": 1})
+
+        # The bucket of the user 1 was dropped as the least recently used one
+        self.assertEqual(limiter.acquire(1), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,18 @@
 import sys
 import os
+import time
+import asyncio
+import threading
 import openai
 
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
 # Add the 'src' directory to the module search path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
-from response_logic import ResponseLogic
+from answer_cache import AnswerCache
+from response_logic import ResponseLogic, StreamInterrupted
+from retrieval_index import RetrievalIndex
 
 import unittest
 
@@ -37,5 +42,230 @@ class TestOfResponseLogic(unittest.TestCase):
     def test_get_answer_invalid(self):
         self.skipTest("NotImplemented.")
 
+
+class TestOfResponseLogicAsync(unittest.IsolatedAsyncioTestCase):
+    """
+    Unit test class for testing the asynchronous `ResponseLogic.get_answer_async` method.
+    """
+
+    def _create_logic(self, delay, **config):
+        """
+        Creates a `ResponseLogic` instance whose OpenAI client answers after the given delay.
+        """
+        logic = ResponseLogic({"openai_api_key": "test_key", "ai_model": "test_model", "ai_prompt": "test_prompt", **config})
+
+        async def create(**kwargs):
+            await asyncio.sleep(delay)
+            response = MagicMock()
+            response.choices[0].message.content = f"Odpověď: {kwargs['messages'][-1]['content']}"
+            return response
+
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(side_effect=create)
+        logic._async_client = client
+        return logic
+
+    async def test_get_answer_async(self):
+        """
+        Verifies that the answer of the asynchronous client is returned.
+        """
+        logic = self._create_logic(0)
+        self.assertEqual(await logic.get_answer_async("Kdy začíná výuka?"), "Odpověď: Kdy začíná výuka?")
+
+    async def test_get_answer_async_overlap(self):
+        """
+        Ensures that concurrent requests overlap instead of running one after another.
+        """
+        logic = self._create_logic(0.1)
+
+        start = time.monotonic()
+        answers = await asyncio.gather(*(logic.get_answer_async(f"Otázka {i}") for i in range(10)))
+
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(answers[3], "Odpověď: Otázka 3")
+
+    async def test_get_answer_async_single_flight(self):
+        """
+        Ensures that concurrent identical questions share one upstream request.
+        """
+        logic = self._create_logic(0.05)
+
+        answers = await asyncio.gather(*(logic.get_answer_async(question) for question in ["Kdy začíná výuka?", "kdy zacina vyuka"] * 5))
+
+        self.assertEqual(set(answers), {"Odpověď: Kdy začíná výuka?"})
+        self.assertEqual(logic._async_client.chat.completions.create.await_count, 1)
+        self.assertEqual(logic.single_flight.stats()["saved"], 9)
+
+    async def test_get_answer_async_concurrency_limit(self):
+        """
+        Ensures that `ai_max_concurrency` limits the number of requests in flight.
+        """
+        logic = self._create_logic(0.05, ai_max_concurrency=1)
+
+        start = time.monotonic()
+        await asyncio.gather(*(logic.get_answer_async(f"Otázka {i}") for i in range(4)))
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+    async def test_get_answer_async_timeout(self):
+        """
+        Ensures that a request exceeding `ai_timeout` returns the error message.
+        """
+        logic = self._create_logic(1, ai_timeout=0.05)
+        self.assertEqual(await logic.get_answer_async("Otázka"), "Omlouvám se, došlo k chybě při získávání odpovědi.")
+
+        # Errors must not be cached
+        self.assertEqual(logic.cache.stats()["size"], 0)
+
+    async def test_get_answer_async_cache(self):
+        """
+        Verifies that repeated questions are answered from the cache until the prompt or model changes.
+        """
+        logic = self._create_logic(0)
+
+        await logic.get_answer_async("Kdy začíná výuka?")
+        self.assertEqual(await logic.get_answer_async("kdy zacina vyuka"), "Odpověď: Kdy začíná výuka?")
+        self.assertEqual(logic._async_client.chat.completions.create.await_count, 1)
+
+        logic.config["ai_model"] = "other_model"
+        await logic.get_answer_async("kdy zacina vyuka")
+        self.assertEqual(logic._async_client.chat.completions.create.await_count, 2)
+
+    async def test_get_answer_async_index(self):
+        """
+        Verifies that curated answers from the retrieval index are returned without calling the API.
+        """
+        logic = self._create_logic(0)
+        logic.index = RetrievalIndex([("Kdy začíná výuka?", "Výuka začíná v 7:30.")])
+
+        self.assertEqual(await logic.get_answer_async("kdy začíná výuka"), "Výuka začíná v 7:30.")
+        self.assertEqual(await logic.get_answer_async("Kde je jídelna?"), "Odpověď: Kde je jídelna?")
+        self.assertEqual(logic._async_client.chat.completions.create.await_count, 1)
+
+        # The curated answers do not know the conversation, so a question asked with history goes to the API
+        history = [{"role": "user", "content": "Kdy končí výuka v pátek?"}, {"role": "assistant", "content": "Ve 14:10."}]
+        self.assertEqual(await logic.get_answer_async("kdy začíná výuka", history), "Odpověď: kdy začíná výuka")
+        self.assertEqual(logic._async_client.chat.completions.create.await_count, 2)
+
+    async def test_get_answer_async_history(self):
+        """
+        Verifies that the history is sent before the question and answers asked with history are neither shared nor cached.
+        """
+        logic = self._create_logic(0.01)
+        history = [{"role": "user", "content": "Kde je škola?"}, {"role": "assistant", "content": "Ječná 30."}]
+
+        await asyncio.gather(*(logic.get_answer_async("a jaká je její dostupnost MHD?", history) for _ in range(2)))
+
+        messages = logic._async_client.chat.completions.create.await_args.kwargs["messages"]
+        self.assertEqual(messages[1:], history + [{"role": "user", "content": "a jaká je její dostupnost MHD?"}])
+        self.assertEqual(logic._async_client.chat.completions.create.await_count, 2)
+        self.assertEqual(logic.cache.stats()["size"], 0)
+
+    async def test_stream_answer(self):
+        """
+        Verifies that the streamed answer is yielded part by part and cached once complete.
+        """
+        logic = self._create_logic(0)
+
+        async def stream():
+            for delta in ("Výuka ", "začíná ", None, "v 7:30."):
+                chunk = MagicMock()
+                chunk.choices[0].delta.content = delta
+                yield chunk
+
+        logic._async_client.chat.completions.create = AsyncMock(return_value=stream())
+
+        parts = [delta async for delta in logic.stream_answer("Kdy začíná výuka?")]
+        self.assertEqual(parts, ["Výuka ", "začíná ", "v 7:30."])
+
+        # The repeated question is answered from the cache at once
+        self.assertEqual([delta async for delta in logic.stream_answer("Kdy začíná výuka?")], ["Výuka začíná v 7:30."])
+
+    async def test_stream_answer_interrupted(self):
+        """
+        Ensures that a stream failing after some parts raises `StreamInterrupted` and the partial answer is not cached.
+        """
+        logic = self._create_logic(0)
+
+        async def stream():
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = "Výuka "
+            yield chunk
+            raise ConnectionError("API error")
+
+        logic._async_client.chat.completions.create = AsyncMock(return_value=stream())
+
+        parts = []
+        with self.assertRaises(StreamInterrupted):
+            async for delta in logic.stream_answer("Kdy začíná výuka?"):
+                parts.append(delta)
+
+        self.assertEqual(parts, ["Výuka "])
+        self.assertEqual(logic.cache.stats()["size"], 0)
+
+    async def test_reconfigured(self):
+        """
+        Verifies that a reconfigured instance keeps the cached answers and shared state unless the keys they depend on changed.
+        """
+        logic = self._create_logic(0)
+        await logic.get_answer_async("Kdy začíná výuka?")
+
+        same_model = logic.reconfigured({**logic.config, "ai_timeout": 10})
+        self.assertIs(same_model.cache, logic.cache)
+        self.assertIs(same_model.scheduler, logic.scheduler)
+        self.assertIs(same_model.single_flight, logic.single_flight)
+        self.assertIsNone(same_model._async_client)
+        self.assertEqual(same_model.timeout, 10)
+        self.assertIsNotNone(same_model._get_local_answer("Kdy začíná výuka?"))
+
+        other_model = same_model.reconfigured({**same_model.config, "ai_model": "other_model", "ai_max_concurrency": 4})
+        self.assertIs(other_model.cache, logic.cache)
+        self.assertIsNot(other_model.scheduler, logic.scheduler)
+        self.assertIsNot(other_model.single_flight, logic.single_flight)
+        self.assertIs(other_model._async_client, same_model._async_client)
+        self.assertIsNone(other_model._get_local_answer("Kdy začíná výuka?"))
+
+        self.assertIsNot(other_model.reconfigured({**other_model.config, "cache_size": 10}).cache, logic.cache)
+
+        shared_cache = AnswerCache()
+        shared = ResponseLogic(logic.config, cache=shared_cache)
+        self.assertIs(shared.reconfigured({**logic.config, "cache_size": 10}).shared_cache, shared_cache)
+
+    async def test_shared_cache(self):
+        """
+        Verifies that the shared cache is used off the event loop, behind the local cache of the worker.
+        """
+        threads = []
+
+        class SharedCache(AnswerCache):
+            def get(self, question):
+                threads.append(threading.current_thread())
+                return super().get(question)
+
+            def put(self, question, answer):
+                threads.append(threading.current_thread())
+                super().put(question, answer)
+
+        shared_cache = SharedCache()
+        logic = self._create_logic(0)
+        logic.shared_cache = shared_cache
+
+        await logic.get_answer_async("Kdy začíná výuka?")
+        await asyncio.gather(*logic._replications)
+        self.assertEqual(shared_cache.get("kdy zacina vyuka"), "Odpověď: Kdy začíná výuka?")
+
+        # Another worker finds the answer in the shared cache and keeps it locally
+        other = self._create_logic(0)
+        other.shared_cache = shared_cache
+        self.assertEqual(await other.get_answer_async("Kdy začíná výuka?"), "Odpověď: Kdy začíná výuka?")
+        self.assertEqual(await other.get_answer_async("Kdy začíná výuka?"), "Odpověď: Kdy začíná výuka?")
+        self.assertEqual(other._async_client.chat.completions.create.await_count, 0)
+        self.assertEqual(other.cache.stats()["size"], 1)
+
+        # Only the last lookup was made by the test itself, the rest ran in threads
+        self.assertEqual(len(threads), 4)
+        self.assertNotIn(threading.main_thread(), threads[:2] + threads[3:])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,87 @@
+import sys
+import os
+import json
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from retrieval_index import RetrievalIndex
+
+import unittest
+
+class TestOfRetrievalIndex(unittest.TestCase):
+    """
+    Unit test class for testing the `RetrievalIndex` class methods.
+    """
+
+    def setUp(self):
+        """
+        Builds a small index and prepares a temporary training data file.
+        """
+        self.index = RetrievalIndex([
+            ("Kdy začíná výuka?", "Výuka začíná v 7:30."),
+            ("Kdo je ředitel školy?", "Ředitelem je Ing. Novák."),
+            ("Jaká je dostupnost MHD?", "Škola je blízko metra I.P. Pavlova.")
+        ])
+        self.data_file = "test_training_data.jsonl"
+
+    def tearDown(self):
+        """
+        Cleans up temporary files created during tests.
+        """
+        if os.path.exists(self.data_file):
+            os.remove(self.data_file)
+
+
+    def test_init_invalid(self):
+        """
+        Ensures an exception is raised for an invalid n-gram size.
+        """
+        with self.assertRaises(ValueError):
+            RetrievalIndex([], ngram_size=0)
+
+    def test_from_jsonl(self):
+        """
+        Verifies that user/assistant pairs are loaded from the training data format.
+        """
+        with open(self.data_file, "w", encoding="UTF-8") as file:
+            file.write(json.dumps({"messages": [
+                {"role": "user", "content": "Kdy začíná výuka?"},
+                {"role": "assistant", "content": "Výuka začíná v 7:30."}
+            ]}) + "\n\n")
+
+        index = RetrievalIndex.from_jsonl(self.data_file)
+        self.assertEqual(index.questions, ["Kdy začíná výuka?"])
+        self.assertEqual(index.answers, ["Výuka začíná v 7:30."])
+
+
+    def test_search(self):
+        """
+        Confirms that the most similar curated question is ranked first.
+        """
+        results = self.index.search("kdy zacina vyuka", top_k=2)
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0][1], "Kdy začíná výuka?")
+        self.assertAlmostEqual(results[0][0], 1.0, places=5)
+        self.assertGreater(results[0][0], results[1][0])
+
+        self.assertEqual(self.index.search("xyz"), [])
+
+    def test_lookup(self):
+        """
+        Verifies that only matches above the threshold return the curated answer.
+        """
+        self.assertEqual(self.index.lookup("Kdo je ředitel školy", 0.8), "Ředitelem je Ing. Novák.")
+        self.assertIsNone(self.index.lookup("Jaké jsou obory?", 0.8))
+
+    def test_lookup_unknown_words(self):
+        """
+        Ensures that the words missing in the curated questions lower the similarity, so an off-topic question sharing a prefix does not match.
+        """
+        self.assertIsNone(self.index.lookup("Kdy začíná výuka v Brně?", 0.8))
+        self.assertLess(self.index.search("Kdy začíná výuka v Brně?")[0][0], self.index.search("Kdy začíná výuka?")[0][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,20 @@
 import sys
 import os
+import json
+import asyncio
 
 import unittest
+import websockets
 from unittest.mock import AsyncMock, MagicMock
 
 # Add the 'src' directory to the module search path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
 from session import Session
-from response_logic import ResponseLogic
+from response_logic import ERROR_ANSWER, ResponseLogic, StreamInterrupted
+from rate_limit import RateLimiter, TokenBucket
+from session_registry import SessionRegistry
+from wire_format import FORMATS, msgpack
 
 class TestSession(unittest.TestCase):
     """
@@ -32,7 +38,7 @@ class TestSession(unittest.TestCase):
         """
         self.assertEqual(self.session.websocket, self.mock_websocket)
         self.assertEqual(self.session.logic, self.mock_logic)
-        self.assertIsInstance(self.session.client_id, int)
+        self.assertIsInstance(self.session.client_id, str)
 
     def test_init_invalid(self):
         """
@@ -117,5 +123,329 @@ class TestSession(unittest.TestCase):
         self.skipTest("NotImplemented - Couldn't make it work.")
         
 
+class TestSessionAsync(unittest.IsolatedAsyncioTestCase):
+    """
+    Unit test class for testing the asynchronous `Session` methods.
+    """
+
+    def setUp(self):
+        """
+        Creates a `Session` instance with a mock WebSocket and logger.
+        """
+        self.mock_websocket = AsyncMock()
+        self.mock_logger = MagicMock()
+        self.mock_logger.get_questions.return_value = ["kdy začíná výuka?"]
+        self.mock_logger.log_record_async = AsyncMock()
+
+        self.logic = ResponseLogic({"openai_api_key": "test_key", "ai_model": "test_model", "ai_prompt": "test_prompt"})
+        self.session = Session(websocket=self.mock_websocket, logic=self.logic, logger=self.mock_logger)
+
+    async def test_process_message_streaming(self):
+        """
+        Verifies that a streamed answer is sent as "chunk" frames followed by a "done" frame and logged in full.
+        """
+        async def stream_answer(question, history=None):
+            yield "Výuka "
+            yield "začíná v 7:30."
+
+        self.logic.config["stream_responses"] = True
+        self.logic.stream_answer = stream_answer
+
+        await self.session._process_message("1")
+
+        frames = [json.loads(call.args[0]) for call in self.mock_websocket.send.await_args_list]
+        self.assertEqual(frames, [
+            {"type": "chunk", "message": "Výuka "},
+            {"type": "chunk", "message": "začíná v 7:30."},
+            {"type": "done"}
+        ])
+        self.mock_logger.log_record_async.assert_awaited_once_with(question="kdy začíná výuka?", answer="Výuka začíná v 7:30.")
+
+    async def test_process_message_streaming_interrupted(self):
+        """
+        Ensures that a stream failing after some parts is ended by an "error" frame and the partial answer is neither logged nor remembered.
+        """
+        async def stream_answer(question, history=None):
+            yield "Výuka "
+            raise StreamInterrupted("API error")
+
+        self.logic.config["stream_responses"] = True
+        self.logic.stream_answer = stream_answer
+
+        await self.session._process_message("Kdy začíná výuka?")
+
+        frames = [json.loads(call.args[0]) for call in self.mock_websocket.send.await_args_list]
+        self.assertEqual(frames, [
+            {"type": "chunk", "message": "Výuka "},
+            {"type": "error", "code": "upstream_failed", "message": f" -> {ERROR_ANSWER}"}
+        ])
+        self.mock_logger.log_record_async.assert_not_awaited()
+        self.assertEqual(len(self.session.conversation), 0)
+
+    async def test_process_message(self):
+        """
+        Verifies that without streaming the answer is sent as a single "response" frame.
+        """
+        self.logic.get_answer_async = AsyncMock(return_value="Výuka začíná v 7:30.")
+
+        await self.session._process_message("Kdy začíná výuka?")
+
+        self.mock_websocket.send.assert_awaited_once_with(json.dumps({"type": "response", "message": "Výuka začíná v 7:30."}))
+
+    async def test_welcome_message_cached(self):
+        """
+        Verifies that the welcome frame is sent as encoded text and serialized again only when the questions change.
+        """
+        Session._welcome_frames.clear()
+
+        await self.session._welcome_message()
+        frame = self.mock_websocket.send.await_args.args[0]
+
+        self.assertEqual(json.loads(frame), {
+            "type": "welcome",
+            "message": "Ahoj, Co pro Vás mohu udělat?",
+            "questions": [{"id": 1, "text": "kdy začíná výuka?"}]
+        })
+        self.assertEqual(self.mock_websocket.send.await_args.kwargs, {"text": True})
+
+        other_session = Session(websocket=AsyncMock(), logic=self.logic, logger=self.mock_logger)
+        await other_session._welcome_message()
+        self.assertIs(other_session.websocket.send.await_args.args[0], frame)
+
+        self.mock_logger.get_questions.return_value = ["kdy končí výuka?"]
+        await other_session._welcome_message()
+        self.assertEqual(json.loads(other_session.websocket.send.await_args.args[0])["questions"], [{"id": 1, "text": "kdy končí výuka?"}])
+
+    async def test_process_message_conversation(self):
+        """
+        Verifies that the previous turns are sent with a follow-up question and failed answers are not remembered.
+        """
+        self.logic.get_answer_async = AsyncMock(side_effect=["Ječná 30, Praha 2.", ERROR_ANSWER, "Zastávka Štěpánská.", "Výuka začíná v 7:30."])
+
+        await self.session._process_message("Kde je škola?")
+        self.assertIsNone(self.logic.get_answer_async.await_args.args[1])
+
+        await self.session._process_message("a jaká je její dostupnost MHD?")
+        await self.session._process_message("a jaká je její dostupnost MHD?")
+
+        self.assertEqual(self.logic.get_answer_async.await_args.args[1], [
+            {"role": "user", "content": "Kde je škola?"},
+            {"role": "assistant", "content": "Ječná 30, Praha 2."}
+        ])
+        self.assertEqual(len(self.session.conversation), 2)
+
+        # A FAQ picked by its number does not depend on the conversation
+        await self.session._process_message("1")
+        self.assertEqual(self.logic.get_answer_async.await_args.args, ("kdy začíná výuka?", None))
+
+    async def test_process_message_rate_limited(self):
+        """
+        Verifies that messages over the session or user limit are answered with an error frame instead of an answer.
+        """
+        self.logic.get_answer_async = AsyncMock(return_value="Výuka začíná v 7:30.")
+        self.session.rate_limit = TokenBucket(rate=0.1, burst=2)
+
+        for _ in range(3):
+            await self.session._process_message("Kdy začíná výuka?")
+
+        frames = [json.loads(call.args[0]) for call in self.mock_websocket.send.await_args_list]
+        self.assertEqual([frame["type"] for frame in frames], ["response", "response", "error"])
+        self.assertEqual(frames[2]["code"], "rate_limited")
+        self.assertGreater(frames[2]["retry_after"], 9)
+        self.assertEqual(self.logic.get_answer_async.await_count, 2)
+
+        user_limiter = RateLimiter(rate=0.1, burst=1)
+        sessions = [Session(websocket=AsyncMock(), logic=self.logic, logger=self.mock_logger, user_id=7, user_limiter=user_limiter) for _ in range(2)]
+        for session in sessions:
+            await session._process_message("Kdy začíná výuka?")
+
+        self.assertEqual(json.loads(sessions[1].websocket.send.await_args.args[0])["type"], "error")
+        self.assertEqual(sessions[1].rate_limit.tokens, 5)
+
+    async def test_resume(self):
+        """
+        Verifies that an answer finished after the connection dropped is replayed on the resumed connection and the token is in the welcome frame.
+        """
+        registry = SessionRegistry()
+        session = Session(websocket=self.mock_websocket, logic=self.logic, logger=self.mock_logger, registry=registry)
+        registry.register(session)
+
+        await session._welcome_message()
+        self.assertEqual(json.loads(self.mock_websocket.send.await_args.args[0])["token"], session.token)
+
+        self.logic.get_answer_async = AsyncMock(return_value="Výuka začíná v 7:30.")
+        self.mock_websocket.send.side_effect = websockets.ConnectionClosed(None, None)
+        self.mock_websocket.recv.side_effect = ["Kdy začíná výuka?", websockets.ConnectionClosed(None, None)]
+        await session._serve(self.mock_websocket)
+
+        self.assertIs(registry.claim(session.token), session)
+
+        new_websocket = AsyncMock()
+        new_websocket.recv.side_effect = websockets.ConnectionClosed(None, None)
+        await session.resume(new_websocket, received=0)
+
+        frames = [json.loads(call.args[0]) for call in new_websocket.send.await_args_list]
+        self.assertEqual(frames, [
+            {"type": "resumed", "replayed": 1, "missed": 0},
+            {"type": "response", "message": "Výuka začíná v 7:30."}
+        ])
+        self.assertEqual(self.logic.get_answer_async.await_count, 1)
+
+        # The client received the answer, so nothing is replayed
+        await session.resume(AsyncMock(recv=AsyncMock(side_effect=websockets.ConnectionClosed(None, None))), received=1)
+        self.assertEqual(session.websocket.send.await_args.args[0], json.dumps({"type": "resumed", "replayed": 0, "missed": 0}))
+
+    async def test_connection_closed_before_serving(self):
+        """
+        Ensures that a session whose connection drops while the welcome or the resumed frame is sent is detached and expires.
+        """
+        now = [0.0]
+        registry = SessionRegistry(ttl=10, clock=lambda: now[0])
+        session = Session(websocket=self.mock_websocket, logic=self.logic, logger=self.mock_logger, registry=registry)
+        registry.register(session)
+
+        self.mock_websocket.send.side_effect = websockets.ConnectionClosed(None, None)
+        await session.handle_session()
+        self.assertEqual(registry.stats()["detached"], 1)
+
+        self.assertIs(registry.claim(session.token), session)
+        await session.resume(AsyncMock(send=AsyncMock(side_effect=websockets.ConnectionClosed(None, None))), received=0)
+        self.assertEqual(registry.stats()["detached"], 1)
+
+        now[0] = 11
+        self.assertEqual(registry.stats()["sessions"], 0)
+
+    async def test_upstream_flow_per_user(self):
+        """
+        Verifies that the concurrent sessions of one user share one turn of the upstream scheduler, so another user is not queued behind all of them.
+        """
+        logic = ResponseLogic({**self.logic.config, "ai_max_concurrency": 1})
+        order = []
+
+        async def create(**kwargs):
+            order.append(kwargs["messages"][-1]["content"])
+            await asyncio.sleep(0.01)
+            response = MagicMock()
+            response.choices[0].message.content = "Odpověď"
+            return response
+
+        logic._async_client = MagicMock()
+        logic._async_client.chat.completions.create = create
+
+        def session(user_id, question, address):
+            websocket = AsyncMock(remote_address=(address, 50000))
+            websocket.recv.side_effect = [question, websockets.ConnectionClosed(None, None)]
+            return Session(websocket=websocket, logic=logic, logger=self.mock_logger, user_id=user_id)
+
+        sessions = [session(1, f"Otázka {i}", f"10.0.0.{i}") for i in range(4)] + [session(2, "Otázka jiného uživatele", "10.0.0.9")]
+        self.assertEqual(sessions[0].flow, ("user", 1))
+        anonymous = session(None, "Otázka", "10.0.0.9")
+        self.assertEqual(anonymous.flow, ("session", anonymous.client_id))
+        self.assertNotEqual(session(None, "Otázka", "10.0.0.9").flow, anonymous.flow)
+
+        await asyncio.gather(*(session.handle_session() for session in sessions))
+
+        self.assertEqual(order, ["Otázka 0", "Otázka 1", "Otázka jiného uživatele", "Otázka 2", "Otázka 3"])
+
+    async def test_process_message_reload(self):
+        """
+        Verifies that the "reload" command of a logged-in user applies the changed configuration and reports an invalid one.
+        """
+        reload_config = MagicMock(side_effect=[True, False, ValueError("invalid")])
+        session = Session(websocket=self.mock_websocket, logic=self.logic, logger=self.mock_logger, user_id=1, reload_config=reload_config)
+
+        for _ in range(3):
+            await session._process_message("reload")
+
+        self.assertEqual([json.loads(call.args[0])["message"] for call in self.mock_websocket.send.await_args_list], [
+            " -> Konfigurace byla úspěšně aktualizována.",
+            " -> Konfigurace se nezměnila.",
+            " -> Nová konfigurace je neplatná, zůstává původní."
+        ])
+        self.mock_logger.log_record_async.assert_not_awaited()
+
+    async def test_process_message_reload_anonymous(self):
+        """
+        Ensures that an anonymous client cannot reload the configuration.
+        """
+        reload_config = MagicMock(return_value=True)
+        session = Session(websocket=self.mock_websocket, logic=self.logic, logger=self.mock_logger, reload_config=reload_config)
+
+        await session._process_message("reload")
+
+        reload_config.assert_not_called()
+        self.assertEqual(json.loads(self.mock_websocket.send.await_args.args[0]), {
+            "type": "info",
+            "message": " -> Konfiguraci mohou načíst jen přihlášení uživatelé."
+        })
+
+    async def test_process_message_logic_swapped(self):
+        """
+        Ensures that a message is answered by the logic of the session when it arrived, even if it is replaced meanwhile.
+        """
+        async def stream_answer(question, history=None):
+            self.session.logic = new_logic
+            yield "Výuka "
+            yield "začíná v 7:30."
+
+        new_logic = ResponseLogic({**self.logic.config, "stream_responses": False})
+        new_logic.get_answer_async = AsyncMock(return_value="Výuka začíná v 8:00.")
+        self.logic.config["stream_responses"] = True
+        self.logic.stream_answer = stream_answer
+
+        await self.session._process_message("Kdy začíná výuka?")
+        await self.session._process_message("Kdy začíná výuka?")
+
+        frames = [json.loads(call.args[0]) for call in self.mock_websocket.send.await_args_list]
+        self.assertEqual([frame["type"] for frame in frames], ["chunk", "chunk", "done", "response"])
+        self.assertEqual(frames[-1]["message"], "Výuka začíná v 8:00.")
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    async def test_msgpack_wire_format(self):
+        """
+        Verifies that a session negotiating MessagePack sends binary frames, converted to JSON when resumed on a JSON connection.
+        """
+        wire_format = FORMATS["jecnabot.msgpack"]
+        registry = SessionRegistry()
+        websocket = AsyncMock(subprotocol="jecnabot.msgpack")
+        session = Session(websocket=websocket, logic=self.logic, logger=self.mock_logger, registry=registry)
+
+        await session._welcome_message()
+        self.assertEqual(websocket.send.await_args.kwargs, {"text": False})
+        self.assertEqual(wire_format.decode(websocket.send.await_args.args[0]), {
+            "type": "welcome",
+            "message": "Ahoj, Co pro Vás mohu udělat?",
+            "questions": [{"id": 1, "text": "kdy začíná výuka?"}],
+            "token": session.token
+        })
+
+        self.logic.get_answer_async = AsyncMock(return_value="Výuka začíná v 7:30.")
+        await session._process_message("Kdy začíná výuka?")
+        self.assertEqual(websocket.send.await_args.args[0], msgpack.packb([1, "Výuka začíná v 7:30."]))
+
+        new_websocket = AsyncMock(subprotocol=None)
+        new_websocket.recv.side_effect = websockets.ConnectionClosed(None, None)
+        await session.resume(new_websocket, received=0)
+
+        self.assertEqual([json.loads(call.args[0]) for call in new_websocket.send.await_args_list], [
+            {"type": "resumed", "replayed": 1, "missed": 0},
+            {"type": "response", "message": "Výuka začíná v 7:30."}
+        ])
+
+    async def test_close_when_idle(self):
+        """
+        Verifies that a draining session is closed right away when idle and only after the answer when busy.
+        """
+        await self.session.close_when_idle()
+        self.mock_websocket.close.assert_awaited_once_with(1001, "Server se restartuje.")
+
+        self.mock_websocket.close.reset_mock()
+        self.session.closing = False
+        self.session.busy = True
+
+        await self.session.close_when_idle()
+        self.mock_websocket.close.assert_not_awaited()
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
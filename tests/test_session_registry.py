@@ -0,0 +1,83 @@
+import sys
+import os
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from session_registry import SessionRegistry
+
+import unittest
+from unittest.mock import MagicMock
+
+class TestOfSessionRegistry(unittest.TestCase):
+    """
+    Unit test class for testing the `SessionRegistry` class.
+    """
+
+    def setUp(self):
+        """
+        Creates a registry with a controllable clock.
+        """
+        self.now = [0.0]
+        self.registry = SessionRegistry(ttl=10, max_detached=2, clock=lambda: self.now[0])
+
+    def session(self):
+        session = MagicMock(user_id=None)
+        session.token = self.registry.new_token()
+        self.registry.register(session)
+        return session
+
+    def test_claim(self):
+        """
+        Verifies that a disconnected session can be resumed only within the TTL.
+        """
+        first, second = self.session(), self.session()
+        self.assertNotEqual(first.token, second.token)
+
+        self.registry.detach(first)
+        self.registry.detach(second)
+
+        self.now[0] = 5
+        self.assertIs(self.registry.claim(first.token), first)
+        self.assertIsNone(self.registry.claim("neznamy"))
+
+        self.now[0] = 11
+        self.assertIsNone(self.registry.claim(second.token))
+        self.assertEqual(self.registry.stats(), {"sessions": 1, "detached": 0, "resumed": 1, "expired": 1})
+
+    def test_bounded(self):
+        """
+        Ensures that the sessions disconnected first are dropped when there are too many disconnected sessions.
+        """
+        sessions = [self.session() for _ in range(3)]
+        for session in sessions:
+            self.registry.detach(session)
+
+        self.assertIsNone(self.registry.claim(sessions[0].token))
+        self.assertIs(self.registry.claim(sessions[2].token), sessions[2])
+
+    def test_claim_other_user(self):
+        """
+        Ensures that a session of a logged-in user cannot be resumed by another user or anonymously.
+        """
+        session = self.session()
+        session.user_id = 7
+        self.registry.detach(session)
+
+        self.assertIsNone(self.registry.claim(session.token))
+        self.assertIsNone(self.registry.claim(session.token, 8))
+        self.assertIs(self.registry.claim(session.token, 7), session)
+
+    def test_remove(self):
+        """
+        Verifies that an ended session cannot be resumed.
+        """
+        session = self.session()
+        self.registry.remove(session)
+
+        self.assertIsNone(self.registry.claim(session.token))
+        self.assertEqual(len(self.registry), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
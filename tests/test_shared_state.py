@@ -0,0 +1,44 @@
+import sys
+import os
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from shared_state import SharedState, StateManager
+
+import unittest
+
+class TestOfSharedState(unittest.TestCase):
+    """
+    Unit test class for testing the `SharedState` and `StateManager` classes.
+    """
+
+    def test_set_questions(self):
+        """
+        Verifies that the version is incremented only when the questions change.
+        """
+        state = SharedState(["kdy začíná výuka?"])
+        self.assertEqual(state.get_questions(), (0, ["kdy začíná výuka?"]))
+
+        self.assertFalse(state.set_questions(["kdy začíná výuka?"]))
+        self.assertTrue(state.set_questions(["kdy je oběd?", "kdy začíná výuka?"]))
+        self.assertEqual(state.get_questions(), (1, ["kdy je oběd?", "kdy začíná výuka?"]))
+
+    def test_manager(self):
+        """
+        Verifies that the answer cache and the state are served by the manager process.
+        """
+        with StateManager() as manager:
+            cache = manager.AnswerCache(10, 60)
+            state = manager.SharedState(["kdy začíná výuka?"])
+
+            cache.put("Kdy začíná výuka?", "V 7:30.")
+            state.set_questions(["kdy je oběd?"])
+
+            self.assertEqual(cache.get("kdy zacina vyuka"), "V 7:30.")
+            self.assertEqual(cache.stats()["hits"], 1)
+            self.assertEqual(state.get_questions(), (1, ["kdy je oběd?"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import sys
+import os
+import asyncio
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from single_flight import SingleFlight
+
+import unittest
+
+class TestOfSingleFlight(unittest.IsolatedAsyncioTestCase):
+    """
+    Unit test class for testing the `SingleFlight` class methods.
+    """
+
+    def setUp(self):
+        """
+        Initializes the `SingleFlight` instance and a counter of executions.
+        """
+        self.single_flight = SingleFlight()
+        self.executions = 0
+
+    async def _answer(self, result="Odpověď", error=None):
+        """
+        Simulates a slow upstream call.
+        """
+        self.executions += 1
+        await asyncio.sleep(0.05)
+        if error is not None:
+            raise error
+        return result
+
+
+    async def test_do(self):
+        """
+        Verifies that concurrent calls with the same key share one execution.
+        """
+        results = await asyncio.gather(*(self.single_flight.do("kdy zacina vyuka", self._answer) for _ in range(10)))
+
+        self.assertEqual(results, ["Odpověď"] * 10)
+        self.assertEqual(self.executions, 1)
+        self.assertEqual(self.single_flight.stats(), {"calls": 1, "saved": 9, "in_flight": 0})
+
+        # Finished calls are not reused
+        await self.single_flight.do("kdy zacina vyuka", self._answer)
+        self.assertEqual(self.executions, 2)
+
+    async def test_do_error(self):
+        """
+        Ensures that an error is propagated to all callers sharing the call.
+        """
+        results = await asyncio.gather(
+            *(self.single_flight.do("a", lambda: self._answer(error=ValueError("API error"))) for _ in range(3)),
+            return_exceptions=True
+        )
+
+        self.assertEqual(self.executions, 1)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    async def test_do_leader_cancelled(self):
+        """
+        Verifies that a follower still gets the result when the caller that started the call is cancelled.
+        """
+        leader = asyncio.create_task(self.single_flight.do("a", self._answer))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(self.single_flight.do("a", self._answer))
+        await asyncio.sleep(0.01)
+
+        leader.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+
+        self.assertEqual(await follower, "Odpověď")
+        self.assertEqual(self.executions, 1)
+        self.assertEqual(self.single_flight.stats()["in_flight"], 0)
+
+    async def test_do_all_cancelled(self):
+        """
+        Ensures that the call is cancelled once all its callers are, and the next caller starts a new one.
+        """
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def answer():
+            started.set()
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        callers = [asyncio.create_task(self.single_flight.do("a", answer)) for _ in range(2)]
+        await started.wait()
+
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+        self.assertEqual(self.single_flight.stats()["in_flight"], 0)
+        self.assertEqual(await self.single_flight.do("a", self._answer), "Odpověď")
+
+    async def test_stream(self):
+        """
+        Verifies that a consumer joining a stream in flight gets the already produced parts and the rest.
+        """
+        async def produce():
+            self.executions += 1
+            for part in ("Výuka ", "začíná ", "v 7:30."):
+                yield part
+                await asyncio.sleep(0.02)
+
+        async def consume(delay):
+            await asyncio.sleep(delay)
+            return [part async for part in self.single_flight.stream("a", produce)]
+
+        results = await asyncio.gather(consume(0), consume(0.03))
+
+        self.assertEqual(results, [["Výuka ", "začíná ", "v 7:30."]] * 2)
+        self.assertEqual(self.executions, 1)
+        self.assertEqual(self.single_flight.stats()["saved"], 1)
+
+    async def test_stream_error(self):
+        """
+        Ensures that an error of the shared stream is raised in every consumer after the produced parts.
+        """
+        async def produce():
+            yield "Výuka "
+            raise ValueError("API error")
+
+        async def consume():
+            parts = []
+            with self.assertRaises(ValueError):
+                async for part in self.single_flight.stream("a", produce):
+                    parts.append(part)
+            return parts
+
+        self.assertEqual(await asyncio.gather(consume(), consume()), [["Výuka "], ["Výuka "]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import sys
+import os
+import json
+import tempfile
+
+from unittest.mock import MagicMock, patch
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from app_logging import stop_logging
+from server import WebSocketServer
+
+import unittest
+
+CONFIG = {
+    "host": "localhost",
+    "port": 7777,
+    "ai_prompt": "prompt",
+    "ai_model": "model",
+    "openai_api_key": "key",
+    "training_data_file": "missing.jsonl",
+    "auth_keys": {"2026-09": "stary-tajny-klic-pro-testy-serveru"},
+    "auth_active_key": "2026-09",
+}
+
+
+class TestOfWebSocketServer(unittest.TestCase):
+    """
+    Unit test class for applying a reloaded configuration to the `WebSocketServer`.
+    """
+
+    def setUp(self):
+        """
+        Creates a server from a temporary configuration file, the log manager is not needed.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "config.json")
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(CONFIG, f)
+
+        with patch("server.create_log_manager", return_value=MagicMock()):
+            self.server = WebSocketServer(self.path)
+
+        self.session = MagicMock()
+        self.server.sessions.add(self.session)
+
+    def tearDown(self):
+        self.server.password_hasher.shutdown()
+        stop_logging()
+        self.directory.cleanup()
+
+    def test_apply_config(self):
+        """
+        Verifies that the auth, user limit and metrics keys are applied at once and a change of a restart key is reported.
+        """
+        old_token = self.server.token_signer.issue(1)
+
+        config = {
+            **CONFIG,
+            "auth_keys": {"2026-09": "stary-tajny-klic-pro-testy-serveru", "2026-10": "novy-tajny-klic-pro-testy-serveru"},
+            "auth_active_key": "2026-10",
+            "auth_required": True,
+            "rate_limit_user_rate": 5,
+            "metrics_sample_rate": 0.5,
+            "metrics_token": "tajny-token",
+            "http_port": 5001,
+        }
+
+        with self.assertLogs("server", "WARNING") as logs:
+            self.server.apply_config(config)
+        self.assertIn("http_port", "\n".join(logs.output))
+
+        # Tokens are issued with the new key, the old key still verifies the tokens issued before
+        self.assertIs(self.server.http_server.token_signer, self.server.token_signer)
+        self.assertTrue(self.server.token_signer.issue(1).startswith("2026-10."))
+        self.assertEqual(self.server.token_signer.verify(old_token), 1)
+
+        self.assertTrue(self.server.auth_required)
+        self.assertEqual(self.server.user_limiter.rate, 5)
+        self.assertIs(self.session.user_limiter, self.server.user_limiter)
+        self.assertIs(self.session.logic, self.server.logic)
+        self.assertEqual(self.server.metrics.sample_rate, 0.5)
+        self.assertEqual(self.server.http_server.metrics_token, "tajny-token")
+
+        # The signer is kept while its keys do not change
+        signer = self.server.token_signer
+        self.server.apply_config({**config, "ai_prompt": "new prompt"})
+        self.assertIs(self.server.token_signer, signer)
+
+    def test_apply_config_invalid(self):
+        """
+        Ensures that an invalid configuration changes nothing.
+        """
+        signer = self.server.token_signer
+        logic = self.server.logic
+
+        for invalid in ({"metrics_sample_rate": 2}, {"log_level": "LOUD"}, {"auth_active_key": "missing"}, {"rate_limit_user_burst": -1}, {"auth_keys": {"2026-09": "kratky-klic"}}):
+            with self.assertRaises(ValueError):
+                self.server.apply_config({**CONFIG, "auth_required": True, **invalid})
+
+        self.assertIs(self.server.token_signer, signer)
+        self.assertIs(self.server.logic, logic)
+        self.assertFalse(self.server.auth_required)
+
+
+if __name__ == "__main__":
+    unittest.main()
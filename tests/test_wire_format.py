@@ -0,0 +1,122 @@
+import sys
+import os
+import json
+import zlib
+
+from types import SimpleNamespace
+
+# Add the 'src' directory to the module search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from websockets.frames import Frame, Opcode
+
+from wire_format import JSON, FORMATS, ThresholdPerMessageDeflate, compression_extensions, format_for, select_subprotocol, msgpack
+
+import unittest
+
+FRAMES = [
+    {"type": "welcome", "message": "Ahoj, Co pro Vás mohu udělat?", "questions": [{"id": 1, "text": "kdy začíná výuka?"}, {"id": 2, "text": "kde je škola?"}]},
+    {"type": "response", "message": "Výuka začíná v 7:30."},
+    {"type": "info", "message": " -> Odpojuji se. Nashledanou!"},
+    {"type": "chunk", "message": "Výuka "},
+    {"type": "done"},
+    {"type": "error", "code": "rate_limited", "message": " -> Posíláte zprávy příliš rychle.", "retry_after": 1.5},
+    {"type": "resumed", "replayed": 2, "missed": 0},
+]
+
+
+class TestOfWireFormat(unittest.TestCase):
+    """
+    Unit test class for testing the wire formats of the frames.
+    """
+
+    def test_json(self):
+        """
+        Verifies that the JSON frames are the plain JSON messages and the token is spliced into the welcome frame.
+        """
+        for message in FRAMES:
+            self.assertEqual(JSON.encode(message), json.dumps(message))
+            self.assertEqual(JSON.decode(JSON.encode(message)), message)
+
+        frame = JSON.with_token(JSON.encode_welcome(FRAMES[0]), "abc")
+        self.assertEqual(json.loads(frame), {**FRAMES[0], "token": "abc"})
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def test_msgpack(self):
+        """
+        Verifies that the MessagePack frames round-trip, are smaller than JSON and the token is appended to the welcome frame.
+        """
+        wire_format = FORMATS["jecnabot.msgpack"]
+
+        for message in FRAMES:
+            data = wire_format.encode(message)
+            self.assertIsInstance(data, bytes)
+            self.assertEqual(wire_format.decode(data), message)
+            self.assertLess(len(data), len(JSON.encode(message).encode("UTF-8")))
+
+        self.assertEqual(wire_format.decode(wire_format.encode({"type": "response"})), {"type": "response"})
+        self.assertEqual(wire_format.decode(wire_format.encode({"type": "custom", "value": 1})), {"type": "custom", "value": 1})
+
+        frame = wire_format.with_token(wire_format.encode_welcome(FRAMES[0]), "abc")
+        self.assertEqual(wire_format.decode(frame), {**FRAMES[0], "token": "abc"})
+
+        with self.assertRaises(ValueError):
+            wire_format.decode(b"\xc1")
+        with self.assertRaises(ValueError):
+            wire_format.decode(msgpack.packb([99, "x"]))
+
+    def test_negotiation(self):
+        """
+        Verifies that the first supported format offered by the client is selected and JSON is used without a subprotocol.
+        """
+        self.assertEqual(select_subprotocol(None, ["chat", "jecnabot.json"]), "jecnabot.json")
+        self.assertIsNone(select_subprotocol(None, ["chat"]))
+        self.assertIsNone(select_subprotocol(None, []))
+
+        self.assertIs(format_for(SimpleNamespace(subprotocol=None)), JSON)
+        self.assertIs(format_for(SimpleNamespace(subprotocol="jecnabot.json")), JSON)
+        self.assertIs(format_for(object()), JSON)
+
+        if msgpack is not None:
+            self.assertEqual(select_subprotocol(None, ["jecnabot.msgpack", "jecnabot.json"]), "jecnabot.msgpack")
+            self.assertEqual(format_for(SimpleNamespace(subprotocol="jecnabot.msgpack")).name, "msgpack")
+
+    def test_compression_extensions(self):
+        """
+        Verifies that the deflate settings are validated and compression can be disabled.
+        """
+        self.assertEqual(compression_extensions({"ws_compression": False}), [])
+
+        factory, = compression_extensions({"ws_deflate_window_bits": 10, "ws_deflate_mem_level": 8, "ws_deflate_min_size": 64})
+        self.assertEqual(factory.server_max_window_bits, 10)
+        self.assertEqual(factory.compress_settings, {"memLevel": 8})
+        self.assertEqual(factory.min_size, 64)
+
+        for config in ({"ws_deflate_window_bits": 8}, {"ws_deflate_mem_level": 0}, {"ws_deflate_min_size": -1}, {"ws_deflate_min_size": "1"}):
+            with self.assertRaises(ValueError):
+                compression_extensions(config)
+
+    def test_threshold_deflate(self):
+        """
+        Verifies that short messages are sent uncompressed and the longer ones are compressed and can be decoded.
+        """
+        extension = ThresholdPerMessageDeflate(False, False, 12, 12, {"memLevel": 5}, min_size=64)
+        decoder = zlib.decompressobj(wbits=-12)
+
+        short = extension.encode(Frame(Opcode.TEXT, b"Ahoj"))
+        self.assertFalse(short.rsv1)
+        self.assertEqual(short.data, b"Ahoj")
+
+        text = "Výuka začíná v 7:30, výuka končí v 15:30. ".encode("UTF-8") * 4
+        for _ in range(2):
+            frame = extension.encode(Frame(Opcode.TEXT, text))
+            self.assertTrue(frame.rsv1)
+            self.assertLess(len(frame.data), len(text))
+            self.assertEqual(decoder.decompress(frame.data + b"\x00\x00\xff\xff"), text)
+
+        ping = Frame(Opcode.PING, b"")
+        self.assertIs(extension.encode(ping), ping)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -24,6 +24,7 @@ export default function Chat() {
   const [questions, setQuestions] = useState<{ id: number; text: string }[]>([]);
   
   const websocket = useRef<WebSocket | null>(null);
+  const streamingMessageId = useRef<number | null>(null);
   const chatContainerRef = useRef<HTMLDivElement>(null);
 
   const { email } = useUserContext();
@@ -66,14 +67,18 @@ export default function Chat() {
             { id: Date.now(), sender: "bot", text: data.message },
           ]);
           setQuestions(data.questions || []);
-        } else if (data.type === "response" || data.type === "info") {
+        } else if (data.type === "response" || data.type === "info" || data.type === "error") {
           handleBotResponse(data.message);
+        } else if (data.type === "chunk") {
+          handleBotChunk(data.message);
+          return;
+        } else if (data.type === "done") {
+          streamingMessageId.current = null;
         }
       } catch (err) {
         console.error("Error parsing WebSocket message:", err);
-      } finally {
-        setIsWaitingForResponse(false); 
       }
+      setIsWaitingForResponse(false); 
     };
 
     websocket.current.onclose = () => {
@@ -108,6 +113,21 @@ export default function Chat() {
     }, 1000); // Simulate a delay
   };
 
+  // Appends a streamed part of the answer to the bot message that is being generated.
+  const handleBotChunk = (chunk: string) => {
+    if (streamingMessageId.current === null) {
+      const messageId = Date.now();
+      streamingMessageId.current = messageId;
+      setMessages((prev) => [...prev, { id: messageId, sender: "bot", text: chunk }]);
+      return;
+    }
+
+    const messageId = streamingMessageId.current;
+    setMessages((prev) =>
+      prev.map((msg) => (msg.id === messageId ? { ...msg, text: msg.text + chunk } : msg))
+    );
+  };
+
   const handleSend = () => {
     if (input.trim() === "") return;
 
@@ -34,6 +34,8 @@ export default function Login() {
         const data = await response.json();
 
         document.cookie = `token=${data.token}; path=/; secure; samesite=strict;`;
+        // The chat page authenticates its WebSocket connection with the signed token
+        localStorage.setItem("token", data.token);
 
         setEmail(email); // Set email in context
         router.push("/chat");